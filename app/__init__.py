@@ -1,9 +1,9 @@
+import os
+
 from flask import Flask
 from flask_cors import CORS
 
 
-from app.tasks import checkout, return_book_task
-
 def create_app(config_object='app.config.Config'):
     app = Flask(__name__)
     CORS(
@@ -11,7 +11,8 @@ def create_app(config_object='app.config.Config'):
         origins=["http://localhost:3000"],
         supports_credentials=True,
         allow_headers=["*"],
-        methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"]
+        methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+        expose_headers=["X-Next-Cursor", "Link", "ETag", "Idempotent-Replayed", "X-Query-Count", "Server-Timing"]
     )
     app.config.from_object(config_object)
 
@@ -20,28 +21,47 @@ def create_app(config_object='app.config.Config'):
     app.config["CELERY_TASK_EAGER_PROPAGATES"] = True
 
     from app.models import db
+    from app.engine import register_engine
     db.init_app(app)
-    from flask_migrate import Migrate
-    migrate = Migrate(app, db)
+    with app.app_context():
+        register_engine(db.engine)
+    if os.environ.get("FLASK_RUN_FROM_CLI") == "true":
+        # Alembic is only needed for `flask db ...`; keep it out of web/worker startup
+        from flask_migrate import Migrate
+        Migrate(app, db)
 
     # Import and register blueprints
     from app.routes.books import books_bp
     from app.routes.holders import holders_bp
+    from app.routes.tasks import tasks_bp
+    from app.routes.imports import imports_bp
+    from app.routes.metrics import metrics_bp
+    from app.routes.stats import stats_bp
+    from app.routes.events import events_bp
 
     app.register_blueprint(books_bp, url_prefix="/api/books")
     app.register_blueprint(holders_bp, url_prefix="/api/holders")
+    app.register_blueprint(tasks_bp, url_prefix="/api/tasks")
+    app.register_blueprint(imports_bp, url_prefix="/api/imports")
+    app.register_blueprint(stats_bp, url_prefix="/api/stats")
+    app.register_blueprint(events_bp, url_prefix="/api/events")
+    app.register_blueprint(metrics_bp)
 
-    return app
+    from app import instrumentation
+    instrumentation.init_app(app)
 
+    from app.cli import seed_data_command
+    app.cli.add_command(seed_data_command)
+
+    return app
 
-# Remove this line to avoid creating the app at import time.
-# The Flask CLI will call create_app() as needed.
 
+def preload_modules():
+    """Import everything a request or task may need, ahead of forking.
 
-from app.celery import celery
-from app.tasks import checkout
-from app.tasks import return_book
-from app.tasks.checkout import checkout_book
-from app.tasks.return_book import return_book_task
-celery.register_task(checkout_book)
-celery.register_task(return_book_task)
+    Used by gunicorn ``preload_app`` so the modules live in the master's
+    memory and are shared copy-on-write with every worker.
+    """
+    import app.tasks  # noqa: F401  (pulls in Celery, the task modules and Redis)
+    import app.routes.tasks  # noqa: F401
+    from celery import exceptions  # noqa: F401
@@ -0,0 +1,92 @@
+"""``Holder.book_count``: books per holder without counting them on every read.
+
+Every write that adds, removes or moves books calls ``adjust_book_counts`` in
+its own transaction: the book routes, the checkout/return tasks (a CTE in the
+Postgres single statement), bulk moves and imports. Writes that bypass those
+paths, such as raw SQL or ``flask seed-data``, are covered by
+``reconcile_book_counts``. It recomputes every counter with one UPDATE and
+fixes whatever drifted. Celery beat runs it every
+``BOOK_COUNT_RECONCILE_INTERVAL`` seconds (app.tasks.counts).
+
+The Library's row is never written: every checkout and return moves a book
+into or out of it, so a maintained counter there would serialize all of them
+on one row lock. Its count is derived on read instead (``library_book_count``,
+a count over the ``(holder_id, id)`` index).
+
+``reconcile_book_counts`` must see the books and the counters from one
+snapshot. At READ COMMITTED Postgres would re-check the UPDATE's WHERE against
+a holder row committed mid-statement while the count still used the old
+snapshot, writing a stale count over a correct one. The task runs it at
+REPEATABLE READ and retries on serialization failures.
+"""
+import logging
+from collections import Counter
+
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.exc import OperationalError
+
+from app.models import Book, Holder
+
+logger = logging.getLogger(__name__)
+
+LIBRARY_NAME = 'Library'
+# SQLSTATE serialization_failure
+SERIALIZATION_FAILURE = '40001'
+
+_holders = Holder.__table__
+_books = Book.__table__
+
+# Rows that fail the WHERE are not locked, so the Library's row never is
+_ADJUST = (
+    update(_holders)
+    .where(_holders.c.id == bindparam('holder'), _holders.c.name != LIBRARY_NAME)
+    .values(book_count=_holders.c.book_count + bindparam('delta'))
+)
+
+
+def adjust_book_counts(session, deltas):
+    """Add ``{holder_id: delta}`` to the holders' counters. Does not commit.
+
+    Rows are updated in id order, so concurrent adjustments take their row
+    locks in the same order. The Library's delta is ignored.
+    """
+    rows = [{'holder': holder_id, 'delta': delta} for holder_id, delta in sorted(deltas.items()) if delta]
+    if rows:
+        session.execute(_ADJUST, rows)
+
+
+def moved_deltas(moves):
+    """Counter deltas for ``(from_holder_id, to_holder_id)`` pairs."""
+    deltas = Counter()
+    for from_holder, to_holder in moves:
+        if from_holder != to_holder:
+            deltas[from_holder] -= 1
+            deltas[to_holder] += 1
+    return deltas
+
+
+def library_book_count(session):
+    """Books held by the Library, counted rather than maintained."""
+    library = select(_holders.c.id).where(_holders.c.name == LIBRARY_NAME).scalar_subquery()
+    return session.scalar(select(func.count()).select_from(_books).where(_books.c.holder_id == library))
+
+
+def is_serialization_failure(error):
+    return isinstance(error, OperationalError) and getattr(error.orig, 'pgcode', None) == SERIALIZATION_FAILURE
+
+
+def reconcile_book_counts(connection):
+    """Reset every drifted counter to the real count; returns how many were wrong.
+
+    Takes a Session or a Connection and does not commit. With concurrent
+    writers, run it at REPEATABLE READ (see the module docstring).
+    """
+    actual = select(func.count()).select_from(_books).where(_books.c.holder_id == _holders.c.id).scalar_subquery()
+    fixed = connection.execute(
+        update(_holders)
+        .where(_holders.c.name != LIBRARY_NAME, _holders.c.book_count != actual)
+        .values(book_count=actual)
+    ).rowcount
+    if fixed:
+        logger.warning("Reconciled book_count for %d holder(s)", fixed)
+    return fixed
@@ -0,0 +1,111 @@
+import json
+import logging
+import time
+import uuid
+from functools import wraps
+
+from flask import current_app, make_response
+from redis.exceptions import RedisError
+
+from app.redis_client import delete_if_equals, get_redis
+from app.versions import current_versions, etag_for
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY = 'cache:{}'
+LOCK_KEY = 'cache-lock:{}'
+STATS_KEY = 'cache:stats'
+# Response headers worth replaying from the cache (pagination links)
+CACHED_HEADERS = ('X-Next-Cursor', 'Link')
+LOCK_POLL_INTERVAL = 0.025
+
+
+def _encode(response):
+    headers = {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers}
+    meta = json.dumps({'mimetype': response.mimetype, 'headers': headers})
+    return meta.encode() + b'\n' + response.get_data()
+
+
+def _decode(raw, state):
+    meta, _, body = raw.partition(b'\n')
+    meta = json.loads(meta)
+    response = current_app.response_class(body, mimetype=meta['mimetype'], headers=meta['headers'])
+    response.headers['X-Cache'] = state
+    return response
+
+
+def _count(client, stat):
+    try:
+        client.hincrby(STATS_KEY, stat, 1)
+    except RedisError:
+        pass
+
+
+def cache_stats():
+    """Hit/miss/coalesced counters aggregated across all web workers."""
+    raw = get_redis().hgetall(STATS_KEY)
+    return {k.decode(): int(v) for k, v in raw.items()}
+
+
+def cached(*tables):
+    """Cache 200 responses in Redis, keyed by URL and the ``tables`` versions.
+
+    Writes invalidate by bumping the table versions (``bump_versions``), which
+    moves every reader to a fresh key; stale entries simply age out after
+    ``CACHE_TTL``. On a miss only one worker recomputes: the others wait for
+    its result (single-flight) instead of stampeding the database. Any Redis
+    failure falls back to running the view.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            config = current_app.config
+            if not config.get('CACHE_ENABLED', False):
+                return view(*args, **kwargs)
+            versions = current_versions(*tables)
+            if versions is None:
+                return view(*args, **kwargs)
+            client = get_redis()
+            key = CACHE_KEY.format(etag_for(versions))
+            try:
+                raw = client.get(key)
+                if raw is not None:
+                    _count(client, 'hits')
+                    return _decode(raw, 'HIT')
+                token = uuid.uuid4().hex
+                lock_timeout = config.get('CACHE_LOCK_TIMEOUT', 5)
+                if not client.set(LOCK_KEY.format(key), token, nx=True, px=int(lock_timeout * 1000)):
+                    deadline = time.monotonic() + lock_timeout
+                    while time.monotonic() < deadline:
+                        time.sleep(LOCK_POLL_INTERVAL)
+                        raw = client.get(key)
+                        if raw is not None:
+                            _count(client, 'coalesced')
+                            return _decode(raw, 'HIT')
+                        if not client.exists(LOCK_KEY.format(key)):
+                            break
+                    token = None
+            except RedisError as e:
+                logger.warning("Cache unavailable for %s: %s", key, e)
+                return view(*args, **kwargs)
+
+            _count(client, 'misses')
+            try:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code == 200:
+                    try:
+                        client.set(key, _encode(response), ex=config.get('CACHE_TTL', 60))
+                    except RedisError as e:
+                        logger.warning("Could not store cache entry %s: %s", key, e)
+            finally:
+                # Also when the view raised, so waiters do not sit out the lock
+                # timeout. Only drop the lock if it is still ours (it may have expired)
+                if token is not None:
+                    try:
+                        delete_if_equals(client, LOCK_KEY.format(key), token)
+                    except RedisError as e:
+                        logger.warning("Could not release cache lock %s: %s", key, e)
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
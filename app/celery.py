@@ -1,17 +1,116 @@
 # Task imports moved to app/__init__.py to avoid circular imports
+import json
+import os
+
 from celery import Celery
+from celery.signals import worker_process_init
+from kombu import Exchange, Queue
+from app import metrics
 from app.config import Config
+from app.serialization import SERIALIZER, register_serializer
+
+# Latency-sensitive single-book tasks vs. long-running bulk/maintenance jobs.
+# Run separate workers per queue (app/worker.py) so a bulk job never sits in
+# front of a checkout.
+INTERACTIVE_QUEUE = 'interactive'
+BULK_QUEUE = 'bulk'
+
+# Redis transport priorities: lower is served first, across all queues a
+# worker consumes
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 9
+
+# First match wins; the catch-all keeps unrouted tasks off the interactive
+# queue and below its priority (an unset priority would be served first)
+DEFAULT_TASK_ROUTES = {
+    'app.tasks.checkout.*': {'queue': INTERACTIVE_QUEUE, 'priority': PRIORITY_HIGH},
+    'app.tasks.return_book.*': {'queue': INTERACTIVE_QUEUE, 'priority': PRIORITY_HIGH},
+    'app.tasks.bulk.*': {'queue': BULK_QUEUE, 'priority': PRIORITY_NORMAL},
+    # Imports can run for minutes; bulk moves go first
+    'app.tasks.imports.*': {'queue': BULK_QUEUE, 'priority': PRIORITY_LOW},
+    'app.tasks.loans.*': {'queue': BULK_QUEUE, 'priority': PRIORITY_LOW},
+    'app.tasks.counts.*': {'queue': BULK_QUEUE, 'priority': PRIORITY_LOW},
+    '*': {'queue': BULK_QUEUE, 'priority': PRIORITY_NORMAL},
+}
+# Deployments can re-route tasks without a code change, e.g.
+# CELERY_TASK_ROUTES='{"app.tasks.bulk.*": {"queue": "interactive"}}'.
+# Overrides are matched before the defaults.
+TASK_ROUTES = json.loads(os.environ.get('CELERY_TASK_ROUTES', '{}'))
+for pattern, route in DEFAULT_TASK_ROUTES.items():
+    TASK_ROUTES.setdefault(pattern, route)
+
+# prefetch_multiplier / acks_late per queue, applied by the worker entry point
+QUEUE_PROFILES = {
+    INTERACTIVE_QUEUE: {
+        'prefetch_multiplier': Config.CELERY_INTERACTIVE_PREFETCH,
+        'acks_late': Config.CELERY_INTERACTIVE_ACKS_LATE,
+    },
+    BULK_QUEUE: {
+        'prefetch_multiplier': Config.CELERY_BULK_PREFETCH,
+        'acks_late': Config.CELERY_BULK_ACKS_LATE,
+    },
+}
+
+register_serializer()
+metrics.connect_signals()
 
 celery = Celery(
     "my_example_celery_app",
     broker=Config.CELERY_BROKER_URL,
     backend=Config.CELERY_RESULT_BACKEND,
+    include=["app.tasks"],
 )
 
 celery.conf.update(
     broker_url=Config.CELERY_BROKER_URL,
     result_backend=Config.CELERY_RESULT_BACKEND,
+    task_queues=[Queue(name, Exchange(name), routing_key=name) for name in (INTERACTIVE_QUEUE, BULK_QUEUE)],
+    task_default_queue=BULK_QUEUE,
+    task_routes=TASK_ROUTES,
+    broker_transport_options={
+        'priority_steps': list(range(PRIORITY_LOW + 1)),
+        'sep': ':',
+        'queue_order_strategy': 'priority',
+        'visibility_timeout': Config.CELERY_VISIBILITY_TIMEOUT,
+    },
+    # Tasks are idempotent (availability checks + version CAS), so a message
+    # redelivered after a worker crash is safe to run again
+    task_reject_on_worker_lost=True,
+    # msgpack (zlib for large payloads) instead of JSON; JSON is still accepted
+    # so messages queued before a deploy can be consumed
+    task_serializer=SERIALIZER,
+    result_serializer=SERIALIZER,
+    accept_content=[SERIALIZER, 'json'],
+    result_accept_content=[SERIALIZER, 'json'],
+    # Results are only stored for tasks that opt in with ignore_result=False
+    # (the ones clients poll), and only briefly
+    task_ignore_result=True,
+    result_expires=Config.CELERY_RESULT_EXPIRES,
+    # `celery -A app.celery beat` (the beat service in docker-compose)
+    beat_schedule={
+        'refresh-loan-rollups': {
+            'task': 'app.tasks.loans.refresh_loan_rollups',
+            'schedule': Config.LOAN_ROLLUP_INTERVAL,
+            # A run that is still queued when the next is due is dropped
+            'options': {'expires': Config.LOAN_ROLLUP_INTERVAL},
+        },
+        'reconcile-holder-book-counts': {
+            'task': 'app.tasks.counts.reconcile_holder_book_counts',
+            'schedule': Config.BOOK_COUNT_RECONCILE_INTERVAL,
+            'options': {'expires': Config.BOOK_COUNT_RECONCILE_INTERVAL},
+        },
+    },
 )
 celery.autodiscover_tasks(['app.tasks'])
+
+
+@worker_process_init.connect
+def reset_engines_in_child(**kwargs):
+    # Each prefork child gets its own connection pool
+    from app.engine import reset_after_fork
+    reset_after_fork()
+
+
 # Task registration moved to app/__init__.py to avoid circular imports
 # Explicit registration removed to avoid circular import
@@ -0,0 +1,30 @@
+"""``flask`` CLI commands (registered in ``create_app``)."""
+import click
+from flask.cli import with_appcontext
+
+
+@click.command('seed-data')
+@click.option('--books', default=10_000, show_default=True, help='Books to generate.')
+@click.option('--holders', default=1_000, show_default=True, help='Holders to generate (besides the Library).')
+@click.option('--seed', default=0, show_default=True, help='Random seed; the same seed gives the same rows.')
+@click.option('--checked-out', default=0.2, show_default=True, help='Share of books not in the Library.')
+@click.option('--batch-size', default=10_000, show_default=True, help='Rows per executemany batch (non-Postgres).')
+@click.option('--replace', is_flag=True, help='Delete all existing books and holders first.')
+@with_appcontext
+def seed_data_command(books, holders, seed, checked_out, batch_size, replace):
+    """Bulk-load synthetic holders and books (COPY on Postgres)."""
+    from app.models import db
+    from app.seed import load_synthetic_data
+    from app.versions import bump_versions
+
+    if replace:
+        click.confirm('Delete all existing books and holders?', abort=True)
+    loaded = load_synthetic_data(
+        db.engine, books, holders, seed=seed, checked_out=checked_out, batch_size=batch_size, replace=replace,
+    )
+    bump_versions('books', 'holders')
+    rate = (loaded['books'] + loaded['holders']) / max(loaded['seconds'], 1e-9)
+    click.echo(
+        f"Loaded {loaded['holders']} holders and {loaded['books']} books "
+        f"in {loaded['seconds']:.2f}s ({rate:,.0f} rows/s)"
+    )
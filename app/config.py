@@ -1,8 +1,11 @@
 import os
+import tempfile
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
-# Configuration classes provide engine and Session access
+# Configuration classes; per-process engines and Sessions live in app/engine.py
 DB_USER = os.environ.get("POSTGRES_USER", "myuser")
 DB_PASSWORD = os.environ.get("POSTGRES_PASSWORD", "mypassword")
 DB_NAME = os.environ.get("POSTGRES_DB", "mydb")
@@ -14,15 +17,35 @@ DATABASE_URL = os.environ.get(
     f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 )
 
+# Connection pool settings, per process. Each gunicorn worker and each Celery
+# prefork child holds at most DB_POOL_SIZE + DB_MAX_OVERFLOW connections.
+# DB_POOL=null opens a connection per checkout (NullPool), for PgBouncer in
+# transaction pooling mode.
+DB_POOL = os.environ.get("DB_POOL", "queue")
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "5"))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "true").lower() == "true"
+
+
+def engine_options(url):
+    """create_engine() keyword arguments for ``url`` from the DB_POOL_* settings."""
+    if DB_POOL == "null":
+        return {"poolclass": NullPool}
+    options = {"pool_pre_ping": DB_POOL_PRE_PING, "pool_recycle": DB_POOL_RECYCLE}
+    if make_url(url).get_backend_name() != "sqlite":
+        options.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT)
+    return options
+
+
 class Config:
     DATABASE_URL = DATABASE_URL
     SQLALCHEMY_DATABASE_URI = DATABASE_URL
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(DATABASE_URL)
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SECRET_KEY = os.environ.get("SECRET_KEY", "dev")
 
-    engine = create_engine(DATABASE_URL)
-    Session = sessionmaker(bind=engine)
-
     CELERY_BROKER_URL = os.environ.get(
         "CELERY_BROKER_URL",
         "redis://redis:6379/0"
@@ -31,6 +54,59 @@ class Config:
         "CELERY_RESULT_BACKEND",
         "redis://redis:6379/0"
     )
+    # Upper bound (seconds) for ?wait= long-polling on task endpoints
+    TASK_WAIT_MAX = float(os.environ.get("TASK_WAIT_MAX", "30"))
+    # How long an Idempotency-Key maps to its task (keep <= CELERY_RESULT_EXPIRES),
+    # and the safety expiry of in-flight (book, holder) dedupe keys
+    IDEMPOTENCY_TTL = int(os.environ.get("IDEMPOTENCY_TTL", "600"))
+    INFLIGHT_TTL = int(os.environ.get("INFLIGHT_TTL", "60"))
+    # Worker profiles per queue (see app/celery.py and app/worker.py)
+    CELERY_INTERACTIVE_PREFETCH = int(os.environ.get("CELERY_INTERACTIVE_PREFETCH", "4"))
+    CELERY_INTERACTIVE_ACKS_LATE = os.environ.get("CELERY_INTERACTIVE_ACKS_LATE", "true").lower() == "true"
+    CELERY_BULK_PREFETCH = int(os.environ.get("CELERY_BULK_PREFETCH", "1"))
+    CELERY_BULK_ACKS_LATE = os.environ.get("CELERY_BULK_ACKS_LATE", "true").lower() == "true"
+    # Unacked (acks_late) messages are redelivered after this many seconds;
+    # must exceed the longest bulk task
+    CELERY_VISIBILITY_TIMEOUT = int(os.environ.get("CELERY_VISIBILITY_TIMEOUT", "3600"))
+    # Stored task results expire after this many seconds (Celery's default is a day)
+    CELERY_RESULT_EXPIRES = int(os.environ.get("CELERY_RESULT_EXPIRES", "600"))
+    # Per-request SQL statistics (app/instrumentation.py): Server-Timing and
+    # X-Query-Count headers, a log line per statement slower than SLOW_QUERY_MS,
+    # and an N+1 warning for a statement repeated N_PLUS_ONE_THRESHOLD times
+    SQL_INSTRUMENTATION = os.environ.get("SQL_INSTRUMENTATION", "true").lower() == "true"
+    SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "200"))
+    N_PLUS_ONE_THRESHOLD = int(os.environ.get("N_PLUS_ONE_THRESHOLD", "5"))
+    # Uploaded import files wait here for the bulk worker; it must be shared
+    # between the web and worker containers
+    IMPORT_DIR = os.environ.get("IMPORT_DIR", os.path.join(tempfile.gettempdir(), "library-imports"))
+    # Seconds between loan rollup refreshes (Celery beat); /api/stats/loans/
+    # lags the loan events by up to this much
+    LOAN_ROLLUP_INTERVAL = float(os.environ.get("LOAN_ROLLUP_INTERVAL", "60"))
+    # Seconds between recounts of Holder.book_count (Celery beat)
+    BOOK_COUNT_RECONCILE_INTERVAL = float(os.environ.get("BOOK_COUNT_RECONCILE_INTERVAL", "3600"))
+    # Change events (app/events.py): stream entries kept for Last-Event-ID
+    # replay, idle heartbeat and the lifetime of one SSE connection (seconds)
+    EVENTS_STREAM_MAXLEN = int(os.environ.get("EVENTS_STREAM_MAXLEN", "10000"))
+    EVENTS_HEARTBEAT = float(os.environ.get("EVENTS_HEARTBEAT", "15"))
+    EVENTS_MAX_STREAM_SECONDS = float(os.environ.get("EVENTS_MAX_STREAM_SECONDS", "300"))
+    # Open SSE connections per web process; each holds a gunicorn thread, so
+    # keep it well below GUNICORN_THREADS. Past it /api/events/ answers 503
+    EVENTS_MAX_STREAMS = int(os.environ.get("EVENTS_MAX_STREAMS", "8"))
+    # Port for the worker's Prometheus endpoint (0 disables it)
+    METRICS_PORT = int(os.environ.get("METRICS_PORT", "0"))
+    # Keyset pagination page sizes for list endpoints
+    PAGE_SIZE_DEFAULT = int(os.environ.get("PAGE_SIZE_DEFAULT", "100"))
+    PAGE_SIZE_MAX = int(os.environ.get("PAGE_SIZE_MAX", "1000"))
+    # Serve list/detail reads from column tuples + orjson instead of Marshmallow
+    FAST_SERIALIZER = os.environ.get("FAST_SERIALIZER", "false").lower() == "true"
+
+    # Redis for application data (change counters, caches), separate from the broker DB
+    REDIS_URL = os.environ.get("REDIS_URL", "redis://redis:6379/1")
+    REDIS_SOCKET_TIMEOUT = float(os.environ.get("REDIS_SOCKET_TIMEOUT", "0.5"))
+    # Read-through response cache for book/holder GETs
+    CACHE_ENABLED = os.environ.get("CACHE_ENABLED", "true").lower() == "true"
+    CACHE_TTL = int(os.environ.get("CACHE_TTL", "60"))
+    CACHE_LOCK_TIMEOUT = float(os.environ.get("CACHE_LOCK_TIMEOUT", "5"))
 
 class TestConfig:
     TEST_DB_USER = os.environ.get("POSTGRES_USER", "myuser")
@@ -63,3 +139,23 @@ class TestConfig:
         "CELERY_RESULT_BACKEND",
         "redis://redis:6379/0"
     )
+    # Upper bound (seconds) for ?wait= long-polling on task endpoints
+    TASK_WAIT_MAX = float(os.environ.get("TASK_WAIT_MAX", "30"))
+    # How long an Idempotency-Key maps to its task (keep <= CELERY_RESULT_EXPIRES),
+    # and the safety expiry of in-flight (book, holder) dedupe keys
+    IDEMPOTENCY_TTL = int(os.environ.get("IDEMPOTENCY_TTL", "600"))
+    INFLIGHT_TTL = int(os.environ.get("INFLIGHT_TTL", "60"))
+    IMPORT_DIR = os.environ.get("IMPORT_DIR", os.path.join(tempfile.gettempdir(), "library-imports"))
+    # Keyset pagination page sizes for list endpoints
+    PAGE_SIZE_DEFAULT = int(os.environ.get("PAGE_SIZE_DEFAULT", "100"))
+    PAGE_SIZE_MAX = int(os.environ.get("PAGE_SIZE_MAX", "1000"))
+    # Serve list/detail reads from column tuples + orjson instead of Marshmallow
+    FAST_SERIALIZER = os.environ.get("FAST_SERIALIZER", "false").lower() == "true"
+
+    # Redis for application data (change counters, caches), separate from the broker DB
+    REDIS_URL = os.environ.get("REDIS_URL", "redis://redis:6379/1")
+    REDIS_SOCKET_TIMEOUT = float(os.environ.get("REDIS_SOCKET_TIMEOUT", "0.5"))
+    # Read-through response cache for book/holder GETs
+    CACHE_ENABLED = os.environ.get("CACHE_ENABLED", "true").lower() == "true"
+    CACHE_TTL = int(os.environ.get("CACHE_TTL", "60"))
+    CACHE_LOCK_TIMEOUT = float(os.environ.get("CACHE_LOCK_TIMEOUT", "5"))
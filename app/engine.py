@@ -0,0 +1,66 @@
+import os
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import instrumentation
+from app.config import Config, engine_options
+
+_engine = None
+_engine_pid = None
+_session_factory = sessionmaker()
+# Engines created elsewhere (Flask-SQLAlchemy) whose pools must also be reset after a fork
+_managed_engines = []
+
+instrumentation.install()
+
+
+def init_engine(url=None):
+    """Create this process's engine and bind ``Session`` to it.
+
+    Nothing connects here; the pool opens connections on first use.
+    """
+    global _engine, _engine_pid
+    url = url or Config.DATABASE_URL
+    _engine = create_engine(url, **engine_options(url))
+    _engine_pid = os.getpid()
+    _session_factory.configure(bind=_engine)
+    return _engine
+
+
+def get_engine():
+    """Return the engine for the current process, creating it on first use.
+
+    If the process was forked after the engine was created, the inherited pool
+    is dropped first, so parent and child never share a socket.
+    """
+    if _engine is None:
+        return init_engine()
+    if _engine_pid != os.getpid():
+        reset_after_fork()
+    return _engine
+
+
+def Session(**kwargs):
+    """New ORM session bound to this process's engine."""
+    get_engine()
+    return _session_factory(**kwargs)
+
+
+def register_engine(engine):
+    if engine not in _managed_engines:
+        _managed_engines.append(engine)
+
+
+def reset_after_fork():
+    """Forget pooled connections inherited from the parent process.
+
+    Hooked into Celery's ``worker_process_init`` and gunicorn's ``post_fork``.
+    ``dispose(close=False)`` replaces the pool without closing the parent's
+    sockets, which the parent may still be using.
+    """
+    global _engine_pid
+    for engine in [_engine] + _managed_engines:
+        if engine is not None:
+            engine.dispose(close=False)
+    _engine_pid = os.getpid()
@@ -0,0 +1,268 @@
+"""Change events for browsers: a Redis stream, woken by pub/sub, served as SSE.
+
+``publish`` appends each event to the ``events`` stream (XADD, capped near
+``EVENTS_STREAM_MAXLEN`` entries) and PUBLISHes a wake-up on the ``events``
+channel, both in one round-trip. Writers call it after their commit, just as
+they call ``bump_versions``. A Redis failure is logged, not raised.
+
+Each web process runs one ``_Hub`` thread while it has clients. On a wake-up
+(or every ``POLL_SECONDS`` in case one was missed) the thread reads the new
+stream entries once, with XRANGE from the last id it saw, and hands them in
+stream order to every connected client's queue. A process therefore holds
+one Redis connection and makes one read per change, however many browsers
+are connected.
+
+``sse`` backs ``GET /api/events/``. A client that reconnects with
+``Last-Event-ID`` first gets the entries it missed from the stream. When the
+stream no longer reaches back that far, it gets a ``resync`` event instead
+and should refetch. An idle connection gets a comment line every
+``EVENTS_HEARTBEAT`` seconds. A stream ends after
+``EVENTS_MAX_STREAM_SECONDS`` (EventSource reconnects on its own), as does a
+client too slow to keep up with its queue. Each open stream holds a web
+thread, so a process accepts at most ``EVENTS_MAX_STREAMS`` of them; the hub
+turns away the rest and the route answers 503.
+
+Event ``data`` is compact JSON with a ``type`` and the changed fields, e.g.
+``{"type":"book.moved","ids":[4],"holder_id":2}``.
+"""
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+from redis.exceptions import RedisError
+
+from app.config import Config
+from app.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+STREAM_KEY = 'events'
+CHANNEL = 'events'
+# Browsers wait this long before reconnecting (the SSE ``retry`` field)
+RETRY_MS = 2000
+POLL_SECONDS = 5
+REPLAY_PAGE = 500
+CLIENT_QUEUE_SIZE = 1000
+
+# Sent instead of a replay that cannot be complete; clients refetch
+RESYNC = 'data: {"type":"resync"}\n\n'
+
+BOOK_FIELDS = ('id', 'title', 'author', 'published_year', 'holder_id')
+
+
+def book_event(action, book):
+    if action == 'deleted':
+        return {'type': 'book.deleted', 'id': book.id}
+    return {'type': f'book.{action}', **{field: getattr(book, field) for field in BOOK_FIELDS}}
+
+
+def holder_event(action, holder):
+    if action == 'deleted':
+        return {'type': 'holder.deleted', 'id': holder.id}
+    return {'type': f'holder.{action}', 'id': holder.id, 'name': holder.name}
+
+
+def moved_event(book_ids, holder_id):
+    return {'type': 'book.moved', 'ids': list(book_ids), 'holder_id': holder_id}
+
+
+def imported_event(count):
+    # Too many rows to list; clients refetch
+    return {'type': 'books.imported', 'count': count}
+
+
+def publish(*events):
+    """Append ``events`` to the stream and wake the subscribers. Call after commit."""
+    if not events:
+        return
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for event in events:
+            pipe.xadd(
+                STREAM_KEY, {'data': json.dumps(event, separators=(',', ':'))},
+                maxlen=Config.EVENTS_STREAM_MAXLEN, approximate=True,
+            )
+        pipe.publish(CHANNEL, '1')
+        pipe.execute()
+    except RedisError as e:
+        logger.warning("Could not publish %d event(s): %s", len(events), e)
+
+
+def parse_id(event_id):
+    """``'<ms>-<seq>'`` as a comparable tuple, or None if malformed."""
+    try:
+        ms, _, seq = event_id.partition('-')
+        return int(ms), int(seq or 0)
+    except (AttributeError, ValueError):
+        return None
+
+
+def _decode(entry):
+    entry_id, fields = entry
+    return entry_id.decode(), fields[b'data'].decode()
+
+
+def read_after(client, last_id, count=REPLAY_PAGE):
+    """Up to ``count`` ``(id, data)`` entries after ``last_id``, oldest first."""
+    return [_decode(entry) for entry in client.xrange(STREAM_KEY, min=f'({last_id}', max='+', count=count)]
+
+
+def latest_id(client):
+    newest = client.xrevrange(STREAM_KEY, count=1)
+    return newest[0][0].decode() if newest else '0-0'
+
+
+class _Client:
+    __slots__ = ('queue', 'overflowed')
+
+    def __init__(self):
+        self.queue = queue.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        self.overflowed = False
+
+
+class _Hub:
+    """Per-process fan-out of new stream entries to the connected clients."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients = set()
+        self._thread = None
+        self._ready = threading.Event()
+
+    def connect(self, timeout=2, limit=None):
+        """A new client queue, or None if ``limit`` clients are already connected."""
+        client = _Client()
+        with self._lock:
+            if limit is not None and len(self._clients) >= limit:
+                return None
+            self._clients.add(client)
+            if self._thread is None or not self._thread.is_alive():
+                self._ready.clear()
+                self._thread = threading.Thread(target=self._run, name='events-hub', daemon=True)
+                self._thread.start()
+        # Entries added before the hub took its starting position would be
+        # missed by a client that has no Last-Event-ID to replay from
+        self._ready.wait(timeout)
+        return client
+
+    def disconnect(self, client):
+        with self._lock:
+            self._clients.discard(client)
+
+    def _deliver(self, entries):
+        with self._lock:
+            clients = list(self._clients)
+        for client in clients:
+            for entry in entries:
+                try:
+                    client.queue.put_nowait(entry)
+                except queue.Full:
+                    client.overflowed = True
+                    self.disconnect(client)
+                    break
+
+    def _run(self):
+        last_id = None
+        pubsub = None
+        while True:
+            with self._lock:
+                if not self._clients:
+                    self._thread = None
+                    break
+            try:
+                redis = get_redis()
+                if pubsub is None:
+                    pubsub = redis.pubsub(ignore_subscribe_messages=True)
+                    pubsub.subscribe(CHANNEL)
+                    if last_id is None:
+                        last_id = latest_id(redis)
+                    self._ready.set()
+                pubsub.get_message(timeout=POLL_SECONDS)
+                # Drain the other wake-ups; one read covers them all
+                while pubsub.get_message(timeout=0):
+                    pass
+                while True:
+                    entries = read_after(redis, last_id)
+                    if not entries:
+                        break
+                    last_id = entries[-1][0]
+                    self._deliver(entries)
+            except RedisError as e:
+                logger.warning("Event stream unavailable: %s", e)
+                pubsub = None
+                self._ready.set()
+                time.sleep(1)
+        if pubsub is not None:
+            pubsub.close()
+
+
+_hubs = {}
+
+
+def hub():
+    # Threads do not survive a fork; each worker process gets its own hub
+    pid = os.getpid()
+    if pid not in _hubs:
+        _hubs[pid] = _Hub()
+    return _hubs[pid]
+
+
+def _message(event_id, data):
+    return f'id: {event_id}\ndata: {data}\n\n'
+
+
+def _replay(client, last_id):
+    """Entries after ``last_id`` as SSE messages; a ``resync`` if some were trimmed."""
+    parsed = parse_id(last_id)
+    oldest = client.xrange(STREAM_KEY, count=1)
+    # Past the trimmed end of the stream, the entries right after last_id may be gone
+    if parsed is None or (oldest and parse_id(oldest[0][0].decode()) > parsed):
+        yield None, RESYNC
+        return
+    while True:
+        entries = read_after(client, last_id)
+        for event_id, data in entries:
+            yield event_id, _message(event_id, data)
+        if len(entries) < REPLAY_PAGE:
+            return
+        last_id = entries[-1][0]
+
+
+def sse(subscriber, last_event_id=None, heartbeat=15, max_seconds=300):
+    """Generator of SSE text for a ``hub().connect()`` client: the replay after
+    ``last_event_id``, then live events. Disconnects the client when it ends.
+    """
+    try:
+        yield f'retry: {RETRY_MS}\n\n'
+        last = parse_id(last_event_id) if last_event_id else None
+        if last_event_id:
+            try:
+                for event_id, message in _replay(get_redis(), last_event_id):
+                    if event_id:
+                        last = parse_id(event_id)
+                    yield message
+            except RedisError as e:
+                logger.warning("Could not replay events after %s: %s", last_event_id, e)
+                yield RESYNC
+        deadline = time.monotonic() + max_seconds
+        while not subscriber.overflowed:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                event_id, data = subscriber.queue.get(timeout=min(heartbeat, remaining))
+            except queue.Empty:
+                yield ': keepalive\n\n'
+                continue
+            parsed = parse_id(event_id)
+            # The hub delivers in stream order, so anything at or before the
+            # replay's last entry was already sent
+            if last is not None and parsed <= last:
+                continue
+            last = parsed
+            yield _message(event_id, data)
+    finally:
+        hub().disconnect(subscriber)
@@ -0,0 +1,62 @@
+import csv
+import io
+import json
+
+from sqlalchemy import select
+
+from app.models import Book
+
+EXPORT_COLUMNS = ('id', 'title', 'author', 'published_year', 'holder_id')
+# Rows fetched per server-side cursor round-trip and emitted per response chunk
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def export_statement():
+    """Column-only SELECT over the catalog, streamed with a server-side cursor.
+
+    ``yield_per`` makes the driver fetch ``EXPORT_BATCH_SIZE`` rows at a time
+    (a named cursor on psycopg2), so no ORM objects are built and memory stays
+    flat however large the table is.
+    """
+    return (
+        select(*(getattr(Book, column) for column in EXPORT_COLUMNS))
+        .order_by(Book.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+
+
+def iter_ndjson(result):
+    for partition in result.partitions():
+        yield ''.join(
+            json.dumps(dict(zip(EXPORT_COLUMNS, row)), separators=(',', ':')) + '\n'
+            for row in partition
+        )
+
+
+def iter_csv(result):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    yield buffer.getvalue()
+    for partition in result.partitions():
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(partition)
+        yield buffer.getvalue()
+
+
+def iter_export(session, fmt):
+    """Yield the catalog as ``fmt`` text chunks, one chunk per fetched batch."""
+    result = session.execute(export_statement())
+    try:
+        if fmt == 'csv':
+            yield from iter_csv(result)
+        else:
+            yield from iter_ndjson(result)
+    finally:
+        result.close()
@@ -0,0 +1,114 @@
+"""Collapse duplicate checkout/return requests onto one Celery task.
+
+Two Redis keys point at the task that handles a request:
+
+* ``idempotency:<Idempotency-Key>`` (optional client header): a retry with
+  the same key gets the original task and its result for ``IDEMPOTENCY_TTL``.
+* ``inflight:<operation>``, e.g. ``checkout:<book>:<holder>``: a second
+  identical operation joins the task already queued or running. The task
+  releases it when it finishes (``release_inflight``).
+
+Both are claimed with ``SET NX`` under a pre-generated task id, so only the
+request that wins publishes a message. If publishing fails the winner drops
+its claims again, so retries are not pointed at a task that was never sent.
+If Redis is unavailable every request just publishes its own task, as before.
+"""
+import logging
+
+from flask import current_app
+from redis.exceptions import RedisError
+
+from app.redis_client import delete_if_equals, get_redis
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_KEY = 'idempotency:{}'
+INFLIGHT_KEY = 'inflight:{}'
+
+
+class IdempotencyKeyReused(ValueError):
+    """The Idempotency-Key was already used for a different operation."""
+
+
+def checkout_operation(book_id, holder_id):
+    return f'checkout:{book_id}:{holder_id}'
+
+
+def return_operation(book_id):
+    return f'return:{book_id}'
+
+
+def _claim(client, key, value, ttl):
+    """Set ``key`` to ``value`` unless taken; return the current value."""
+    if client.set(key, value, nx=True, ex=ttl):
+        return value
+    current = client.get(key)
+    # Expired between SET and GET: try once more
+    if current is None and client.set(key, value, nx=True, ex=ttl):
+        return value
+    return current.decode() if current is not None else value
+
+
+def _release_claims(claims):
+    try:
+        client = get_redis()
+        for key, value in claims:
+            delete_if_equals(client, key, value)
+    except RedisError as e:
+        logger.warning("Could not release claims %s: %s", [key for key, _ in claims], e)
+
+
+def dispatch(task, args, operation, idempotency_key=None):
+    """Publish ``task`` for ``operation`` unless an equivalent one exists.
+
+    Returns ``(async_result, replayed)``. Raises IdempotencyKeyReused if the
+    client sends the same key for a different operation.
+    """
+    from celery import uuid
+
+    config = current_app.config
+    task_id = uuid()
+    # Keys this request won, to give back if the task cannot be published
+    claims = []
+    try:
+        client = get_redis()
+        if idempotency_key:
+            key, value = IDEMPOTENCY_KEY.format(idempotency_key), f'{operation} {task_id}'
+            claimed = _claim(client, key, value, config.get('IDEMPOTENCY_TTL', 600))
+            claimed_operation, _, claimed_task_id = claimed.partition(' ')
+            if claimed_operation != operation:
+                raise IdempotencyKeyReused(idempotency_key)
+            if claimed_task_id != task_id:
+                return task.AsyncResult(claimed_task_id), True
+            claims.append((key, value))
+        key = INFLIGHT_KEY.format(operation)
+        inflight_task_id = _claim(client, key, task_id, config.get('INFLIGHT_TTL', 60))
+        if inflight_task_id == task_id:
+            claims.append((key, task_id))
+        else:
+            if idempotency_key:
+                # Later retries with this key should find the task we joined
+                client.set(
+                    IDEMPOTENCY_KEY.format(idempotency_key), f'{operation} {inflight_task_id}',
+                    xx=True, ex=config.get('IDEMPOTENCY_TTL', 600),
+                )
+            return task.AsyncResult(inflight_task_id), True
+    except RedisError as e:
+        logger.warning("Deduplication unavailable for %s: %s", operation, e)
+    try:
+        return task.apply_async(args=args, task_id=task_id), False
+    except Exception:
+        _release_claims(claims)
+        raise
+
+
+def release_inflight(operation, task_id):
+    """Let the next identical request publish a new task. Called by the task."""
+    if task_id is None:  # called directly, not as a task
+        return
+    key = INFLIGHT_KEY.format(operation)
+    try:
+        # Only drop the key if it is still ours (it may have expired and been re-claimed)
+        delete_if_equals(get_redis(), key, task_id)
+    except RedisError as e:
+        logger.warning("Could not release in-flight key %s: %s", key, e)
@@ -0,0 +1,211 @@
+"""Bulk import of books from CSV or NDJSON uploads.
+
+The upload is copied to ``IMPORT_DIR`` and an ``ImportJob`` row tracks it;
+``app.tasks.imports.import_books`` then calls ``run_import``. That function
+reads the file one row at a time and validates ``IMPORT_BATCH_SIZE`` rows per
+step, with one holder lookup per batch. Each batch is inserted with a single
+executemany and committed together with the job's progress counters. Memory
+is bounded by the batch size and the ``IMPORT_MAX_ERRORS`` cap, not by the
+file size. A redelivered job resumes after ``rows_processed``.
+
+Columns match the export (``app/export.py``): title, author, published_year
+and an optional holder_id (the Library when empty). Other columns, such as an
+exported ``id``, are ignored.
+"""
+import csv
+import json
+import os
+import shutil
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+
+from marshmallow import ValidationError
+from sqlalchemy import insert, select
+
+from app.book_counts import adjust_book_counts
+from app.events import imported_event, publish
+from app.models import Book, Holder
+from app.schemas import BookImportSchema
+from app.versions import bump_versions
+
+IMPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+IMPORT_BATCH_SIZE = 1000
+IMPORT_MAX_ERRORS = 1000
+REQUIRED_COLUMNS = ('title', 'author', 'published_year')
+COPY_BUFFER_SIZE = 1024 * 1024
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+_schema = BookImportSchema(many=True)
+
+
+class ImportFileError(ValueError):
+    """The file as a whole cannot be imported (bad header or encoding)."""
+
+
+def detect_format(filename, content_type):
+    """``csv``/``ndjson`` from the file extension or content type, or None."""
+    extension = os.path.splitext(filename or '')[1].lstrip('.').lower()
+    if extension in IMPORT_FORMATS:
+        return extension
+    if extension == 'jsonl':
+        return 'ndjson'
+    mimetype = (content_type or '').split(';')[0].strip()
+    for fmt, format_mimetype in IMPORT_FORMATS.items():
+        if mimetype == format_mimetype:
+            return fmt
+    return None
+
+
+def store_upload(stream, fmt, directory):
+    """Copy ``stream`` to a new file in ``directory`` in fixed-size chunks; return its path."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'{uuid.uuid4().hex}.{fmt}')
+    with open(path, 'wb') as f:
+        shutil.copyfileobj(stream, f, COPY_BUFFER_SIZE)
+    return path
+
+
+def remove_upload(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def iter_csv(f):
+    reader = csv.DictReader(f)
+    missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or ())]
+    if missing:
+        raise ImportFileError(f"CSV header is missing: {', '.join(missing)}")
+    for row in reader:
+        # Empty cells mean "not given", e.g. no holder_id
+        yield {key: value for key, value in row.items() if key is not None and value != ''}
+
+
+def iter_ndjson(f):
+    for line in f:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield {'_error': f'invalid JSON: {e}'}
+            continue
+        yield row if isinstance(row, dict) else {'_error': 'expected a JSON object'}
+
+
+ROW_READERS = {'csv': iter_csv, 'ndjson': iter_ndjson}
+
+
+def _batches(rows, size, skip):
+    """Yield ``[(row_number, row), ...]`` batches, skipping the first ``skip`` rows."""
+    batch = []
+    for number, row in enumerate(rows, start=1):
+        if number <= skip:
+            continue
+        batch.append((number, row))
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def validate_batch(session, batch, library_id):
+    """Split a batch into insertable row dicts and ``{"row", "errors"}`` entries."""
+    errors = {}
+    candidates = []
+    for number, row in batch:
+        if '_error' in row:
+            errors[number] = {'_schema': [row['_error']]}
+        else:
+            candidates.append((number, row))
+    loaded = []
+    try:
+        loaded = _schema.load([row for _, row in candidates])
+    except ValidationError as e:
+        for index, messages in e.messages.items():
+            errors[candidates[index][0]] = messages
+        loaded = e.valid_data
+    valid = [
+        (number, data) for (number, _), data in zip(candidates, loaded) if number not in errors
+    ]
+    holder_ids = {data['holder_id'] for _, data in valid if data.get('holder_id') is not None}
+    known = set(session.scalars(select(Holder.id).where(Holder.id.in_(holder_ids)))) if holder_ids else set()
+    rows = []
+    for number, data in valid:
+        holder_id = data.get('holder_id')
+        if holder_id is None:
+            holder_id = library_id
+        elif holder_id not in known:
+            errors[number] = {'holder_id': [f'Holder {holder_id} not found']}
+            continue
+        rows.append({
+            'title': data['title'], 'author': data['author'],
+            'published_year': data['published_year'], 'holder_id': holder_id,
+        })
+    return rows, [{'row': number, 'errors': errors[number]} for number in sorted(errors)]
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def run_import(session, job, batch_size=IMPORT_BATCH_SIZE, max_errors=IMPORT_MAX_ERRORS):
+    """Import ``job``'s file, committing rows and progress batch by batch."""
+    job.status = RUNNING
+    job.started_at = job.started_at or _now()
+    session.commit()
+    library_id = session.scalar(select(Holder.id).where(Holder.name == 'Library'))
+    try:
+        with open(job.path, encoding='utf-8-sig', newline='') as f:
+            rows = ROW_READERS[job.format](f)
+            for batch in _batches(rows, batch_size, job.rows_processed):
+                valid, errors = validate_batch(session, batch, library_id)
+                if valid:
+                    session.execute(insert(Book), valid)
+                    adjust_book_counts(session, Counter(row['holder_id'] for row in valid))
+                job.rows_processed = batch[-1][0]
+                job.rows_imported += len(valid)
+                job.rows_failed += len(errors)
+                if errors and len(job.errors) < max_errors:
+                    # Reassign so the JSON column is flagged as changed
+                    job.errors = job.errors + errors[:max_errors - len(job.errors)]
+                session.commit()
+                if valid:
+                    bump_versions('books')
+                    publish(imported_event(len(valid)))
+    except (ImportFileError, UnicodeDecodeError, csv.Error) as e:
+        session.rollback()
+        job.status = FAILED
+        job.message = str(e)
+    else:
+        job.status = SUCCEEDED
+    job.finished_at = _now()
+    session.commit()
+    return job
+
+
+def job_status(job):
+    return {
+        'id': job.id,
+        'status': job.status,
+        'filename': job.filename,
+        'format': job.format,
+        'rows_processed': job.rows_processed,
+        'rows_imported': job.rows_imported,
+        'rows_failed': job.rows_failed,
+        'errors': job.errors,
+        'message': job.message,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
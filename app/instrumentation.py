@@ -0,0 +1,157 @@
+"""Count and time SQL statements per unit of work (a request or a task).
+
+Listeners are attached once to the ``Engine`` class, so every engine in the
+process is covered (Flask-SQLAlchemy's and ``app.engine``'s). They do nothing
+unless a ``collect_queries()`` block is active in the current context. Outside
+one, a statement costs a single ContextVar lookup. Nested blocks (an eager
+task inside a request, a test around a request) add their totals to the
+enclosing block when they end.
+
+``init_app`` collects per Flask request. It adds ``Server-Timing`` and
+``X-Query-Count`` response headers, and logs statements slower than
+``SLOW_QUERY_MS`` and statements repeated ``N_PLUS_ONE_THRESHOLD`` times or
+more in one request (the usual sign of a lazy load in a loop).
+"""
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('query_stats', default=None)
+_installed = False
+_slow_query_seconds = Config.SLOW_QUERY_MS / 1000
+
+
+class QueryStats:
+    __slots__ = ('count', 'seconds', 'statements')
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        # statement text -> executions, for N+1 detection
+        self.statements = {}
+
+    def add(self, other):
+        self.count += other.count
+        self.seconds += other.seconds
+        for statement, n in other.statements.items():
+            self.statements[statement] = self.statements.get(statement, 0) + n
+
+    def repeated(self, threshold):
+        """``(statement, count)`` pairs executed at least ``threshold`` times, most first."""
+        return sorted(
+            ((s, n) for s, n in self.statements.items() if n >= threshold),
+            key=lambda item: item[1], reverse=True,
+        )
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('query_start')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+        stats.statements[statement] = stats.statements.get(statement, 0) + 1
+    if _slow_query_seconds and elapsed >= _slow_query_seconds:
+        logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, _shorten(statement))
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute; drop its start time
+    conn = exception_context.connection
+    starts = conn.info.get('query_start') if conn is not None else None
+    if starts:
+        starts.pop()
+
+
+def _shorten(statement, limit=500):
+    statement = ' '.join(statement.split())
+    return statement if len(statement) <= limit else statement[:limit] + '...'
+
+
+def install():
+    """Attach the statement listeners (idempotent)."""
+    global _installed
+    if not _installed:
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
+        _installed = True
+
+
+def start_collecting():
+    """Begin a unit of work; returns ``(stats, token)`` for ``stop_collecting``."""
+    stats = QueryStats()
+    return stats, _current.set(stats)
+
+
+def stop_collecting(token):
+    stats = _current.get()
+    _current.reset(token)
+    outer = _current.get()
+    if outer is not None and stats is not None:
+        outer.add(stats)
+
+
+@contextmanager
+def collect_queries():
+    stats, token = start_collecting()
+    try:
+        yield stats
+    finally:
+        stop_collecting(token)
+
+
+def server_timing(stats, total_seconds):
+    return f'db;dur={stats.seconds * 1000:.1f};desc="{stats.count} queries", total;dur={total_seconds * 1000:.1f}'
+
+
+def init_app(app):
+    """Collect SQL statistics for every request of ``app``."""
+    global _slow_query_seconds
+    if not app.config.get('SQL_INSTRUMENTATION', True):
+        return
+    install()
+    _slow_query_seconds = app.config.get('SLOW_QUERY_MS', Config.SLOW_QUERY_MS) / 1000
+
+    from flask import request
+
+    @app.before_request
+    def start_request_stats():
+        request.environ['app.query_stats'] = (time.perf_counter(), *start_collecting())
+
+    @app.after_request
+    def add_query_headers(response):
+        started = request.environ.get('app.query_stats')
+        if started is not None:
+            start, stats, _ = started
+            response.headers['X-Query-Count'] = str(stats.count)
+            response.headers['Server-Timing'] = server_timing(stats, time.perf_counter() - start)
+            threshold = app.config.get('N_PLUS_ONE_THRESHOLD', Config.N_PLUS_ONE_THRESHOLD)
+            for statement, n in stats.repeated(threshold):
+                logger.warning(
+                    "Possible N+1 in %s %s: %d executions of %s",
+                    request.method, request.path, n, _shorten(statement),
+                )
+        return response
+
+    @app.teardown_request
+    def stop_request_stats(exc):
+        started = request.environ.pop('app.query_stats', None)
+        if started is not None:
+            stop_collecting(started[2])
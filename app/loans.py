@@ -0,0 +1,223 @@
+"""Loan history: an append-only event log and the rollups that report on it.
+
+Every checkout and return appends a ``LoanEvent`` in the same transaction
+that moves the book (app/tasks/dal.py, app/tasks/bulk.py). ``refresh_rollups``
+folds the events past ``LoanRollupState.last_event_id`` into running totals
+per day, per book and per holder. It handles ``ROLLUP_BATCH_SIZE`` events per
+transaction and commits the totals together with the new watermark, so an
+event is never counted twice. Celery beat runs it every
+``LOAN_ROLLUP_INTERVAL`` seconds (app.tasks.loans).
+
+``loan_stats`` reads a bounded number of rollup rows, so ``/api/stats/loans/``
+costs the same however long the history is. It can be one refresh interval
+behind the events.
+
+On Postgres the watermark needs a brief SHARE lock on ``loan_events``, which
+conflicts with every checkout/return insert. It is requested with a short
+``lock_timeout`` (``ROLLUP_LOCK_TIMEOUT_MS``): a run that finds an insert
+transaction still open after that, such as a bulk move, is skipped and the
+next beat picks the events up. Interactive writes therefore queue behind the
+rollup for at most that long.
+"""
+import logging
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import OperationalError
+
+from app.models import Book, BookLoanTotal, Holder, HolderLoanTotal, LoanDaily, LoanEvent, LoanRollupState
+
+CHECKOUT = 'checkout'
+RETURN = 'return'
+ROLLUP_BATCH_SIZE = 10_000
+ROLLUP_LOCK_TIMEOUT_MS = 50
+# SQLSTATE lock_not_available
+LOCK_NOT_AVAILABLE = '55P03'
+STATE_ID = 1
+
+STATS_LIMIT_DEFAULT = 10
+STATS_LIMIT_MAX = 100
+STATS_DAYS_DEFAULT = 30
+STATS_DAYS_MAX = 366
+
+logger = logging.getLogger(__name__)
+
+_UPSERT_INSERTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+
+def log_events(session, events):
+    """Append ``{'book_id', 'holder_id', 'kind'}`` dicts. Does not commit."""
+    if events:
+        session.execute(insert(LoanEvent), events)
+
+
+def _utc(moment):
+    # SQLite hands back naive datetimes from CURRENT_TIMESTAMP, which is UTC
+    return moment.replace(tzinfo=timezone.utc) if moment.tzinfo is None else moment.astimezone(timezone.utc)
+
+
+def _settled_max_event_id(session):
+    """The highest event id with no uncommitted event below it.
+
+    ``None`` when an insert transaction held ``loan_events`` for longer than
+    ``ROLLUP_LOCK_TIMEOUT_MS``.
+    """
+    if session.get_bind().dialect.name == 'postgresql':
+        # Ids are drawn before commit, so a higher id can be visible while a
+        # lower one is still in flight. SHARE mode waits for in-flight inserts
+        # (holding off new ones until the commit below); after that nothing
+        # can appear below max(id).
+        session.execute(text(f"SET LOCAL lock_timeout = '{ROLLUP_LOCK_TIMEOUT_MS}ms'"))
+        try:
+            session.execute(text('LOCK TABLE loan_events IN SHARE MODE'))
+        except OperationalError as e:
+            if getattr(e.orig, 'pgcode', None) != LOCK_NOT_AVAILABLE:
+                raise
+            session.rollback()
+            return None
+    max_id = session.scalar(select(func.max(LoanEvent.id))) or 0
+    session.commit()
+    return max_id
+
+
+def _add_totals(session, model, key, rows, counters, latest):
+    """Upsert ``rows``, adding ``counters`` to existing totals and replacing ``latest``."""
+    table = model.__table__
+    stmt = _UPSERT_INSERTS[session.get_bind().dialect.name](table)
+    updates = {column: table.c[column] + stmt.excluded[column] for column in counters}
+    if latest:
+        updates[latest] = stmt.excluded[latest]
+    session.execute(stmt.on_conflict_do_update(index_elements=[key], set_=updates), rows)
+
+
+def _apply(session, state, events):
+    daily, books, holders = {}, {}, {}
+    for event in events:
+        at = _utc(event.occurred_at)
+        checkout = event.kind == CHECKOUT
+        day = daily.setdefault(at.date(), {'day': at.date(), 'checkouts': 0, 'returns': 0})
+        holder = holders.setdefault(event.holder_id, {
+            'holder_id': event.holder_id, 'checkouts': 0, 'returns': 0, 'last_activity_at': at,
+        })
+        holder['last_activity_at'] = max(holder['last_activity_at'], at)
+        if checkout:
+            day['checkouts'] += 1
+            holder['checkouts'] += 1
+            book = books.setdefault(event.book_id, {'book_id': event.book_id, 'checkouts': 0, 'last_checkout_at': at})
+            book['checkouts'] += 1
+            book['last_checkout_at'] = max(book['last_checkout_at'], at)
+            state.checkouts += 1
+        else:
+            day['returns'] += 1
+            holder['returns'] += 1
+            state.returns += 1
+    _add_totals(session, LoanDaily, 'day', list(daily.values()), ('checkouts', 'returns'), None)
+    if books:
+        _add_totals(session, BookLoanTotal, 'book_id', list(books.values()), ('checkouts',), 'last_checkout_at')
+    _add_totals(
+        session, HolderLoanTotal, 'holder_id', list(holders.values()), ('checkouts', 'returns'), 'last_activity_at',
+    )
+    state.last_event_id = events[-1].id
+
+
+def _locked_state(session):
+    state = session.get(LoanRollupState, STATE_ID, with_for_update=True, populate_existing=True)
+    if state is None:
+        stmt = _UPSERT_INSERTS[session.get_bind().dialect.name](LoanRollupState.__table__)
+        session.execute(stmt.values(id=STATE_ID).on_conflict_do_nothing())
+        state = session.get(LoanRollupState, STATE_ID, with_for_update=True, populate_existing=True)
+    return state
+
+
+def refresh_rollups(session, batch_size=ROLLUP_BATCH_SIZE):
+    """Fold new loan events into the rollups. Returns the number of events applied.
+
+    The state row is locked for each batch, so concurrent refreshes queue up
+    instead of counting the same events twice. Returns 0 without touching the
+    rollups when the watermark lock is not granted in time.
+    """
+    state = session.get(LoanRollupState, STATE_ID)
+    newest = session.scalar(select(func.max(LoanEvent.id))) or 0
+    upto = _settled_max_event_id(session) if state is None or newest > state.last_event_id else 0
+    if upto is None:
+        logger.info('loan_events is busy; skipping this rollup refresh')
+        return 0
+    applied = 0
+    while True:
+        state = _locked_state(session)
+        events = session.execute(
+            select(LoanEvent.id, LoanEvent.book_id, LoanEvent.holder_id, LoanEvent.kind, LoanEvent.occurred_at)
+            .where(LoanEvent.id > state.last_event_id, LoanEvent.id <= upto)
+            .order_by(LoanEvent.id)
+            .limit(batch_size)
+        ).all()
+        if events:
+            _apply(session, state, events)
+            applied += len(events)
+        state.refreshed_at = datetime.now(timezone.utc)
+        session.commit()
+        if len(events) < batch_size:
+            return applied
+
+
+def _iso(moment):
+    return _utc(moment).isoformat() if moment else None
+
+
+def loan_stats(session, limit=STATS_LIMIT_DEFAULT, days=STATS_DAYS_DEFAULT, today=None):
+    """Precomputed loan report: totals, the last ``days`` days, and the top ``limit`` books and holders.
+
+    Four index reads of at most ``max(limit, days)`` rows each.
+    """
+    state = session.get(LoanRollupState, STATE_ID)
+    today = today or datetime.now(timezone.utc).date()
+    first_day = today - timedelta(days=days - 1)
+    counts = {
+        row.day: row for row in session.scalars(select(LoanDaily).where(LoanDaily.day >= first_day))
+    }
+    per_day = []
+    for offset in range(days):
+        day = first_day + timedelta(days=offset)
+        row = counts.get(day)
+        per_day.append({
+            'day': day.isoformat(),
+            'checkouts': row.checkouts if row else 0,
+            'returns': row.returns if row else 0,
+        })
+    books = session.execute(
+        select(BookLoanTotal, Book.title, Book.author)
+        .outerjoin(Book, Book.id == BookLoanTotal.book_id)
+        .order_by(BookLoanTotal.checkouts.desc(), BookLoanTotal.book_id.desc())
+        .limit(limit)
+    ).all()
+    holders = session.execute(
+        select(HolderLoanTotal, Holder.name)
+        .outerjoin(Holder, Holder.id == HolderLoanTotal.holder_id)
+        .order_by(HolderLoanTotal.checkouts.desc(), HolderLoanTotal.holder_id.desc())
+        .limit(limit)
+    ).all()
+    return {
+        'as_of': _iso(state.refreshed_at) if state else None,
+        'last_event_id': state.last_event_id if state else 0,
+        'totals': {
+            'checkouts': state.checkouts if state else 0,
+            'returns': state.returns if state else 0,
+        },
+        'per_day': per_day,
+        # Deleted books and holders keep their totals, with a null title/name
+        'most_borrowed': [
+            {
+                'book_id': total.book_id, 'title': title, 'author': author,
+                'checkouts': total.checkouts, 'last_checkout_at': _iso(total.last_checkout_at),
+            }
+            for total, title, author in books
+        ],
+        'most_active_holders': [
+            {
+                'holder_id': total.holder_id, 'name': name, 'checkouts': total.checkouts,
+                'returns': total.returns, 'last_activity_at': _iso(total.last_activity_at),
+            }
+            for total, name in holders
+        ],
+    }
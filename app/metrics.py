@@ -0,0 +1,159 @@
+"""Prometheus metrics for Celery tasks, recorded from Celery signals.
+
+* queue wait: ``published_at`` header stamped at publish -> task start
+* run time, DB time (``app.instrumentation``) and statement count per task
+* retries: Celery retries and lost ``Book.version`` compare-and-swaps
+* outcome: the result's ``status`` (success/error/conflict), or ``failure``
+  for an exception, ``retry`` for a retry
+
+Recording is a few dict/ContextVar operations per task plus two
+``perf_counter`` calls per statement, cheap enough to leave on.
+
+Set ``PROMETHEUS_MULTIPROC_DIR`` (before start-up) when several processes
+record: gunicorn workers or Celery prefork children. ``registry()`` then
+aggregates every process's samples. ``METRICS_PORT`` makes the worker's main
+process serve them over HTTP; the web app serves ``/metrics``.
+"""
+import logging
+import os
+import time
+
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Histogram
+
+from app import instrumentation
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+PUBLISHED_AT_HEADER = 'published_at'
+# Interactive tasks take milliseconds; bulk tasks can take minutes
+TIME_BUCKETS = (.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30, 60, 300)
+
+
+class TaskMetrics:
+    def __init__(self, registry=REGISTRY):
+        self.queue_wait = Histogram(
+            'celery_task_queue_wait_seconds', 'Time from publish to task start',
+            ['task'], buckets=TIME_BUCKETS, registry=registry,
+        )
+        self.runtime = Histogram(
+            'celery_task_runtime_seconds', 'Task execution time',
+            ['task'], buckets=TIME_BUCKETS, registry=registry,
+        )
+        self.db_time = Histogram(
+            'celery_task_db_seconds', 'Time spent in SQL statements per task',
+            ['task'], buckets=TIME_BUCKETS, registry=registry,
+        )
+        self.db_queries = Counter(
+            'celery_task_db_queries', 'SQL statements executed by tasks',
+            ['task'], registry=registry,
+        )
+        self.retries = Counter(
+            'celery_task_retries', 'Task retries (celery) and lost version checks (cas)',
+            ['task', 'kind'], registry=registry,
+        )
+        self.outcomes = Counter(
+            'celery_task_outcomes', 'Finished task runs by outcome',
+            ['task', 'status'], registry=registry,
+        )
+
+
+task_metrics = TaskMetrics()
+# task id -> (start time, query stats, contextvar token); prerun and postrun
+# run in the same thread
+_running = {}
+
+
+def outcome(state, retval):
+    if state == 'RETRY':
+        return 'retry'
+    if state != 'SUCCESS':
+        return 'failure'
+    if isinstance(retval, dict) and isinstance(retval.get('status'), str):
+        return retval['status']
+    return 'success'
+
+
+def stamp_published_at(headers=None, **kwargs):
+    if headers is not None:
+        headers.setdefault(PUBLISHED_AT_HEADER, time.time())
+
+
+def start_task_timer(task_id=None, task=None, **kwargs):
+    request = task.request
+    # Workers merge message headers into the request; eager apply() keeps them apart
+    published_at = getattr(request, PUBLISHED_AT_HEADER, None) or (request.headers or {}).get(PUBLISHED_AT_HEADER)
+    if published_at is not None:
+        task_metrics.queue_wait.labels(task.name).observe(max(0.0, time.time() - published_at))
+    stats, token = instrumentation.start_collecting()
+    _running[task_id] = (time.perf_counter(), stats, token)
+
+
+def record_task_run(task_id=None, task=None, retval=None, state=None, **kwargs):
+    started = _running.pop(task_id, None)
+    if started is None:
+        return
+    start, stats, token = started
+    instrumentation.stop_collecting(token)
+    name = task.name
+    task_metrics.runtime.labels(name).observe(time.perf_counter() - start)
+    task_metrics.db_time.labels(name).observe(stats.seconds)
+    task_metrics.db_queries.labels(name).inc(stats.count)
+    task_metrics.outcomes.labels(name, outcome(state, retval)).inc()
+
+
+def count_celery_retry(sender=None, **kwargs):
+    task_metrics.retries.labels(sender.name, 'celery').inc()
+
+
+def record_retry(kind):
+    """Count a retry inside the running task (no-op outside a task)."""
+    from celery import current_task
+    if current_task:
+        task_metrics.retries.labels(current_task.name, kind).inc()
+
+
+def prepare_multiprocess_dir():
+    """Create an empty ``PROMETHEUS_MULTIPROC_DIR`` (stale files would be summed)."""
+    path = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if path:
+        os.makedirs(path, exist_ok=True)
+        for name in os.listdir(path):
+            if name.endswith('.db'):
+                os.remove(os.path.join(path, name))
+
+
+def registry():
+    """Registry to export: all processes' samples in multiprocess mode."""
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        from prometheus_client import multiprocess
+        collector_registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(collector_registry)
+        return collector_registry
+    return REGISTRY
+
+
+def start_metrics_server(**kwargs):
+    if Config.METRICS_PORT:
+        from prometheus_client import start_http_server
+        start_http_server(Config.METRICS_PORT, registry=registry())
+        logger.info("Serving task metrics on :%s", Config.METRICS_PORT)
+
+
+def mark_process_dead(pid=None, **kwargs):
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(pid or os.getpid())
+
+
+def connect_signals():
+    from celery.signals import (
+        before_task_publish, task_postrun, task_prerun, task_retry, worker_init,
+        worker_process_shutdown,
+    )
+    before_task_publish.connect(stamp_published_at, weak=False)
+    task_prerun.connect(start_task_timer, weak=False)
+    task_postrun.connect(record_task_run, weak=False)
+    task_retry.connect(count_celery_retry, weak=False)
+    worker_init.connect(start_metrics_server, weak=False)
+    worker_process_shutdown.connect(mark_process_dead, weak=False)
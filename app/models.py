@@ -1,4 +1,5 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import DDL, event
 
 db = SQLAlchemy()
 
@@ -7,8 +8,12 @@ class Holder(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String, unique=True, nullable=False)
+    # Books currently held, kept in step by every write that adds, removes or
+    # moves books (app/book_counts.py); reconciled periodically against COUNT(*).
+    # Not maintained for the Library, whose count is derived on read.
+    book_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
-    books = db.relationship("Book", back_populates="holder", cascade="all, delete-orphan")
+    books = db.relationship("Book", back_populates="holder", cascade="all, delete-orphan", order_by="Book.id")
 
     def __repr__(self):
         return f"<Holder(id={self.id}, name='{self.name}')>"
@@ -21,10 +26,143 @@ class Book(db.Model):
     author = db.Column(db.String, nullable=False)
     published_year = db.Column(db.Integer, nullable=False)
     holder_id = db.Column(db.Integer, db.ForeignKey('holders.id'), nullable=False)
+    # Optimistic concurrency: every ORM UPDATE is issued as
+    # ``... WHERE version = :seen`` and raises StaleDataError if another
+    # writer got there first. Core UPDATEs must bump it themselves.
+    version = db.Column(db.Integer, nullable=False, server_default='1')
 
     holder = db.relationship("Holder", back_populates="books")
 
+    # Composite indexes back the filtered keyset pagination on /api/books/
+    __table_args__ = (
+        db.Index('ix_books_holder_id_id', 'holder_id', 'id'),
+        db.Index('ix_books_author_id', 'author', 'id'),
+    )
+    __mapper_args__ = {'version_id_col': version}
+
     def __repr__(self):
         return f"<Book(id={self.id}, title='{self.title}', holder_id={self.holder_id})>"
 
+
+class ImportJob(db.Model):
+    """A bulk book import (POST /api/books/import/), run by app.tasks.imports."""
+    __tablename__ = 'import_jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    filename = db.Column(db.String, nullable=False)
+    # Where the upload is stored until the job finishes (IMPORT_DIR)
+    path = db.Column(db.String, nullable=False)
+    format = db.Column(db.String(16), nullable=False)
+    status = db.Column(db.String(16), nullable=False, default='queued', server_default='queued')
+    # Committed together with each batch of inserts, so a redelivered job
+    # resumes after the last committed row
+    rows_processed = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rows_imported = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rows_failed = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Per-row errors, capped at IMPORT_MAX_ERRORS: [{"row": n, "errors": {...}}]
+    errors = db.Column(db.JSON, nullable=False, default=list)
+    message = db.Column(db.Text)
+    created_at = db.Column(db.DateTime(timezone=True), nullable=False, server_default=db.func.now())
+    started_at = db.Column(db.DateTime(timezone=True))
+    finished_at = db.Column(db.DateTime(timezone=True))
+
+    def __repr__(self):
+        return f"<ImportJob(id={self.id}, status='{self.status}')>"
+
+
+
+class LoanEvent(db.Model):
+    """One checkout or return, appended by the task that made it (app/tasks/dal.py).
+
+    Rows are never updated. There are no foreign keys, so the history outlives
+    deleted books and holders. Reports read the rollups below, not this table.
+    """
+    __tablename__ = 'loan_events'
+
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    book_id = db.Column(db.Integer, nullable=False)
+    # The borrower: who checked the book out, or who returned it
+    holder_id = db.Column(db.Integer, nullable=False)
+    kind = db.Column(db.String(16), nullable=False)
+    occurred_at = db.Column(db.DateTime(timezone=True), nullable=False, server_default=db.func.now())
+
+    # Rows arrive in time order, so on Postgres a BRIN index covers time
+    # ranges at a fraction of a B-tree's size and insert cost
+    __table_args__ = (
+        db.Index('ix_loan_events_occurred_at', 'occurred_at', postgresql_using='brin'),
+    )
+
+    def __repr__(self):
+        return f"<LoanEvent(id={self.id}, book_id={self.book_id}, kind='{self.kind}')>"
+
+
+# Rollups of loan_events, advanced by app.tasks.loans.refresh_loan_rollups
+# (see app/loans.py). Each row holds running totals.
+class LoanDaily(db.Model):
+    __tablename__ = 'loan_daily'
+
+    day = db.Column(db.Date, primary_key=True)
+    checkouts = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    returns = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+
+class BookLoanTotal(db.Model):
+    __tablename__ = 'book_loan_totals'
+
+    book_id = db.Column(db.Integer, primary_key=True)
+    checkouts = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    last_checkout_at = db.Column(db.DateTime(timezone=True))
+
+    # Top-N "most borrowed" reads the first rows of this index
+    __table_args__ = (db.Index('ix_book_loan_totals_checkouts', 'checkouts', 'book_id'),)
+
+
+class HolderLoanTotal(db.Model):
+    __tablename__ = 'holder_loan_totals'
+
+    holder_id = db.Column(db.Integer, primary_key=True)
+    checkouts = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    returns = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    last_activity_at = db.Column(db.DateTime(timezone=True))
+
+    __table_args__ = (db.Index('ix_holder_loan_totals_checkouts', 'checkouts', 'holder_id'),)
+
+
+class LoanRollupState(db.Model):
+    """Single row: the last loan event folded into the rollups, and overall totals."""
+    __tablename__ = 'loan_rollup_state'
+
+    id = db.Column(db.Integer, primary_key=True)
+    last_event_id = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')
+    checkouts = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')
+    returns = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')
+    refreshed_at = db.Column(db.DateTime(timezone=True))
+
+# Full-text search over title/author (see app/search.py). Postgres matches
+# against an expression GIN index; the query must repeat this exact expression.
+BOOK_SEARCH_DOCUMENT = "to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(author, ''))"
+
+event.listen(Book.__table__, 'after_create', DDL(
+    f"CREATE INDEX IF NOT EXISTS ix_books_search ON books USING GIN ({BOOK_SEARCH_DOCUMENT})"
+).execute_if(dialect='postgresql'))
+
+# SQLite has no tsvector; local runs use an external-content FTS5 table kept in
+# sync by triggers. Only title/author changes touch the index, not checkouts.
+SQLITE_FTS_INSERT_TRIGGER = (
+    "CREATE TRIGGER IF NOT EXISTS books_fts_ai AFTER INSERT ON books BEGIN "
+    "INSERT INTO books_fts(rowid, title, author) VALUES (new.id, new.title, new.author); END"
+)
+SQLITE_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5(title, author, content='books', content_rowid='id')",
+    SQLITE_FTS_INSERT_TRIGGER,
+    "CREATE TRIGGER IF NOT EXISTS books_fts_ad AFTER DELETE ON books BEGIN "
+    "INSERT INTO books_fts(books_fts, rowid, title, author) VALUES ('delete', old.id, old.title, old.author); END",
+    "CREATE TRIGGER IF NOT EXISTS books_fts_au AFTER UPDATE OF title, author ON books BEGIN "
+    "INSERT INTO books_fts(books_fts, rowid, title, author) VALUES ('delete', old.id, old.title, old.author); "
+    "INSERT INTO books_fts(rowid, title, author) VALUES (new.id, new.title, new.author); END",
+)
+for statement in SQLITE_FTS_DDL:
+    event.listen(Book.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+event.listen(Book.__table__, 'before_drop', DDL("DROP TABLE IF EXISTS books_fts").execute_if(dialect='sqlite'))
+
 # Note: The library itself should be represented as a Holder with a reserved name, e.g., "Library".
@@ -0,0 +1,66 @@
+import base64
+import json
+
+from flask import current_app, jsonify, request, url_for
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor we did not issue."""
+
+
+def encode_cursor(last_id):
+    """Opaque cursor for the page that starts after ``last_id``."""
+    raw = json.dumps({'id': last_id}, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode()
+
+
+def decode_cursor(cursor):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    try:
+        return int(json.loads(base64.urlsafe_b64decode(padded))['id'])
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor(cursor) from e
+
+
+def parse_limit():
+    """Page size from ``?limit=``, clamped to ``PAGE_SIZE_MAX``."""
+    default = current_app.config.get('PAGE_SIZE_DEFAULT', 100)
+    limit = request.args.get('limit', default, type=int)
+    return max(1, min(limit, current_app.config.get('PAGE_SIZE_MAX', 1000)))
+
+
+def paginate(query, key_column, limit, cursor=None):
+    """Keyset-paginate ``query`` on ``key_column`` (ascending).
+
+    Seeks past the cursor with ``key > :last`` instead of OFFSET, so every page
+    costs the same index range scan however deep the client is. One extra row
+    is fetched to tell whether another page exists.
+
+    Returns ``(rows, next_cursor)``; ``next_cursor`` is None on the last page.
+    """
+    if cursor:
+        query = query.filter(key_column > decode_cursor(cursor))
+    rows = query.order_by(key_column).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(getattr(rows[-1], key_column.key))
+    return rows, next_cursor
+
+
+def paginated_response(body, next_cursor):
+    """JSON list response carrying the next cursor in headers.
+
+    The body stays a plain list so existing clients keep working; the next
+    page is advertised through ``X-Next-Cursor`` and a ``Link: rel="next"``.
+    """
+    return add_next_cursor(jsonify(body), next_cursor)
+
+
+def add_next_cursor(response, next_cursor):
+    if next_cursor:
+        args = request.args.to_dict()
+        args['cursor'] = next_cursor
+        response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['Link'] = f'<{url_for(request.endpoint, **request.view_args, **args)}>; rel="next"'
+    return response
@@ -0,0 +1,35 @@
+import redis
+from redis.exceptions import WatchError
+
+from app.config import Config
+
+_client = None
+
+
+def get_redis():
+    """Process-wide Redis client for app data (cache, counters), not Celery.
+
+    redis-py's connection pool checks the pid on use, so a client created
+    before a fork is safe to keep using in the child.
+    """
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(
+            Config.REDIS_URL,
+            socket_timeout=Config.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=Config.REDIS_SOCKET_TIMEOUT,
+        )
+    return _client
+
+
+def delete_if_equals(client, key, value):
+    """Delete ``key`` only while it still holds ``value`` (a lock or claim we own)."""
+    with client.pipeline() as pipe:
+        try:
+            pipe.watch(key)
+            if pipe.get(key) == value.encode():
+                pipe.multi()
+                pipe.delete(key)
+                pipe.execute()
+        except WatchError:
+            pass  # changed under us, so no longer ours
@@ -1,27 +1,143 @@
-import logging
-from flask import Blueprint, request, jsonify
-from app.models import db, Book
-from app.schemas import BookSchema
+from flask import Blueprint, Response, abort, current_app, request, jsonify, stream_with_context, url_for
+from app.models import db, Book, Holder, ImportJob
+from app.book_counts import adjust_book_counts, moved_deltas
+from app.events import book_event, publish
+from app.schemas import BookSchema, sparse_schema
 from sqlalchemy.exc import SQLAlchemyError
-from app.tasks.checkout import checkout_book
-from app.tasks.return_book import return_book_task
+from sqlalchemy.orm import joinedload
+from app.routes.tasks import task_response
+from app.idempotency import IdempotencyKeyReused, checkout_operation, dispatch, return_operation
+from app.pagination import InvalidCursor, add_next_cursor, paginate, paginated_response, parse_limit
+from app import fast_serializer
+from app.versions import bump_versions, conditional
+from app.cache import cached
+from app.export import EXPORT_FORMATS, iter_export
+from app.imports import IMPORT_FORMATS, detect_format, job_status, store_upload
+from app.search import LIBRARY_NAME, UnsupportedDialect, search_books, search_facets, search_terms
 
 books_bp = Blueprint('books', __name__, url_prefix='/books')
 book_schema = BookSchema()
 books_schema = BookSchema(many=True)
-
-logger = logging.getLogger(__name__)
+SEARCH_LIMIT_DEFAULT = 20
+SEARCH_LIMIT_MAX = 100
 
 @books_bp.route('/', methods=['GET'])
+@conditional('books', 'holders')
+@cached('books', 'holders')
 def get_books():
-    books = Book.query.all()
-    return jsonify(books_schema.dump(books)), 200
+    try:
+        schema = sparse_schema(BookSchema, request.args, many=True)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    query = Book.query
+    holder_id = request.args.get('holder_id', type=int)
+    if holder_id is not None:
+        query = query.filter(Book.holder_id == holder_id)
+    author = request.args.get('author')
+    if author:
+        query = query.filter(Book.author == author)
+    available = request.args.get('available')
+    if available is not None:
+        if available not in ('true', 'false'):
+            return jsonify({'error': 'available must be true or false'}), 400
+        # Same meaning as the search availability facet: held by the Library
+        library = db.session.query(Holder.id).filter(Holder.name == LIBRARY_NAME).scalar_subquery()
+        query = query.filter(Book.holder_id == library if available == 'true' else Book.holder_id != library)
+    try:
+        if fast_serializer.enabled():
+            fields = fast_serializer.schema_fields(schema)
+            rows, next_cursor = paginate(
+                fast_serializer.book_query(query, fields), Book.id, parse_limit(), request.args.get('cursor')
+            )
+            return add_next_cursor(fast_serializer.json_response(fast_serializer.dump_books(rows, fields)), next_cursor)
+        if 'holder' in schema.fields:
+            # Many-to-one, so the join does not multiply rows under LIMIT
+            query = query.options(joinedload(Book.holder))
+        books, next_cursor = paginate(query, Book.id, parse_limit(), request.args.get('cursor'))
+    except InvalidCursor:
+        return jsonify({'error': 'invalid cursor'}), 400
+    return paginated_response(schema.dump(books), next_cursor), 200
+
+
+@books_bp.route('/search/', methods=['GET'])
+@conditional('books', 'holders')
+@cached('books', 'holders')
+def search_books_endpoint():
+    terms = search_terms(request.args.get('q'))
+    if not terms:
+        return jsonify({'error': 'q is required'}), 400
+    try:
+        schema = sparse_schema(BookSchema, request.args, many=True)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    limit = max(1, min(request.args.get('limit', SEARCH_LIMIT_DEFAULT, type=int), SEARCH_LIMIT_MAX))
+    try:
+        books = search_books(db.session, terms, limit, load_holders='holder' in schema.fields)
+        facets = search_facets(db.session, terms)
+    except UnsupportedDialect as e:
+        return jsonify({'error': str(e)}), 501
+    total = sum(bucket['count'] for bucket in facets['availability'])
+    return jsonify({'results': schema.dump(books), 'total': total, 'facets': facets}), 200
+
+
+@books_bp.route('/export/', methods=['GET'])
+def export_books():
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+    return Response(
+        stream_with_context(iter_export(db.session, fmt)),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={'Content-Disposition': f'attachment; filename=books.{fmt}'},
+    )
+
+
+@books_bp.route('/import/', methods=['POST'])
+def import_books_endpoint():
+    """Queue a CSV/NDJSON import: a multipart ``file`` field or the raw request body."""
+    upload = request.files.get('file')
+    if upload is not None:
+        filename, stream = upload.filename or 'upload', upload.stream
+        fmt = request.args.get('format') or detect_format(filename, upload.mimetype)
+    elif request.content_length:
+        filename, stream = 'upload', request.stream
+        fmt = request.args.get('format') or detect_format(None, request.content_type)
+    else:
+        return jsonify({'error': 'file is required'}), 400
+    if fmt not in IMPORT_FORMATS:
+        return jsonify({'error': f"format must be one of: {', '.join(IMPORT_FORMATS)}"}), 400
+    path = store_upload(stream, fmt, current_app.config['IMPORT_DIR'])
+    job = ImportJob(filename=filename, path=path, format=fmt)
+    db.session.add(job)
+    db.session.commit()
+    from app.tasks.imports import import_books
+    import_books.delay(job.id)
+    db.session.refresh(job)
+    response = jsonify(job_status(job))
+    response.status_code = 202
+    response.headers['Location'] = url_for('imports.get_import', job_id=job.id)
+    return response
 
 
 @books_bp.route('/<int:book_id>/', methods=['GET'])
+@conditional('books', 'holders')
+@cached('books', 'holders')
 def get_book(book_id):
-    book = Book.query.get_or_404(book_id)
-    return jsonify(book_schema.dump(book)), 200
+    try:
+        schema = sparse_schema(BookSchema, request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    query = Book.query
+    if fast_serializer.enabled():
+        fields = fast_serializer.schema_fields(schema)
+        row = fast_serializer.book_query(query.filter(Book.id == book_id), fields).first()
+        if row is None:
+            abort(404)
+        return fast_serializer.json_response(fast_serializer.dump_books([row], fields)[0])
+    if 'holder' in schema.fields:
+        query = query.options(joinedload(Book.holder))
+    book = query.get_or_404(book_id)
+    return jsonify(schema.dump(book)), 200
 
 
 @books_bp.route('/', methods=['POST'])
@@ -30,7 +146,11 @@ def create_book():
     try:
         book = book_schema.load(data, session=db.session)
         db.session.add(book)
+        db.session.flush()
+        adjust_book_counts(db.session, {book.holder_id: 1})
         db.session.commit()
+        bump_versions('books')
+        publish(book_event('created', book))
         return jsonify(book_schema.dump(book)), 201
     except SQLAlchemyError as e:
         db.session.rollback()
@@ -40,6 +160,7 @@ def create_book():
 @books_bp.route('/<int:book_id>/', methods=['PUT'])
 def update_book(book_id):
     book = Book.query.get_or_404(book_id)
+    previous_holder_id = book.holder_id
     data = request.get_json()
     try:
         updated_book = book_schema.load(
@@ -47,7 +168,11 @@ def update_book(book_id):
             instance=book,
             session=db.session
         )
+        db.session.flush()
+        adjust_book_counts(db.session, moved_deltas([(previous_holder_id, updated_book.holder_id)]))
         db.session.commit()
+        bump_versions('books')
+        publish(book_event('updated', updated_book))
         return jsonify(book_schema.dump(updated_book)), 200
     except SQLAlchemyError as e:
         db.session.rollback()
@@ -57,6 +182,7 @@ def update_book(book_id):
 @books_bp.route('/<int:book_id>/', methods=['PATCH'])
 def patch_book(book_id):
     book = Book.query.get_or_404(book_id)
+    previous_holder_id = book.holder_id
     data = request.get_json()
     try:
         updated_book = book_schema.load(
@@ -65,8 +191,12 @@ def patch_book(book_id):
             session=db.session,
             partial=True
         )
+        db.session.flush()
+        adjust_book_counts(db.session, moved_deltas([(previous_holder_id, updated_book.holder_id)]))
         db.session.commit()
-        return book_schema.jsonify(updated_book), 200
+        bump_versions('books')
+        publish(book_event('updated', updated_book))
+        return jsonify(book_schema.dump(updated_book)), 200
     except SQLAlchemyError as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 400
@@ -78,24 +208,62 @@ def checkout_book_endpoint(book_id):
     holder_id = data.get('holder_id')
     if not holder_id:
         return jsonify({'error': 'holder_id is required'}), 400
-    task = checkout_book.apply_async(args=[book_id, holder_id])
-    result = task.get(timeout=10)
-    if result['status'] == 'success':
-        return jsonify(result), 200
-    else:
-        return jsonify(result), 400
+    from app.tasks.checkout import checkout_book
+    try:
+        task, replayed = dispatch(
+            checkout_book, [book_id, holder_id], checkout_operation(book_id, holder_id),
+            request.headers.get('Idempotency-Key'),
+        )
+    except IdempotencyKeyReused:
+        return jsonify({'error': 'Idempotency-Key was already used for a different request'}), 422
+    return task_response(task, replayed)
 
 
 @books_bp.route('/<int:book_id>/return/', methods=['POST'])
 def return_book_task_endpoint(book_id):
-    task = return_book_task.apply_async(args=[book_id])
-    logger.debug(f"[DEBUG] type(task) = {type(task)}")
-    logger.debug(f"[DEBUG] task.get = {task.get}")
-    result = task.get(timeout=10)
-    if result['status'] == 'success':
-        return jsonify(result), 200
-    else:
-        return jsonify(result), 400
+    from app.tasks.return_book import return_book_task
+    try:
+        task, replayed = dispatch(
+            return_book_task, [book_id], return_operation(book_id), request.headers.get('Idempotency-Key'),
+        )
+    except IdempotencyKeyReused:
+        return jsonify({'error': 'Idempotency-Key was already used for a different request'}), 422
+    return task_response(task, replayed)
+
+
+def _book_ids_from(data):
+    """Return the ``book_ids`` list from a bulk request body, or None if invalid."""
+    book_ids = data.get('book_ids')
+    if not isinstance(book_ids, list) or not book_ids:
+        return None
+    if not all(isinstance(i, int) and not isinstance(i, bool) for i in book_ids):
+        return None
+    return book_ids
+
+
+@books_bp.route('/checkout/bulk/', methods=['POST'])
+def checkout_books_bulk_endpoint():
+    data = request.get_json() or {}
+    holder_id = data.get('holder_id')
+    if not holder_id:
+        return jsonify({'error': 'holder_id is required'}), 400
+    book_ids = _book_ids_from(data)
+    if book_ids is None:
+        return jsonify({'error': 'book_ids must be a non-empty list of integers'}), 400
+    from app.tasks.bulk import checkout_books_bulk
+    task = checkout_books_bulk.apply_async(args=[book_ids, holder_id])
+    return task_response(task)
+
+
+@books_bp.route('/return/bulk/', methods=['POST'])
+def return_books_bulk_endpoint():
+    data = request.get_json() or {}
+    book_ids = _book_ids_from(data)
+    if book_ids is None:
+        return jsonify({'error': 'book_ids must be a non-empty list of integers'}), 400
+    from app.tasks.bulk import return_books_bulk
+    task = return_books_bulk.apply_async(args=[book_ids])
+    return task_response(task)
 
 
 @books_bp.route('/<int:book_id>/', methods=['DELETE'])
@@ -103,7 +271,10 @@ def delete_book(book_id):
     book = Book.query.get_or_404(book_id)
     try:
         db.session.delete(book)
+        adjust_book_counts(db.session, {book.holder_id: -1})
         db.session.commit()
+        bump_versions('books')
+        publish(book_event('deleted', book))
         return '', 204
     except SQLAlchemyError as e:
         db.session.rollback()
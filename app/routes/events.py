@@ -0,0 +1,36 @@
+from flask import Blueprint, Response, current_app, jsonify, request
+
+from app.config import Config
+from app.events import RETRY_MS, hub, sse
+
+events_bp = Blueprint('events', __name__)
+
+
+@events_bp.route('/', methods=['GET'])
+def stream_events():
+    """Server-Sent Events of book/holder changes; resumes after ``Last-Event-ID``.
+
+    ``?last_event_id=`` is accepted too, for the first connection of a page
+    that kept the id from an earlier one. Answers 503 once this process
+    already serves ``EVENTS_MAX_STREAMS`` streams.
+    """
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    config = current_app.config
+    subscriber = hub().connect(limit=config.get('EVENTS_MAX_STREAMS', Config.EVENTS_MAX_STREAMS))
+    if subscriber is None:
+        response = jsonify({'error': 'too many open event streams'})
+        response.headers['Retry-After'] = str(RETRY_MS // 1000)
+        return response, 503
+    response = Response(
+        sse(
+            subscriber,
+            last_event_id,
+            heartbeat=config.get('EVENTS_HEARTBEAT', Config.EVENTS_HEARTBEAT),
+            max_seconds=config.get('EVENTS_MAX_STREAM_SECONDS', Config.EVENTS_MAX_STREAM_SECONDS),
+        ),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+    # A generator that never started has no finally to run
+    response.call_on_close(lambda: hub().disconnect(subscriber))
+    return response
@@ -1,7 +1,14 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, abort, request, jsonify
 from app.models import db, Holder
-from app.schemas import HolderSchema
+from app.book_counts import LIBRARY_NAME, library_book_count
+from app.schemas import HolderSchema, sparse_schema
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import selectinload
+from app.pagination import InvalidCursor, add_next_cursor, paginate, paginated_response, parse_limit
+from app import fast_serializer
+from app.versions import bump_versions, conditional
+from app.cache import cached
+from app.events import holder_event, publish
 
 holders_bp = Blueprint('holders', __name__, url_prefix='/holders')
 holder_schema = HolderSchema()
@@ -9,15 +16,73 @@ holders_schema = HolderSchema(many=True)
 
 
 @holders_bp.route('/', methods=['GET'])
+@conditional('books', 'holders')
+@cached('books', 'holders')
 def get_holders():
-    holders = Holder.query.all()
-    return jsonify(holders_schema.dump(holders)), 200
+    try:
+        schema = sparse_schema(HolderSchema, request.args, many=True)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    query = Holder.query
+    name = request.args.get('name')
+    if name:
+        query = query.filter(Holder.name == name)
+    try:
+        if fast_serializer.enabled():
+            fields = fast_serializer.schema_fields(schema)
+            rows, next_cursor = paginate(
+                fast_serializer.holder_query(query), Holder.id, parse_limit(), request.args.get('cursor')
+            )
+            return add_next_cursor(fast_serializer.json_response(fast_serializer.dump_holders(rows, fields)), next_cursor)
+        if 'books' in schema.fields:
+            # One extra IN query for the whole page instead of one per holder
+            query = query.options(selectinload(Holder.books))
+        holders, next_cursor = paginate(query, Holder.id, parse_limit(), request.args.get('cursor'))
+    except InvalidCursor:
+        return jsonify({'error': 'invalid cursor'}), 400
+    return paginated_response(schema.dump(holders), next_cursor), 200
+
+
+@holders_bp.route('/summary/', methods=['GET'])
+@conditional('books', 'holders')
+@cached('books', 'holders')
+def get_holders_summary():
+    """``[{id, name, book_count}]`` per page, from the maintained counter: one index scan, no books loaded.
+
+    The Library's counter is not maintained; on the page that lists it, it is
+    counted (one more query).
+    """
+    query = Holder.query.with_entities(Holder.id, Holder.name, Holder.book_count)
+    try:
+        rows, next_cursor = paginate(query, Holder.id, parse_limit(), request.args.get('cursor'))
+    except InvalidCursor:
+        return jsonify({'error': 'invalid cursor'}), 400
+    summary = [row._asdict() for row in rows]
+    for holder in summary:
+        if holder['name'] == LIBRARY_NAME:
+            holder['book_count'] = library_book_count(db.session)
+    return paginated_response(summary, next_cursor), 200
 
 
 @holders_bp.route('/<int:holder_id>/', methods=['GET'])
+@conditional('books', 'holders')
+@cached('books', 'holders')
 def get_holder(holder_id):
-    holder = Holder.query.get_or_404(holder_id)
-    return jsonify(holder_schema.dump(holder)), 200
+    try:
+        schema = sparse_schema(HolderSchema, request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    query = Holder.query
+    if fast_serializer.enabled():
+        fields = fast_serializer.schema_fields(schema)
+        row = fast_serializer.holder_query(query.filter(Holder.id == holder_id)).first()
+        if row is None:
+            abort(404)
+        return fast_serializer.json_response(fast_serializer.dump_holders([row], fields)[0])
+    if 'books' in schema.fields:
+        query = query.options(selectinload(Holder.books))
+    holder = query.get_or_404(holder_id)
+    return jsonify(schema.dump(holder)), 200
 
 
 @holders_bp.route('/', methods=['POST'])
@@ -27,6 +92,8 @@ def create_holder():
         holder = holder_schema.load(data, session=db.session)
         db.session.add(holder)
         db.session.commit()
+        bump_versions('holders')
+        publish(holder_event('created', holder))
         return jsonify(holder_schema.dump(holder)), 201
     except SQLAlchemyError as e:
         db.session.rollback()
@@ -42,6 +109,8 @@ def update_holder(holder_id):
             data, instance=holder, session=db.session
         )
         db.session.commit()
+        bump_versions('holders')
+        publish(holder_event('updated', updated_holder))
         return jsonify(holder_schema.dump(updated_holder)), 200
     except SQLAlchemyError as e:
         db.session.rollback()
@@ -53,6 +122,9 @@ def delete_holder(holder_id):
     try:
         db.session.delete(holder)
         db.session.commit()
+        # Deleting a holder cascades to its books
+        bump_versions('holders', 'books')
+        publish(holder_event('deleted', holder))
         return jsonify({'message': 'Holder deleted'}), 200
     except SQLAlchemyError as e:
         db.session.rollback()
@@ -68,7 +140,9 @@ def patch_holder(holder_id):
             data, instance=holder, session=db.session, partial=True
         )
         db.session.commit()
-        return holder_schema.jsonify(updated_holder), 200
+        bump_versions('holders')
+        publish(holder_event('updated', updated_holder))
+        return jsonify(holder_schema.dump(updated_holder)), 200
     except SQLAlchemyError as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 400
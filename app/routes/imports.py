@@ -0,0 +1,13 @@
+from flask import Blueprint, jsonify
+
+from app.imports import job_status
+from app.models import db, ImportJob
+
+imports_bp = Blueprint('imports', __name__, url_prefix='/imports')
+
+
+@imports_bp.route('/<int:job_id>/', methods=['GET'])
+def get_import(job_id):
+    """Progress of an import: row counters, per-row errors (capped) and the final status."""
+    job = db.get_or_404(ImportJob, job_id)
+    return jsonify(job_status(job)), 200
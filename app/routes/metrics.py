@@ -0,0 +1,12 @@
+from flask import Blueprint, Response
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@metrics_bp.route('/metrics')
+def metrics():
+    """Prometheus text exposition of this process's (or, in multiprocess mode, all processes') metrics."""
+    # Imported on first scrape, keeping prometheus_client and Celery out of web startup
+    from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+    from app.metrics import registry
+    return Response(generate_latest(registry()), content_type=CONTENT_TYPE_LATEST)
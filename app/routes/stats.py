@@ -0,0 +1,18 @@
+from flask import Blueprint, jsonify, request
+
+from app.loans import STATS_DAYS_DEFAULT, STATS_DAYS_MAX, STATS_LIMIT_DEFAULT, STATS_LIMIT_MAX, loan_stats
+from app.models import db
+
+stats_bp = Blueprint('stats', __name__)
+
+
+@stats_bp.route('/loans/', methods=['GET'])
+def get_loan_stats():
+    """Most borrowed books, loans per day and holder activity, from the precomputed rollups.
+
+    ``?limit=`` (top books/holders) and ``?days=`` are clamped, so the response
+    has a fixed maximum size. ``as_of`` is when the rollups were last refreshed.
+    """
+    limit = max(1, min(request.args.get('limit', STATS_LIMIT_DEFAULT, type=int), STATS_LIMIT_MAX))
+    days = max(1, min(request.args.get('days', STATS_DAYS_DEFAULT, type=int), STATS_DAYS_MAX))
+    return jsonify(loan_stats(db.session, limit=limit, days=days)), 200
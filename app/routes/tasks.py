@@ -0,0 +1,78 @@
+from flask import Blueprint, current_app, jsonify, make_response, request, url_for
+
+tasks_bp = Blueprint('tasks', __name__, url_prefix='/tasks')
+
+
+def parse_wait():
+    """Return the ``?wait=`` long-poll timeout in seconds, or None if absent.
+
+    The value is clamped to ``TASK_WAIT_MAX`` so a client cannot pin a web
+    worker for longer than the deployment allows.
+    """
+    wait = request.args.get('wait', type=float)
+    if wait is None:
+        return None
+    return max(0.0, min(wait, current_app.config.get('TASK_WAIT_MAX', 30)))
+
+
+def task_accepted(task, state='PENDING'):
+    """202 response pointing the client at the task status resource.
+
+    A task that was just published is PENDING by definition, so the result
+    backend is only asked when the caller passes a ``state`` it read.
+    """
+    response = jsonify({'task_id': task.id, 'state': state})
+    response.status_code = 202
+    response.headers['Location'] = url_for('tasks.get_task', task_id=task.id)
+    return response
+
+
+def _task_result(task, replayed):
+    wait = parse_wait()
+    if wait is None:
+        # A task we joined may already be running
+        return task_accepted(task, task.state) if replayed else task_accepted(task)
+    from celery.exceptions import TimeoutError as CeleryTimeoutError
+    try:
+        result = task.get(timeout=wait)
+    except CeleryTimeoutError:
+        return task_accepted(task, task.state)
+    if result['status'] == 'success':
+        return jsonify(result), 200
+    if result['status'] == 'conflict':
+        return jsonify(result), 409
+    return jsonify(result), 400
+
+
+def task_response(task, replayed=False):
+    """Respond to a dispatched task without blocking unless ``?wait=`` is set.
+
+    With ``?wait=`` the task result is returned as before (200 on success,
+    409 on a conflict, 400 on error); if it is not ready in time the client
+    gets the 202 anyway. ``replayed`` marks a request that was collapsed onto
+    an existing task (see app/idempotency.py).
+    """
+    response = make_response(_task_result(task, replayed))
+    if replayed:
+        response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+@tasks_bp.route('/<task_id>/', methods=['GET'])
+def get_task(task_id):
+    # Celery is only imported once a task resource is actually requested
+    from celery.exceptions import TimeoutError as CeleryTimeoutError
+    from app.celery import celery
+    task = celery.AsyncResult(task_id)
+    wait = parse_wait()
+    if wait and not task.ready():
+        try:
+            task.get(timeout=wait, propagate=False)
+        except CeleryTimeoutError:
+            pass
+    body = {'task_id': task.id, 'state': task.state}
+    if task.successful():
+        body['result'] = task.result
+    elif task.failed():
+        body['error'] = str(task.result)
+    return jsonify(body), 200
@@ -1,52 +1,46 @@
 # app/sample_data.py
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import select
 
 from app.models import db, Holder, Book
+from app.engine import get_engine, Session
 
-from app.config import Config
 
-engine = create_engine(Config.SQLALCHEMY_DATABASE_URI)
-print(f"Engine created with URI: {Config.SQLALCHEMY_DATABASE_URI}")
-Session = sessionmaker(bind=engine)
-session = Session()
+SAMPLE_HOLDERS = ("Library", "Alice", "Bob")
+SAMPLE_BOOKS = (
+    {"title": "Book 1", "author": "Sample Author", "published_year": 2001},
+    {"title": "Book 2", "author": "Sample Author", "published_year": 2005},
+    {"title": "Book 3", "author": "Another Author", "published_year": 2010},
+)
 
 
 def load_sample_data(session):
-    # Create Library holder if not exists
-    library = session.query(Holder).filter_by(name="Library").first()
-    if not library:
-        library = Holder(name="Library")
-        session.add(library)
-        session.commit()
-    # Example holders
-    holders = [
-        Holder(name="Alice"),
-        Holder(name="Bob"),
-    ]
-    for h in holders:
-        if not session.query(Holder).filter_by(name=h.name).first():
-            session.add(h)
-    session.commit()
-    # Example books
-    books = [
-        Book(title="Book 1", holder_id=library.id),
-        Book(title="Book 2", holder_id=library.id),
-        Book(title="Book 3", holder_id=library.id),
-    ]
-    for b in books:
-        if not session.query(Book).filter_by(title=b.title).first():
-            session.add(b)
+    """Add the sample holders and books that are missing (idempotent).
+
+    One query per table finds what already exists, so re-running it is cheap.
+    For production-scale data use ``flask seed-data`` (app/seed.py).
+    """
+    existing = set(session.scalars(select(Holder.name).where(Holder.name.in_(SAMPLE_HOLDERS))))
+    session.add_all(Holder(name=name) for name in SAMPLE_HOLDERS if name not in existing)
+    session.flush()
+    library = session.query(Holder).filter_by(name="Library").one()
+    titles = [book["title"] for book in SAMPLE_BOOKS]
+    existing = set(session.scalars(select(Book.title).where(Book.title.in_(titles))))
+    missing = [book for book in SAMPLE_BOOKS if book["title"] not in existing]
+    session.add_all(Book(holder_id=library.id, **book) for book in missing)
     session.commit()
 
 
 def main():
     # Create tables if they don't exist
-    db.metadata.create_all(engine)
+    db.metadata.create_all(get_engine())
 
     # Use the above function to seed data
-    load_sample_data(session)
+    session = Session()
+    try:
+        load_sample_data(session)
+    finally:
+        session.close()
 
     print("Sample data inserted.")
 
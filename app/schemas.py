@@ -1,5 +1,7 @@
+from functools import lru_cache
+
 from marshmallow_sqlalchemy import SQLAlchemyAutoSchema
-from marshmallow import fields
+from marshmallow import EXCLUDE, Schema, fields, validate
 from app.models import Book, Holder
 
 class HolderSchema(SQLAlchemyAutoSchema):
@@ -7,6 +9,8 @@ class HolderSchema(SQLAlchemyAutoSchema):
         model = Holder
         load_instance = True
         include_relationships = True
+        # Maintained by the server; served by /api/holders/summary/
+        exclude = ('book_count',)
 
     name = fields.String(required=True)
     books = fields.Nested('BookSchema', many=True, exclude=('holder',))
@@ -16,9 +20,43 @@ class BookSchema(SQLAlchemyAutoSchema):
         model = Book
         load_instance = True
         include_fk = True
+        exclude = ('version',)
 
     title = fields.String(required=True)
     author = fields.String(required=True)
     published_year = fields.Integer(required=True)
     holder = fields.Nested('HolderSchema', exclude=('books',))
     holder_id = fields.Integer(required=False, allow_none=True)
+
+
+class BookImportSchema(Schema):
+    """One imported row: plain dicts for a Core executemany, no ORM instances."""
+    class Meta:
+        unknown = EXCLUDE
+
+    title = fields.String(required=True, validate=validate.Length(min=1))
+    author = fields.String(required=True, validate=validate.Length(min=1))
+    published_year = fields.Integer(required=True)
+    holder_id = fields.Integer(load_default=None, allow_none=True)
+
+
+def _split_fields(value):
+    return {field.strip() for field in value.split(',') if field.strip()} if value else set()
+
+
+@lru_cache(maxsize=128)
+def _cached_schema(schema_cls, only, many):
+    return schema_cls(only=only, many=many)
+
+
+def sparse_schema(schema_cls, args, many=False):
+    """Schema restricted to the ``?fields=`` / ``?include=`` sparse fieldset.
+
+    Without ``fields`` the full schema (nested relationships included) is
+    returned, as before. With ``fields`` only the listed attributes are dumped
+    and nested relationships are skipped unless named in ``fields`` or
+    ``include``. Raises ValueError for unknown field names.
+    """
+    fields = _split_fields(args.get('fields'))
+    only = tuple(sorted(fields | _split_fields(args.get('include')))) if fields else None
+    return _cached_schema(schema_cls, only, many)
@@ -0,0 +1,107 @@
+"""Ranked full-text search over book titles and authors, with facet counts.
+
+Postgres matches ``BOOK_SEARCH_DOCUMENT`` against the ``ix_books_search`` GIN
+index; SQLite (local runs) goes through the ``books_fts`` FTS5 table. Both
+treat every search term as a prefix so partial words match while typing.
+"""
+import re
+
+from sqlalchemy import select, text
+from sqlalchemy.orm import selectinload
+
+from app.models import BOOK_SEARCH_DOCUMENT, Book
+
+AUTHOR_FACET_SIZE = 10
+YEAR_BUCKET_SIZE = 10
+LIBRARY_NAME = 'Library'
+
+_TERM = re.compile(r'\w+', re.UNICODE)
+
+_MATCHES = {
+    'postgresql': f"{BOOK_SEARCH_DOCUMENT} @@ to_tsquery('simple', :query)",
+    'sqlite': "id IN (SELECT rowid FROM books_fts WHERE books_fts MATCH :query)",
+}
+
+_RANKED = {
+    'postgresql': text(
+        f"SELECT books.* FROM books, to_tsquery('simple', :query) AS q "
+        f"WHERE {BOOK_SEARCH_DOCUMENT} @@ q "
+        f"ORDER BY ts_rank({BOOK_SEARCH_DOCUMENT}, q) DESC, books.id LIMIT :limit"
+    ),
+    'sqlite': text(
+        "SELECT books.* FROM books_fts JOIN books ON books.id = books_fts.rowid "
+        "WHERE books_fts MATCH :query ORDER BY bm25(books_fts), books.id LIMIT :limit"
+    ),
+}
+
+# One statement for all three facets: the matching rows are found once and
+# aggregated three ways; ``value`` is text so the branches can be UNIONed.
+_FACET_SQL = """
+WITH matches AS (SELECT author, published_year, holder_id FROM books WHERE {match})
+SELECT facet, value, n FROM (
+    SELECT 'author' AS facet, author AS value, count(*) AS n FROM matches
+    GROUP BY author ORDER BY n DESC, author LIMIT :author_facet_size
+) AS authors
+UNION ALL
+SELECT 'published_year', CAST((published_year / {bucket}) * {bucket} AS TEXT), count(*) FROM matches GROUP BY 2
+UNION ALL
+SELECT 'availability',
+       CASE WHEN holder_id = (SELECT id FROM holders WHERE name = :library) THEN 'available' ELSE 'checked_out' END,
+       count(*)
+FROM matches GROUP BY 2
+"""
+_FACETS = {
+    dialect: text(_FACET_SQL.format(match=match, bucket=YEAR_BUCKET_SIZE))
+    for dialect, match in _MATCHES.items()
+}
+
+
+class UnsupportedDialect(RuntimeError):
+    """Raised when the database has no full-text search support wired up."""
+
+
+def search_terms(query):
+    """Word tokens of a user query; punctuation and search operators are dropped."""
+    return _TERM.findall(query or '')
+
+
+def _match_expression(dialect, terms):
+    if dialect == 'postgresql':
+        return ' & '.join(f'{term}:*' for term in terms)
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def _dialect(session):
+    name = session.get_bind().dialect.name
+    if name not in _RANKED:
+        raise UnsupportedDialect(f'Full-text search is not available on {name}')
+    return name
+
+
+def search_books(session, terms, limit, load_holders=False):
+    """Best ``limit`` books matching all ``terms``, most relevant first."""
+    dialect = _dialect(session)
+    stmt = select(Book).from_statement(_RANKED[dialect])
+    if load_holders:
+        # One IN query for the page's holders instead of a lazy load per book
+        stmt = stmt.options(selectinload(Book.holder))
+    params = {'query': _match_expression(dialect, terms), 'limit': limit}
+    return session.execute(stmt, params).scalars().all()
+
+
+def search_facets(session, terms):
+    """Counts of all matching books by author, publication decade and availability."""
+    dialect = _dialect(session)
+    rows = session.execute(_FACETS[dialect], {
+        'query': _match_expression(dialect, terms),
+        'author_facet_size': AUTHOR_FACET_SIZE,
+        'library': LIBRARY_NAME,
+    })
+    facets = {'author': [], 'published_year': [], 'availability': []}
+    for facet, value, count in rows:
+        if facet == 'published_year':
+            value = int(value)
+        facets[facet].append({'value': value, 'count': count})
+    facets['published_year'].sort(key=lambda bucket: bucket['value'])
+    facets['availability'].sort(key=lambda bucket: bucket['value'])
+    return facets
@@ -0,0 +1,173 @@
+"""Deterministic synthetic holders and books, bulk-loaded for load tests and staging.
+
+The same ``seed`` always yields the same rows. Postgres loads through
+``COPY ... FROM STDIN`` in CSV chunks; other databases use executemany
+batches. Either way nothing is read back per row, so millions of books load
+in seconds. ``flask seed-data`` (app/cli.py) is the entry point.
+"""
+import csv
+import io
+import random
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import delete, func, insert, select, text
+
+from app.book_counts import reconcile_book_counts
+from app.models import (
+    SQLITE_FTS_INSERT_TRIGGER, Book, BookLoanTotal, Holder, HolderLoanTotal, LoanDaily, LoanEvent, LoanRollupState,
+)
+
+LIBRARY = 'Library'
+BATCH_SIZE = 10_000
+COPY_CHUNK_SIZE = 100_000
+
+FIRST_NAMES = (
+    'Ada', 'Alan', 'Amara', 'Ana', 'Bea', 'Carlos', 'Chen', 'Dara', 'Elif', 'Emil',
+    'Fatima', 'Grace', 'Hana', 'Ines', 'Ivan', 'Jamal', 'Jun', 'Kai', 'Lena', 'Luis',
+    'Maya', 'Mei', 'Nia', 'Noah', 'Olga', 'Omar', 'Priya', 'Ravi', 'Sara', 'Tomas',
+    'Uma', 'Vera', 'Wei', 'Yara', 'Yusuf', 'Zoe',
+)
+LAST_NAMES = (
+    'Abe', 'Baker', 'Castro', 'Diaz', 'Eriksen', 'Fischer', 'Garcia', 'Hughes', 'Ito',
+    'Jensen', 'Khan', 'Lopez', 'Moreau', 'Novak', 'Okafor', 'Park', 'Quinn', 'Rossi',
+    'Silva', 'Tanaka', 'Usman', 'Varga', 'Walsh', 'Xu', 'Yilmaz', 'Zhang',
+)
+TITLE_ADJECTIVES = (
+    'Silent', 'Broken', 'Hidden', 'Last', 'Golden', 'Distant', 'Quiet', 'Burning',
+    'Forgotten', 'Endless', 'Crimson', 'Secret', 'Winter', 'Paper', 'Glass', 'Wild',
+)
+TITLE_NOUNS = (
+    'River', 'Garden', 'Empire', 'Tower', 'Letters', 'Sea', 'Orchard', 'Road', 'Machine',
+    'Harbor', 'Kingdom', 'Mirror', 'Island', 'Library', 'Storm', 'City', 'Forest', 'Song',
+)
+TITLE_PATTERNS = (
+    'The {adj} {noun}', '{noun} of {noun2}', 'A {adj} {noun}', 'The {noun} and the {noun2}',
+    '{adj} {noun}s', 'Beyond the {adj} {noun}',
+)
+
+
+def generate_holders(count, seed=0, start=1):
+    """``count`` holder names, unique through their running number from ``start``."""
+    rng = random.Random(seed)
+    for i in range(start, start + count):
+        yield f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}'
+
+
+def generate_books(count, holder_ids, library_id, seed=0, checked_out=0.2):
+    """``(title, author, published_year, holder_id)`` tuples.
+
+    Authors are skewed (a few prolific ones, a long tail with one or two
+    books), years lean recent, and a ``checked_out`` share of books is with a
+    holder other than the Library.
+    """
+    rng = random.Random(seed + 1)
+    authors = [f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}' for _ in range(max(1, count // 8))]
+    for _ in range(count):
+        title = rng.choice(TITLE_PATTERNS).format(
+            adj=rng.choice(TITLE_ADJECTIVES), noun=rng.choice(TITLE_NOUNS), noun2=rng.choice(TITLE_NOUNS),
+        )
+        author = authors[int(len(authors) * rng.random() ** 3)]
+        year = 2024 - int(124 * rng.random() ** 2)
+        holder_id = rng.choice(holder_ids) if holder_ids and rng.random() < checked_out else library_id
+        yield title, author, year, holder_id
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _copy(conn, table, columns, rows):
+    """Stream ``rows`` into ``table`` with COPY, one CSV buffer per chunk."""
+    cursor = conn.connection.cursor()
+    statement = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+    try:
+        for chunk in _chunks(rows, COPY_CHUNK_SIZE):
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(chunk)
+            buffer.seek(0)
+            cursor.copy_expert(statement, buffer)
+    finally:
+        cursor.close()
+
+
+def _executemany(conn, table, columns, rows, batch_size):
+    for chunk in _chunks(rows, batch_size):
+        conn.execute(insert(table), [dict(zip(columns, row)) for row in chunk])
+
+
+def _load(conn, table, columns, rows, batch_size):
+    if conn.dialect.name == 'postgresql':
+        _copy(conn, table.name, columns, rows)
+    else:
+        _executemany(conn, table, columns, rows, batch_size)
+
+
+@contextmanager
+def _deferred_search_index(conn):
+    """On SQLite, skip the per-row FTS insert trigger and rebuild the index once."""
+    if conn.dialect.name != 'sqlite' or not conn.scalar(
+        text("SELECT 1 FROM sqlite_master WHERE name = 'books_fts_ai'")
+    ):
+        yield
+        return
+    conn.execute(text('DROP TRIGGER books_fts_ai'))
+    yield
+    conn.execute(text("INSERT INTO books_fts(books_fts) VALUES ('rebuild')"))
+    conn.execute(text(SQLITE_FTS_INSERT_TRIGGER))
+
+
+# No foreign key reaches the loan history, so CASCADE would leave it behind
+# for the next dataset's books and holders, which reuse the same ids
+_TRUNCATED = (Book, Holder, LoanEvent, LoanDaily, BookLoanTotal, HolderLoanTotal, LoanRollupState)
+
+
+def truncate(conn):
+    if conn.dialect.name == 'postgresql':
+        tables = ', '.join(model.__tablename__ for model in _TRUNCATED)
+        conn.execute(text(f'TRUNCATE {tables} RESTART IDENTITY CASCADE'))
+    else:
+        for model in _TRUNCATED:
+            conn.execute(delete(model.__table__))
+
+
+def load_synthetic_data(engine, books, holders, seed=0, checked_out=0.2, batch_size=BATCH_SIZE, replace=False):
+    """Insert ``holders`` holders and ``books`` books in one transaction.
+
+    Returns ``{'holders': n, 'books': n, 'seconds': s}``. With ``replace``
+    existing books, holders and loan history are deleted first; otherwise the rows are added
+    to them, with holder names numbered past the highest existing id so the
+    unique constraint holds.
+    """
+    start = time.perf_counter()
+    holder_table, book_table = Holder.__table__, Book.__table__
+    with engine.begin() as conn:
+        if replace:
+            truncate(conn)
+        library_id = conn.scalar(select(holder_table.c.id).where(holder_table.c.name == LIBRARY))
+        if library_id is None:
+            library_id = conn.execute(insert(holder_table).values(name=LIBRARY).returning(holder_table.c.id)).scalar_one()
+        # Ids only grow, so names numbered past the current maximum are unused
+        max_id = conn.scalar(select(func.max(holder_table.c.id)))
+        names = generate_holders(holders, seed, start=max_id + 1)
+        _load(conn, holder_table, ('name',), ((name,) for name in names), batch_size)
+        holder_ids = list(conn.scalars(
+            select(holder_table.c.id).where(holder_table.c.id > max_id).order_by(holder_table.c.id)
+        ))
+        with _deferred_search_index(conn):
+            _load(
+                conn, book_table, ('title', 'author', 'published_year', 'holder_id'),
+                generate_books(books, holder_ids, library_id, seed, checked_out), batch_size,
+            )
+        # One recount instead of counting per row while loading
+        reconcile_book_counts(conn)
+        if conn.dialect.name == 'postgresql':
+            conn.execute(text('ANALYZE holders, books'))
+    return {'holders': len(holder_ids), 'books': books, 'seconds': time.perf_counter() - start}
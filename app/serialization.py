@@ -0,0 +1,44 @@
+"""Compact msgpack serializer for Celery task messages and results.
+
+Payloads are msgpack, and anything over ``COMPRESS_MIN_BYTES`` is also zlib
+compressed. Bulk task arguments and results shrink several-fold. Small
+checkout/return messages skip compression, because zlib's header would make
+them bigger. A one-byte prefix records which form was used.
+
+Celery has no per-task result compression (``result_compression`` is not
+applied by its backends), so the size threshold is what limits compression
+to bulk payloads.
+"""
+import zlib
+
+import msgpack
+from kombu.serialization import register
+
+SERIALIZER = 'msgpack-z'
+CONTENT_TYPE = 'application/x-msgpack-z'
+COMPRESS_MIN_BYTES = 1024
+
+_PLAIN = b'm'
+_ZLIB = b'z'
+
+
+def dumps(obj):
+    packed = msgpack.packb(obj, use_bin_type=True)
+    if len(packed) < COMPRESS_MIN_BYTES:
+        return _PLAIN + packed
+    return _ZLIB + zlib.compress(packed)
+
+
+def loads(data):
+    if isinstance(data, str):
+        data = data.encode('latin-1')
+    marker, payload = data[:1], data[1:]
+    if marker == _ZLIB:
+        payload = zlib.decompress(payload)
+    elif marker != _PLAIN:
+        raise ValueError(f'unknown {SERIALIZER} payload marker {marker!r}')
+    return msgpack.unpackb(payload, raw=False)
+
+
+def register_serializer():
+    register(SERIALIZER, dumps, loads, content_type=CONTENT_TYPE, content_encoding='binary')
@@ -1,5 +1,7 @@
-import logging
-logging.warning("DEBUG: app/tasks/__init__.py imported")
 from .checkout import checkout_book
 from .return_book import return_book_task
+from .bulk import checkout_books_bulk, return_books_bulk
+from .imports import import_books
+from .loans import refresh_loan_rollups
+from .counts import reconcile_holder_book_counts
 # Make app.tasks a Python package for Celery autodiscover
@@ -0,0 +1,117 @@
+from sqlalchemy import select, update
+from app.celery import celery
+from app.book_counts import adjust_book_counts, moved_deltas
+from app.loans import CHECKOUT, RETURN, log_events
+from app.models import Book, Holder
+from app.engine import Session
+from app.versions import bump_versions
+from app.events import moved_event, publish
+from app.tasks.concurrency import conflict
+
+# Ids per UPDATE statement; keeps the IN list well under driver/DB parameter limits
+BULK_CHUNK_SIZE = 1000
+
+
+def _chunks(ids, size):
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def _move_books(session, book_ids, holder_id, from_holders=None, kind=CHECKOUT):
+    """Point every book in ``book_ids`` at ``holder_id`` with chunked UPDATEs.
+
+    Each chunk is a single ``UPDATE ... WHERE id IN (...) RETURNING id``, so the
+    ids that come back are exactly the books that were moved. With
+    ``from_holders`` only books currently held by one of those holders move;
+    the check is part of the UPDATE. Every moved book gets its ``version``
+    bumped so in-flight single-book tasks see the change. The chunk's current
+    holders are read first, with row locks, so each book that changed hands
+    gets an accurate ``kind`` loan event: the borrower is ``holder_id`` for a
+    checkout and the previous holder for a return. The same reads give the
+    ``book_count`` adjustments. Returns per-id results in the order the ids
+    were given.
+
+    Chunks go in id order and each commits on its own: overlapping bulk moves
+    take their row locks in the same order, so they cannot deadlock, and no
+    lock (on the books or on ``loan_events``) is held past its chunk. A task
+    that fails part-way leaves the earlier chunks moved.
+    """
+    book_ids = list(dict.fromkeys(book_ids))
+    moved = set()
+    for chunk in _chunks(sorted(book_ids), BULK_CHUNK_SIZE):
+        previous = dict(session.execute(
+            select(Book.id, Book.holder_id).where(Book.id.in_(chunk)).order_by(Book.id).with_for_update()
+        ).all())
+        stmt = (
+            update(Book)
+            .where(Book.id.in_(chunk))
+            .values(holder_id=holder_id, version=Book.version + 1)
+            .returning(Book.id)
+            .execution_options(synchronize_session=False)
+        )
+        if from_holders is not None:
+            stmt = stmt.where(Book.holder_id.in_(from_holders))
+        chunk_moved = session.execute(stmt).scalars().all()
+        moved.update(chunk_moved)
+        log_events(session, [
+            {'book_id': book_id, 'holder_id': holder_id if kind == CHECKOUT else previous[book_id], 'kind': kind}
+            for book_id in chunk_moved if previous[book_id] != holder_id
+        ])
+        adjust_book_counts(session, moved_deltas((previous[book_id], holder_id) for book_id in chunk_moved))
+        session.commit()
+        bump_versions('books')
+        if chunk_moved:
+            publish(moved_event(sorted(chunk_moved), holder_id))
+    skipped = [book_id for book_id in book_ids if book_id not in moved]
+    held_by = {}
+    if skipped and from_holders is not None:
+        held_by = dict(session.query(Book.id, Book.holder_id).filter(Book.id.in_(skipped)))
+    results = []
+    for book_id in book_ids:
+        if book_id in moved:
+            results.append({'book_id': book_id, 'status': 'success', 'holder_id': holder_id})
+        elif book_id in held_by:
+            results.append(conflict(book_id, f'Book {book_id} is already checked out', holder_id=held_by[book_id]))
+        else:
+            results.append({'book_id': book_id, 'status': 'error', 'message': f'Book {book_id} not found'})
+    return {'status': 'success', 'holder_id': holder_id, 'updated': len(moved), 'results': results}
+
+
+@celery.task(bind=True, ignore_result=False)
+def checkout_books_bulk(self, book_ids, holder_id, session=None):
+    close_session = False
+    if session is None:
+        session = Session()
+        close_session = True
+    try:
+        holder = session.query(Holder.id).filter_by(id=holder_id).first()
+        if not holder:
+            return {'status': 'error', 'message': f'Holder {holder_id} not found'}
+        # Only books on the shelf (or already with this holder) can be checked out
+        available = session.query(Holder.id).filter((Holder.name == 'Library') | (Holder.id == holder.id))
+        return _move_books(session, book_ids, holder.id, from_holders=[row.id for row in available])
+    except Exception as e:
+        session.rollback()
+        return {'status': 'error', 'message': str(e)}
+    finally:
+        if close_session:
+            session.close()
+
+
+@celery.task(bind=True, ignore_result=False)
+def return_books_bulk(self, book_ids, session=None):
+    close_session = False
+    if session is None:
+        session = Session()
+        close_session = True
+    try:
+        library_holder = session.query(Holder.id).filter_by(name='Library').first()
+        if not library_holder:
+            return {'status': 'error', 'message': 'Library holder not found'}
+        return _move_books(session, book_ids, library_holder.id, kind=RETURN)
+    except Exception as e:
+        session.rollback()
+        return {'status': 'error', 'message': str(e)}
+    finally:
+        if close_session:
+            session.close()
@@ -1,33 +1,32 @@
-import logging
-logging.warning("DEBUG: app/tasks/checkout.py imported")
-import os
 from app.celery import celery
-from app.models import Book, Holder
-from app.config import Config
-import os
+from app.engine import Session
+from app.versions import bump_versions
+from app.events import moved_event, publish
+from app.tasks import dal
+from app.tasks.concurrency import with_cas_retry
+from app.idempotency import checkout_operation, release_inflight
 
-Session = Config.Session
 
-@celery.task(bind=True)
+@celery.task(bind=True, ignore_result=False)
 def checkout_book(self, book_id, holder_id, session=None):
-    logging.warning(f"CHECKOUT_TASK: DB URL={os.environ.get('DATABASE_URL')}, TEST_DATABASE_URL={os.environ.get('TEST_DATABASE_URL')}")
     close_session = False
     if session is None:
         session = Session()
         close_session = True
+
+    def attempt():
+        result, changed = dal.checkout(session, book_id, holder_id)
+        if changed:
+            bump_versions('books')
+            publish(moved_event([book_id], holder_id))
+        return result
+
     try:
-        book = session.query(Book).filter_by(id=book_id).first()
-        holder = session.query(Holder).filter_by(id=holder_id).first()
-        if not book:
-            return {'status': 'error', 'message': f'Book {book_id} not found'}
-        if not holder:
-            return {'status': 'error', 'message': f'Holder {holder_id} not found'}
-        book.holder_id = holder.id
-        session.commit()
-        return {'status': 'success', 'book_id': book_id, 'holder_id': holder_id}
+        return with_cas_retry(session, book_id, attempt)
     except Exception as e:
         session.rollback()
         return {'status': 'error', 'message': str(e)}
     finally:
         if close_session:
             session.close()
+        release_inflight(checkout_operation(book_id, holder_id), self.request.id)
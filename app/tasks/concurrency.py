@@ -0,0 +1,33 @@
+import random
+import time
+
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.metrics import record_retry
+
+# Attempts before a lost compare-and-swap is reported as a conflict
+CAS_MAX_ATTEMPTS = 5
+# Upper bound (seconds) of the first jittered backoff; doubles per attempt
+CAS_BACKOFF_BASE = 0.005
+
+
+def conflict(book_id, message, **extra):
+    return {'status': 'conflict', 'book_id': book_id, 'message': message, **extra}
+
+
+def with_cas_retry(session, book_id, attempt):
+    """Run ``attempt()`` until its commit wins the ``Book.version`` check.
+
+    ``attempt`` re-reads the book, decides and commits; a concurrent writer
+    makes the versioned UPDATE match no row (StaleDataError). The transaction
+    is then rolled back and retried after a full-jitter backoff, so contending
+    workers spread out instead of colliding again in lockstep.
+    """
+    for n in range(CAS_MAX_ATTEMPTS):
+        try:
+            return attempt()
+        except StaleDataError:
+            session.rollback()
+            record_retry('cas')
+            time.sleep(random.uniform(0, CAS_BACKOFF_BASE * 2 ** n))
+    return conflict(book_id, f'Book {book_id} is being updated concurrently, try again')
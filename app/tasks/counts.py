@@ -0,0 +1,36 @@
+import random
+import time
+
+from app.celery import celery
+from app.engine import Session
+from app.book_counts import is_serialization_failure, reconcile_book_counts
+
+# Attempts before a recount that keeps losing to concurrent writers gives up
+RECONCILE_MAX_ATTEMPTS = 5
+RECONCILE_BACKOFF_BASE = 0.05
+
+
+@celery.task(bind=True)
+def reconcile_holder_book_counts(self, session=None):
+    """Fix drifted ``Holder.book_count`` values; returns how many were wrong. Run by Celery beat."""
+    close_session = False
+    if session is None:
+        session = Session()
+        close_session = True
+    try:
+        for n in range(RECONCILE_MAX_ATTEMPTS):
+            if session.get_bind().dialect.name == 'postgresql':
+                # Counts and counters from one snapshot; must precede any other statement
+                session.connection(execution_options={'isolation_level': 'REPEATABLE READ'})
+            try:
+                fixed = reconcile_book_counts(session)
+                session.commit()
+                return fixed
+            except Exception as e:
+                session.rollback()
+                if not is_serialization_failure(e) or n == RECONCILE_MAX_ATTEMPTS - 1:
+                    raise
+                time.sleep(random.uniform(0, RECONCILE_BACKOFF_BASE * 2 ** n))
+    finally:
+        if close_session:
+            session.close()
@@ -0,0 +1,155 @@
+"""Data access for the checkout/return tasks.
+
+On Postgres each operation is a single statement: the holder/Library lookups
+and the availability check are folded into an ``UPDATE ... RETURNING`` inside
+a data-modifying CTE, and the outer SELECT reports what happened so the task
+can build the same results as before. Other databases (SQLite in local runs)
+use the equivalent ORM reads and versioned UPDATE.
+
+A move also appends a ``loan_events`` row (app/loans.py) and moves one unit
+of ``Holder.book_count`` (app/book_counts.py) in the same transaction: more
+CTEs on Postgres, one INSERT and one UPDATE before the commit elsewhere.
+
+Functions commit on success and return ``(result, changed)``. A race lost
+between the snapshot and the UPDATE raises StaleDataError, which
+``with_cas_retry`` turns into a retry exactly like a failed version check.
+"""
+from sqlalchemy import text
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.book_counts import adjust_book_counts
+from app.loans import CHECKOUT, RETURN, log_events
+from app.models import Book, Holder
+from app.tasks.concurrency import conflict
+
+LIBRARY_NAME = 'Library'
+
+# Postgres evaluates the CTEs against one snapshot: ``book`` is the row as it
+# was, ``moved`` is the row if the UPDATE (re-checked under the row lock) won.
+CHECKOUT_SQL = text("""
+WITH library AS (SELECT id FROM holders WHERE name = :library),
+     holder AS (SELECT id FROM holders WHERE id = :holder_id),
+     book AS (SELECT holder_id FROM books WHERE id = :book_id),
+     moved AS (
+        UPDATE books SET holder_id = :holder_id, version = version + 1
+        WHERE id = :book_id
+          AND EXISTS (SELECT 1 FROM holder)
+          AND holder_id = (SELECT id FROM library)
+          AND holder_id <> :holder_id
+        RETURNING id
+     ),
+     logged AS (
+        INSERT INTO loan_events (book_id, holder_id, kind)
+        SELECT id, :holder_id, :kind FROM moved
+     ),
+     counted AS (
+        -- the Library's own count is derived on read (app/book_counts.py)
+        UPDATE holders SET book_count = book_count + 1
+        WHERE id = :holder_id AND EXISTS (SELECT 1 FROM moved)
+     )
+SELECT (SELECT holder_id FROM book) AS current_holder_id,
+       EXISTS (SELECT 1 FROM holder) AS holder_exists,
+       (SELECT id FROM library) AS library_id,
+       EXISTS (SELECT 1 FROM moved) AS moved
+""")
+
+RETURN_SQL = text("""
+WITH library AS (SELECT id FROM holders WHERE name = :library),
+     book AS (SELECT holder_id FROM books WHERE id = :book_id),
+     moved AS (
+        UPDATE books SET holder_id = library.id, version = books.version + 1
+        FROM library
+        WHERE books.id = :book_id AND books.holder_id <> library.id
+          -- the event names the holder seen in the snapshot, so it must still hold the book
+          AND books.holder_id = (SELECT holder_id FROM book)
+        RETURNING books.id
+     ),
+     logged AS (
+        INSERT INTO loan_events (book_id, holder_id, kind)
+        SELECT id, (SELECT holder_id FROM book), :kind FROM moved
+     ),
+     counted AS (
+        UPDATE holders SET book_count = book_count - 1
+        WHERE id = (SELECT holder_id FROM book) AND EXISTS (SELECT 1 FROM moved)
+     )
+SELECT (SELECT holder_id FROM book) AS current_holder_id,
+       (SELECT id FROM library) AS library_id,
+       EXISTS (SELECT 1 FROM moved) AS moved
+""")
+
+
+def single_statement(session):
+    return session.get_bind().dialect.name == 'postgresql'
+
+
+def _book_not_found(book_id):
+    return {'status': 'error', 'message': f'Book {book_id} not found'}
+
+
+def checkout(session, book_id, holder_id):
+    if not single_statement(session):
+        return _checkout_orm(session, book_id, holder_id)
+    row = session.execute(
+        CHECKOUT_SQL, {'book_id': book_id, 'holder_id': holder_id, 'library': LIBRARY_NAME, 'kind': CHECKOUT}
+    ).one()
+    session.commit()
+    if row.moved:
+        return {'status': 'success', 'book_id': book_id, 'holder_id': holder_id}, True
+    if row.current_holder_id is None:
+        return _book_not_found(book_id), False
+    if not row.holder_exists:
+        return {'status': 'error', 'message': f'Holder {holder_id} not found'}, False
+    if row.current_holder_id == holder_id:
+        return {'status': 'success', 'book_id': book_id, 'holder_id': holder_id}, False
+    if row.current_holder_id == row.library_id:
+        raise StaleDataError(f'Book {book_id} changed while checking out')
+    return conflict(book_id, f'Book {book_id} is already checked out', holder_id=row.current_holder_id), False
+
+
+def return_to_library(session, book_id):
+    if not single_statement(session):
+        return _return_orm(session, book_id)
+    row = session.execute(RETURN_SQL, {'book_id': book_id, 'library': LIBRARY_NAME, 'kind': RETURN}).one()
+    session.commit()
+    if row.current_holder_id is None:
+        return _book_not_found(book_id), False
+    if row.library_id is None:
+        return {'status': 'error', 'message': 'Library holder not found'}, False
+    if not row.moved and row.current_holder_id != row.library_id:
+        raise StaleDataError(f'Book {book_id} changed while returning')
+    return {'status': 'success', 'book_id': book_id, 'holder_id': row.library_id}, row.moved
+
+
+def _checkout_orm(session, book_id, holder_id):
+    book = session.query(Book).filter_by(id=book_id).populate_existing().first()
+    holder = session.query(Holder).filter_by(id=holder_id).first()
+    if not book:
+        return _book_not_found(book_id), False
+    if not holder:
+        return {'status': 'error', 'message': f'Holder {holder_id} not found'}, False
+    changed = book.holder_id != holder.id
+    if changed:
+        library = session.query(Holder.id).filter_by(name=LIBRARY_NAME).scalar()
+        if book.holder_id != library:
+            return conflict(book_id, f'Book {book_id} is already checked out', holder_id=book.holder_id), False
+        log_events(session, [{'book_id': book_id, 'holder_id': holder.id, 'kind': CHECKOUT}])
+        adjust_book_counts(session, {holder.id: 1})
+        book.holder_id = holder.id
+        session.commit()
+    return {'status': 'success', 'book_id': book_id, 'holder_id': holder_id}, changed
+
+
+def _return_orm(session, book_id):
+    book = session.query(Book).filter_by(id=book_id).populate_existing().first()
+    if not book:
+        return _book_not_found(book_id), False
+    library_holder = session.query(Holder).filter_by(name=LIBRARY_NAME).first()
+    if not library_holder:
+        return {'status': 'error', 'message': 'Library holder not found'}, False
+    changed = book.holder_id != library_holder.id
+    if changed:
+        log_events(session, [{'book_id': book_id, 'holder_id': book.holder_id, 'kind': RETURN}])
+        adjust_book_counts(session, {book.holder_id: -1})
+        book.holder_id = library_holder.id
+        session.commit()
+    return {'status': 'success', 'book_id': book_id, 'holder_id': library_holder.id}, changed
@@ -0,0 +1,28 @@
+from app.celery import celery
+from app.engine import Session
+from app.imports import FAILED, SUCCEEDED, remove_upload, run_import
+from app.models import ImportJob
+
+
+@celery.task(bind=True)
+def import_books(self, job_id, session=None):
+    """Run an ImportJob. Progress and errors live on the job row (GET /api/imports/<id>/)."""
+    close_session = False
+    if session is None:
+        session = Session()
+        close_session = True
+    try:
+        job = session.get(ImportJob, job_id)
+        if job is None or job.status in (SUCCEEDED, FAILED):
+            return
+        try:
+            run_import(session, job)
+        except Exception as e:
+            session.rollback()
+            job.status = FAILED
+            job.message = str(e)
+            session.commit()
+        remove_upload(job.path)
+    finally:
+        if close_session:
+            session.close()
@@ -0,0 +1,20 @@
+from app.celery import celery
+from app.engine import Session
+from app.loans import refresh_rollups
+
+
+@celery.task(bind=True)
+def refresh_loan_rollups(self, session=None):
+    """Fold new loan events into the rollups behind /api/stats/loans/. Run by Celery beat."""
+    close_session = False
+    if session is None:
+        session = Session()
+        close_session = True
+    try:
+        return refresh_rollups(session)
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        if close_session:
+            session.close()
@@ -1,31 +1,32 @@
-import logging
-logging.warning("DEBUG: app/tasks/return_book.py imported")
 from app.celery import celery
-from app.models import Book, Holder
-from app.config import Config
-import os
+from app.engine import Session
+from app.versions import bump_versions
+from app.events import moved_event, publish
+from app.tasks import dal
+from app.tasks.concurrency import with_cas_retry
+from app.idempotency import return_operation, release_inflight
 
-Session = Config.Session
 
-@celery.task(bind=True)
+@celery.task(bind=True, ignore_result=False)
 def return_book_task(self, book_id, session=None):
     close_session = False
     if session is None:
         session = Session()
         close_session = True
+
+    def attempt():
+        result, changed = dal.return_to_library(session, book_id)
+        if changed:
+            bump_versions('books')
+            publish(moved_event([book_id], result['holder_id']))
+        return result
+
     try:
-        book = session.query(Book).filter_by(id=book_id).first()
-        if not book:
-            return {'status': 'error', 'message': f'Book {book_id} not found'}
-        library_holder = session.query(Holder).filter_by(name='Library').first()
-        if not library_holder:
-            return {'status': 'error', 'message': 'Library holder not found'}
-        book.holder_id = library_holder.id
-        session.commit()
-        return {'status': 'success', 'book_id': book_id, 'holder_id': library_holder.id}
+        return with_cas_retry(session, book_id, attempt)
     except Exception as e:
         session.rollback()
         return {'status': 'error', 'message': str(e)}
     finally:
         if close_session:
             session.close()
+        release_inflight(return_operation(book_id), self.request.id)
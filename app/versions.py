@@ -0,0 +1,87 @@
+import hashlib
+import logging
+import uuid
+from functools import wraps
+
+from flask import make_response, request
+from redis.exceptions import RedisError
+
+from app.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'versions:{}'
+# Random token regenerated whenever Redis loses the counters, so ETags issued
+# before a flush can never match counters that restarted from zero.
+EPOCH_KEY = 'versions:epoch'
+
+
+def bump_versions(*tables):
+    """Mark ``tables`` as changed. Call after the write has committed.
+
+    Failing to reach Redis is logged, not raised: the write itself succeeded.
+    """
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for table in tables:
+            pipe.incr(VERSION_KEY.format(table))
+        pipe.execute()
+    except RedisError as e:
+        logger.warning("Could not bump versions for %s: %s", tables, e)
+
+
+def current_versions(*tables):
+    """Return ``(epoch, *counters)`` for ``tables``, or None if Redis is down.
+
+    Cached per request so the ETag and cache layers share one round-trip.
+    (Not on ``flask.g``: that outlives the request when an app context is
+    already pushed, as in the test client.)
+    """
+    cache = request.environ.setdefault('app.table_versions', {})
+    if tables in cache:
+        return cache[tables]
+    client = get_redis()
+    try:
+        epoch, *counters = client.mget([EPOCH_KEY] + [VERSION_KEY.format(t) for t in tables])
+        if epoch is None:
+            client.set(EPOCH_KEY, uuid.uuid4().hex, nx=True)
+            epoch = client.get(EPOCH_KEY)
+    except RedisError as e:
+        logger.warning("Could not read versions for %s: %s", tables, e)
+        return None
+    versions = (epoch.decode(),) + tuple(int(c or 0) for c in counters)
+    cache[tables] = versions
+    return versions
+
+
+def etag_for(versions):
+    """Strong ETag for the current request URL at the given table versions."""
+    raw = ':'.join(map(str, versions)) + ':' + request.full_path
+    return hashlib.blake2b(raw.encode(), digest_size=12).hexdigest()
+
+
+def conditional(*tables):
+    """Serve 304 for GETs whose ``If-None-Match`` matches the table versions.
+
+    The check happens before the view runs, so a revalidation costs one Redis
+    MGET and no query or serialization work.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            versions = current_versions(*tables)
+            if versions is None:
+                return view(*args, **kwargs)
+            etag = etag_for(versions)
+            if request.if_none_match.contains(etag):
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            # Let browsers keep the body but revalidate on every use
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
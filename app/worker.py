@@ -0,0 +1,66 @@
+"""Celery worker entry point that consumes only the selected queues.
+
+    python -m app.worker -Q interactive --concurrency=4
+    python -m app.worker -Q bulk --concurrency=1
+
+The queue profile in ``app.celery.QUEUE_PROFILES`` sets the prefetch
+multiplier and ack policy. Other arguments are passed through to
+``celery worker``. The queues default to ``CELERY_WORKER_QUEUES``, or to all
+queues, as a single worker for development.
+"""
+import argparse
+import os
+import sys
+
+from app.celery import QUEUE_PROFILES, celery
+from app.metrics import prepare_multiprocess_dir
+
+
+def worker_options(queues):
+    """Worker settings for ``queues``.
+
+    The prefetch multiplier is worker-wide, so a worker that mixes queues
+    uses the most conservative (smallest) one. It also acks late if any of
+    its queues asks for that.
+    """
+    unknown = [q for q in queues if q not in QUEUE_PROFILES]
+    if unknown or not queues:
+        raise ValueError(f"unknown queue(s) {', '.join(unknown) or '(none)'}; choose from {', '.join(QUEUE_PROFILES)}")
+    profiles = [QUEUE_PROFILES[q] for q in queues]
+    return {
+        'prefetch_multiplier': min(p['prefetch_multiplier'] for p in profiles),
+        'acks_late': any(p['acks_late'] for p in profiles),
+    }
+
+
+def worker_argv(queues, extra=()):
+    options = worker_options(queues)
+    return [
+        'worker',
+        '--queues', ','.join(queues),
+        '--prefetch-multiplier', str(options['prefetch_multiplier']),
+        '--hostname', f"{'+'.join(queues)}@%h",
+        *extra,
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument(
+        '-Q', '--queues',
+        default=os.environ.get('CELERY_WORKER_QUEUES', ','.join(QUEUE_PROFILES)),
+        help='comma-separated queues to consume',
+    )
+    args, extra = parser.parse_known_args(argv)
+    queues = [q.strip() for q in args.queues.split(',') if q.strip()]
+    try:
+        options = worker_options(queues)
+    except ValueError as e:
+        parser.error(str(e))
+    celery.conf.task_acks_late = options['acks_late']
+    prepare_multiprocess_dir()
+    celery.worker_main(worker_argv(queues, extra))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
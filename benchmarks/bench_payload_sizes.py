@@ -0,0 +1,65 @@
+"""Broker and result-backend bytes per task, JSON (before) vs. the app's settings.
+
+Publishes each task message to an in-memory broker and stores its result in an
+in-memory backend, then measures what Redis would hold: the kombu envelope
+for the broker, the encoded result for the backend::
+
+    python -m benchmarks.bench_payload_sizes --bulk-sizes 10 100 1000
+"""
+import argparse
+import json
+import uuid
+
+from celery import Celery
+
+from app.celery import celery as app_celery
+
+BEFORE = {
+    'task_serializer': 'json',
+    'result_serializer': 'json',
+    'accept_content': ['json'],
+    'result_accept_content': ['json'],
+}
+AFTER = {key: app_celery.conf[key] for key in BEFORE}
+
+
+def payloads(bulk_sizes):
+    yield 'checkout', [1, 2], {'status': 'success', 'book_id': 1, 'holder_id': 2}
+    yield 'return', [1], {'status': 'success', 'book_id': 1, 'holder_id': 1}
+    for size in bulk_sizes:
+        ids = list(range(1, size + 1))
+        result = {
+            'status': 'success', 'holder_id': 2, 'updated': size,
+            'results': [{'book_id': i, 'status': 'success', 'holder_id': 2} for i in ids],
+        }
+        yield f'bulk x{size}', [ids, 2], result
+
+
+def measure(settings, args, result):
+    app = Celery('bench', broker='memory://', backend='cache+memory://')
+    app.conf.update(settings)
+    with app.connection_for_write() as conn:
+        app.send_task('bench.task', args=args, connection=conn, queue='bench')
+        # The Redis transport stores this envelope as JSON
+        broker_bytes = len(json.dumps(conn.default_channel._get('bench')))
+    task_id = uuid.uuid4().hex
+    app.backend.store_result(task_id, result, 'SUCCESS')
+    backend_bytes = len(app.backend.get(app.backend.get_key_for_task(task_id)))
+    return broker_bytes, backend_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--bulk-sizes', type=int, nargs='+', default=[10, 100, 1000])
+    args = parser.parse_args()
+    print(f"{'task':<12} {'broker before':>14} {'after':>8} {'backend before':>15} {'after':>8}")
+    for name, task_args, result in payloads(args.bulk_sizes):
+        broker_before, backend_before = measure(BEFORE, task_args, result)
+        broker_after, backend_after = measure(AFTER, task_args, result)
+        print(f"{name:<12} {broker_before:>14} {broker_after:>8} {backend_before:>15} {backend_after:>8}")
+    print(f"\nResults are kept for {app_celery.conf.result_expires}s (was 86400s); "
+          f"tasks store none unless they set ignore_result=False.")
+
+
+if __name__ == '__main__':
+    main()
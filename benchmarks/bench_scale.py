@@ -0,0 +1,259 @@
+"""API routes and checkout/return tasks against 10k/100k/1M-book datasets.
+
+Seeds a throwaway database per scale, then times the list/detail/CRUD routes
+through the Flask test client and the checkout/return tasks, eagerly and
+(``--task-modes worker``) through a real worker on the configured broker::
+
+    python -m benchmarks.bench_scale --scales 10k 100k --output bench.json
+    python -m benchmarks.bench_scale --database-url postgresql://.../bench_db
+    python -m benchmarks.bench_scale --compare bench.json --tolerance 1.25
+
+The default database is a temporary SQLite file. A ``--database-url`` must
+point at a database that can be wiped: its tables are dropped and recreated.
+Application Redis (versions, cache) is an in-process fakeredis unless
+``--redis-url`` is given, and the response cache is off so every request hits
+the database. Data and the order of operations are deterministic, so runs
+are comparable. The report is JSON. With ``--compare``, any median slower than
+the baseline by more than ``--tolerance`` is listed and the exit status is 1.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import sqlalchemy
+from sqlalchemy import insert
+
+from app import create_app
+from app.models import db, Book, Holder
+from app.pagination import encode_cursor
+
+SCALES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+SEED_CHUNK = 50_000
+PAGE = 100
+
+
+def make_config(url):
+    class BenchConfig:
+        SQLALCHEMY_DATABASE_URI = url
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+        SECRET_KEY = "bench"
+        CACHE_ENABLED = False
+    return BenchConfig
+
+
+def seed(books, holders):
+    db.session.execute(insert(Holder), [{"name": "Library"}] + [{"name": f"Holder {i}"} for i in range(1, holders)])
+    for start in range(0, books, SEED_CHUNK):
+        db.session.execute(insert(Book), [
+            {
+                "title": f"Title {i}",
+                "author": f"Author {i % 5000}",
+                "published_year": 1900 + i % 125,
+                "holder_id": 1 + i % holders,
+            }
+            for i in range(start, min(start + SEED_CHUNK, books))
+        ])
+        db.session.commit()
+
+
+def summarize(name, kind, samples, queries=None):
+    ordered = sorted(samples)
+    result = {
+        "name": name,
+        "kind": kind,
+        "n": len(samples),
+        "median_ms": round(statistics.median(ordered), 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+    }
+    if queries is not None:
+        result["queries"] = queries
+    return result
+
+
+def time_request(client, method, url_for_iteration, body_for_iteration, repeat, expected):
+    samples = []
+    queries = None
+    for i in range(repeat + 1):
+        url = url_for_iteration(i)
+        body = body_for_iteration(i) if body_for_iteration else None
+        kwargs = {"json": body} if body is not None else {}
+        start = time.perf_counter()
+        resp = client.open(url, method=method, **kwargs)
+        resp.get_data()
+        elapsed = (time.perf_counter() - start) * 1000
+        assert resp.status_code == expected, (method, url, resp.status_code, resp.get_data(as_text=True)[:200])
+        queries = int(resp.headers.get("X-Query-Count", -1))
+        if i:  # the first request warms up schema and statement caches
+            samples.append(elapsed)
+    return samples, queries
+
+
+def bench_routes(client, books, holders, repeat):
+    rng = random.Random(0)
+    book_ids = [rng.randint(1, books) for _ in range(repeat + 1)]
+    middle = encode_cursor(books // 2)
+    new_book = {"title": "Bench", "author": "Bench Author", "published_year": 2000, "holder_id": 1}
+
+    def create_body(i):
+        return dict(new_book, title=f"Bench {i}")
+
+    cases = [
+        ("GET /api/books/", "GET", lambda i: f"/api/books/?limit={PAGE}", None, 200),
+        ("GET /api/books/ (deep cursor)", "GET", lambda i: f"/api/books/?limit={PAGE}&cursor={middle}", None, 200),
+        ("GET /api/books/?holder_id=", "GET", lambda i: f"/api/books/?limit={PAGE}&holder_id={1 + i % holders}", None, 200),
+        ("GET /api/books/?fields=holder", "GET", lambda i: f"/api/books/?limit={PAGE}&fields=id,title,holder", None, 200),
+        ("GET /api/books/<id>/", "GET", lambda i: f"/api/books/{book_ids[i]}/", None, 200),
+        ("GET /api/holders/", "GET", lambda i: f"/api/holders/?limit={PAGE}&fields=id,name", None, 200),
+        ("GET /api/holders/<id>/", "GET", lambda i: f"/api/holders/{2 + i % (holders - 1)}/", None, 200),
+        ("POST /api/books/", "POST", lambda i: "/api/books/", create_body, 201),
+        ("PUT /api/books/<id>/", "PUT", lambda i: f"/api/books/{book_ids[i]}/", lambda i: dict(new_book, title=f"Put {i}"), 200),
+        ("PATCH /api/books/<id>/", "PATCH", lambda i: f"/api/books/{book_ids[i]}/", lambda i: {"title": f"Patch {i}"}, 200),
+    ]
+    results = []
+    for name, method, url, body, expected in cases:
+        samples, queries = time_request(client, method, url, body, repeat, expected)
+        results.append(summarize(name, "route", samples, queries))
+    created = [row.id for row in db.session.query(Book.id).filter(Book.title.like("Bench %")).order_by(Book.id)]
+    samples, queries = time_request(
+        client, "DELETE", lambda i: f"/api/books/{created[i]}/", None, min(repeat, len(created) - 1), 204,
+    )
+    results.append(summarize("DELETE /api/books/<id>/", "route", samples, queries))
+    return results
+
+
+def bench_tasks(books, holders, repeat, mode, timeout):
+    """Return, then check out again, a sample of books, one task at a time."""
+    from app.tasks.checkout import checkout_book
+    from app.tasks.return_book import return_book_task
+
+    rng = random.Random(1)
+    book_ids = rng.sample(range(1, books + 1), repeat + 1)
+
+    def run(task, args):
+        if mode == "eager":
+            return task.apply(args=args).get()
+        return task.apply_async(args=args).get(timeout=timeout)
+
+    results = []
+    for name, task, args_for in (
+        ("return_book_task", return_book_task, lambda book_id: (book_id,)),
+        ("checkout_book", checkout_book, lambda book_id: (book_id, 2 + book_id % (holders - 1))),
+    ):
+        samples = []
+        for i, book_id in enumerate(book_ids):
+            start = time.perf_counter()
+            result = run(task, args_for(book_id))
+            elapsed = (time.perf_counter() - start) * 1000
+            assert result["status"] == "success", (name, result)
+            if i:
+                samples.append(elapsed)
+        results.append(summarize(f"{name} ({mode})", "task", samples))
+    return results
+
+
+def bench_scale(label, url, args):
+    from app.engine import init_engine
+
+    app = create_app(make_config(url))
+    client = app.test_client()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        start = time.perf_counter()
+        seed(SCALES[label], args.holders)
+        seed_seconds = time.perf_counter() - start
+        results = bench_routes(client, SCALES[label], args.holders, args.repeat)
+        db.session.remove()
+    # Tasks use the process-wide engine, not Flask-SQLAlchemy's
+    init_engine(url).dispose()
+    for mode in args.task_modes:
+        if mode == "worker":
+            from celery.contrib.testing.worker import start_worker
+            from app.celery import BULK_QUEUE, INTERACTIVE_QUEUE, celery
+            with start_worker(celery, pool="solo", perform_ping_check=False, queues=[INTERACTIVE_QUEUE, BULK_QUEUE]):
+                results += bench_tasks(SCALES[label], args.holders, args.repeat, mode, args.task_timeout)
+        else:
+            results += bench_tasks(SCALES[label], args.holders, args.repeat, mode, args.task_timeout)
+    for result in results:
+        result["scale"] = label
+    return {"scale": label, "books": SCALES[label], "seed_seconds": round(seed_seconds, 2)}, results
+
+
+def compare(results, baseline_path, tolerance):
+    """Benchmarks whose median regressed past ``tolerance`` x the baseline."""
+    with open(baseline_path) as f:
+        baseline = {(r["scale"], r["name"]): r for r in json.load(f)["results"]}
+    regressions = []
+    for result in results:
+        before = baseline.get((result["scale"], result["name"]))
+        if before and result["median_ms"] > before["median_ms"] * tolerance:
+            regressions.append({
+                "scale": result["scale"], "name": result["name"],
+                "baseline_ms": before["median_ms"], "median_ms": result["median_ms"],
+            })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", nargs="+", choices=list(SCALES), default=["10k", "100k"])
+    parser.add_argument("--holders", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--database-url", help="throwaway database (tables are dropped); default: temporary SQLite")
+    parser.add_argument("--redis-url", help="application Redis; default: in-process fakeredis")
+    parser.add_argument("--task-modes", nargs="+", choices=["eager", "worker"], default=["eager"])
+    parser.add_argument("--task-timeout", type=float, default=30)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", metavar="BASELINE", help="earlier --output to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=1.25)
+    args = parser.parse_args()
+
+    if args.redis_url:
+        os.environ["REDIS_URL"] = args.redis_url
+    else:
+        import fakeredis
+        import app.redis_client
+        app.redis_client._client = fakeredis.FakeRedis()
+
+    datasets, results = [], []
+    with tempfile.TemporaryDirectory() as tmp:
+        for label in args.scales:
+            url = args.database_url or f"sqlite:///{os.path.join(tmp, f'bench-{label}.db')}"
+            dataset, scale_results = bench_scale(label, url, args)
+            datasets.append(dataset)
+            results += scale_results
+            print(f"{label}: done", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "database": sqlalchemy.engine.make_url(args.database_url or "sqlite://").get_backend_name(),
+            "repeat": args.repeat,
+            "holders": args.holders,
+        },
+        "datasets": datasets,
+        "results": results,
+    }
+    if args.compare:
+        report["regressions"] = compare(results, args.compare, args.tolerance)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    sys.exit(1 if report.get("regressions") else 0)
+
+
+if __name__ == "__main__":
+    main()
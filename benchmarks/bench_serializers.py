@@ -0,0 +1,85 @@
+"""Marshmallow vs. fast-path serialization on the hot read endpoints.
+
+Seeds a throwaway SQLite database and times each endpoint through the Flask
+test client with ``FAST_SERIALIZER`` off and on::
+
+    python -m benchmarks.bench_serializers --books 20000 --limit 1000
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import insert
+
+from app import create_app
+from app.models import db, Book, Holder
+
+
+def make_config(url):
+    class BenchConfig:
+        SQLALCHEMY_DATABASE_URI = url
+        SQLALCHEMY_TRACK_MODIFICATIONS = False
+        SECRET_KEY = "bench"
+        PAGE_SIZE_MAX = 100000
+    return BenchConfig
+
+
+def seed(holders, books):
+    db.session.execute(insert(Holder), [{"name": "Library"}] + [{"name": f"Holder {i}"} for i in range(1, holders)])
+    db.session.execute(insert(Book), [
+        {
+            "title": f"Title {i}",
+            "author": f"Author {i % 500}",
+            "published_year": 1900 + i % 125,
+            "holder_id": 1 + i % holders,
+        }
+        for i in range(books)
+    ])
+    db.session.commit()
+
+
+def time_endpoint(client, app, url, fast, repeat):
+    app.config["FAST_SERIALIZER"] = fast
+    client.get(url)  # warm up schema/statement caches
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        resp = client.get(url)
+        samples.append((time.perf_counter() - start) * 1000)
+        assert resp.status_code == 200, resp.status_code
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--books", type=int, default=20000)
+    parser.add_argument("--holders", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app(make_config(f"sqlite:///{os.path.join(tmp, 'bench.db')}"))
+        client = app.test_client()
+        with app.app_context():
+            db.create_all()
+            seed(args.holders, args.books)
+        urls = [
+            f"/api/books/?limit={args.limit}",
+            "/api/books/1/",
+            f"/api/holders/?limit={args.limit}",
+            f"/api/holders/?limit={args.limit}&fields=id,name",
+        ]
+        results = {}
+        for url in urls:
+            slow = time_endpoint(client, app, url, False, args.repeat)
+            fast = time_endpoint(client, app, url, True, args.repeat)
+            results[url] = {"marshmallow_ms": round(slow, 3), "fast_ms": round(fast, 3), "speedup": round(slow / fast, 2)}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
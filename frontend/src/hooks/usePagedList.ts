@@ -0,0 +1,24 @@
+// usePagedList.ts
+import { useCallback, useMemo } from 'react';
+import { QueryKey, useInfiniteQuery } from '@tanstack/react-query';
+import { Page } from '../services/pagination';
+
+// An infinite query over a keyset-paginated endpoint. Pages are fetched on
+// demand through `loadMore` (e.g. from useWindowedRows' onEndReached), so the
+// first render costs one page however large the table is.
+export function usePagedList<T>(queryKey: QueryKey, fetchPage: (cursor: string | null) => Promise<Page<T>>) {
+  const query = useInfiniteQuery({
+    queryKey,
+    queryFn: ({ pageParam }) => fetchPage(pageParam),
+    initialPageParam: null as string | null,
+    getNextPageParam: (lastPage: Page<T>) => lastPage.nextCursor,
+  });
+  const { data, hasNextPage, isFetchingNextPage, fetchNextPage } = query;
+
+  const rows = useMemo(() => data?.pages.flatMap((page) => page.items) ?? [], [data]);
+  const loadMore = useCallback(() => {
+    if (hasNextPage && !isFetchingNextPage) fetchNextPage();
+  }, [hasNextPage, isFetchingNextPage, fetchNextPage]);
+
+  return { ...query, rows, loadMore };
+}
@@ -0,0 +1,37 @@
+// useWindowedRows.ts
+import React, { useCallback, useEffect, useState } from 'react';
+
+interface WindowOptions {
+  count: number;
+  rowHeight: number;
+  height: number;
+  overscan?: number;
+  // Called when the window nears the last loaded row, to fetch the next page
+  onEndReached?: () => void;
+}
+
+// Fixed-height row windowing: only the rows in view (plus `overscan` on each
+// side) are rendered, and two spacers stand in for the rest, so the DOM stays
+// the same size however many rows are loaded.
+export function useWindowedRows({ count, rowHeight, height, overscan = 10, onEndReached }: WindowOptions) {
+  const [scrollTop, setScrollTop] = useState(0);
+
+  const onScroll = useCallback((e: React.UIEvent<HTMLElement>) => {
+    setScrollTop(e.currentTarget.scrollTop);
+  }, []);
+
+  const start = Math.max(0, Math.floor(scrollTop / rowHeight) - overscan);
+  const end = Math.min(count, Math.ceil((scrollTop + height) / rowHeight) + overscan);
+
+  useEffect(() => {
+    if (onEndReached && end >= count - overscan) onEndReached();
+  }, [end, count, overscan, onEndReached]);
+
+  return {
+    start,
+    end,
+    paddingTop: start * rowHeight,
+    paddingBottom: (count - end) * rowHeight,
+    containerProps: { onScroll, sx: { maxHeight: height, overflowY: 'auto' as const } },
+  };
+}
@@ -1,9 +1,10 @@
 // Books.test.tsx
 import React from 'react';
-import { render, screen, fireEvent } from '@testing-library/react';
+import { render, screen, fireEvent, waitFor } from '@testing-library/react';
 import { QueryClient, QueryClientProvider } from '@tanstack/react-query';
 import { MemoryRouter } from 'react-router-dom';
 import Books from './Books';
+import { fetchBooksPage } from '../services/books';
 
 function renderWithProviders(ui: React.ReactElement) {
   const queryClient = new QueryClient();
@@ -16,23 +17,23 @@ function renderWithProviders(ui: React.ReactElement) {
   );
 }
 
-jest.mock('@tanstack/react-query', () => {
-  const actual = jest.requireActual('@tanstack/react-query');
-  return {
-    ...actual,
-    useQuery: () => ({
-      data: [],
-      isLoading: false,
-      isError: false,
-      error: null,
-    }),
-  };
-});
 jest.mock('../services/books', () => ({
-  fetchBooks: jest.fn().mockResolvedValue([]),
+  fetchBooksPage: jest.fn().mockResolvedValue({ items: [], nextCursor: null }),
   addBook: jest.fn(),
   removeBook: jest.fn(),
 }));
+jest.mock('../services/holders', () => ({
+  fetchHolders: jest.fn().mockResolvedValue([{ id: 1, name: 'Library' }]),
+}));
+
+const manyBooks = (count: number) =>
+  Array.from({ length: count }, (_, i) => ({
+    id: i + 1,
+    title: `Book ${i}`,
+    author: 'Author',
+    published_year: 2000,
+    holder_id: 1,
+  }));
 
 describe('Books', () => {
   it('renders Books page title', () => {
@@ -50,17 +51,21 @@ describe('Books', () => {
   });
 
   it('renders table with no books found', async () => {
-    jest.mock('@tanstack/react-query', () => ({
-      ...jest.requireActual('@tanstack/react-query'),
-      useQuery: () => ({
-        data: [],
-        isLoading: false,
-        isError: false,
-        error: null,
-      }),
-    }));
     renderWithProviders(<Books />);
     expect(await screen.findByText('No books found.')).toBeInTheDocument();
-    jest.unmock('@tanstack/react-query');
+  });
+
+  it('renders only the rows in view', async () => {
+    (fetchBooksPage as jest.Mock).mockResolvedValueOnce({ items: manyBooks(1000), nextCursor: null });
+    renderWithProviders(<Books />);
+    expect(await screen.findByText('Book 0')).toBeInTheDocument();
+    expect(screen.queryByText('Book 999')).not.toBeInTheDocument();
+    expect(screen.getAllByRole('row').length).toBeLessThan(50);
+  });
+
+  it('fetches the next page when the last rows come into view', async () => {
+    (fetchBooksPage as jest.Mock).mockResolvedValueOnce({ items: manyBooks(5), nextCursor: 'next' });
+    renderWithProviders(<Books />);
+    await waitFor(() => expect(fetchBooksPage).toHaveBeenCalledWith('next'));
   });
 });
@@ -23,15 +23,20 @@ import {
 } from '@mui/material';
 import DeleteIcon from '@mui/icons-material/Delete';
 import AddIcon from '@mui/icons-material/Add';
-import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
+import { useMutation, useQueryClient } from '@tanstack/react-query';
 import {
-  fetchBooks,
+  fetchBooksPage,
   addBook,
   removeBook,
   Book,
   BookInput,
 } from '../services/books';
 import { fetchHolders, Holder } from '../services/holders';
+import { usePagedList } from '../hooks/usePagedList';
+import { useWindowedRows } from '../hooks/useWindowedRows';
+
+const ROW_HEIGHT = 53;
+const TABLE_HEIGHT = 600;
 
 const Books: React.FC = () => {
     const queryClient = useQueryClient();
@@ -39,7 +44,7 @@ const Books: React.FC = () => {
 
     // Fetch holders and set libraryId
     React.useEffect(() => {
-      fetchHolders().then(holders => {
+      fetchHolders('Library').then(holders => {
         const library = holders.find((h: Holder) => h.name.toLowerCase() === 'library');
         if (library) setLibraryId(library.id);
       });
@@ -66,15 +71,19 @@ const Books: React.FC = () => {
     severity: 'success' | 'error';
   }>({ open: false, message: '', severity: 'success' });
 
-  // Fetch books
+  // Fetch books a page at a time, as the table scrolls
   const {
-    data: books,
+    rows: books,
     isLoading,
     isError,
     error,
-  } = useQuery<Book[], Error>({
-    queryKey: ['books'],
-    queryFn: fetchBooks,
+    loadMore,
+  } = usePagedList<Book>(['books', 'list'], (cursor) => fetchBooksPage(cursor));
+  const { start, end, paddingTop, paddingBottom, containerProps } = useWindowedRows({
+    count: books.length,
+    rowHeight: ROW_HEIGHT,
+    height: TABLE_HEIGHT,
+    onEndReached: loadMore,
   });
 
   // Add book mutation
@@ -171,8 +180,8 @@ const Books: React.FC = () => {
       ) : isError ? (
         <Alert severity="error">{(error as Error)?.message || 'Failed to load books'}</Alert>
       ) : (
-        <TableContainer component={Paper}>
-          <Table size="small" aria-label="books table">
+        <TableContainer component={Paper} {...containerProps}>
+          <Table size="small" stickyHeader aria-label="books table">
             <TableHead>
               <TableRow>
                 <TableCell>Title</TableCell>
@@ -182,9 +191,10 @@ const Books: React.FC = () => {
               </TableRow>
             </TableHead>
             <TableBody>
-              {Array.isArray(books) && books.length > 0 ? (
-                books.map((book) => (
-                  <TableRow key={book.id}>
+              {paddingTop > 0 && <TableRow sx={{ height: paddingTop }} />}
+              {books.length > 0 ? (
+                books.slice(start, end).map((book) => (
+                  <TableRow key={book.id} sx={{ height: ROW_HEIGHT }}>
                     <TableCell>{book.title}</TableCell>
                     <TableCell>{book.author}</TableCell>
                     <TableCell>{book.published_year}</TableCell>
@@ -207,6 +217,7 @@ const Books: React.FC = () => {
                   </TableCell>
                 </TableRow>
               )}
+              {paddingBottom > 0 && <TableRow sx={{ height: paddingBottom }} />}
             </TableBody>
           </Table>
         </TableContainer>
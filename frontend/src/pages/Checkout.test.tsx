@@ -1,8 +1,9 @@
 // Checkout.test.tsx
 import React from 'react';
-import { render, screen } from '@testing-library/react';
+import { render, screen, fireEvent, waitFor } from '@testing-library/react';
 import { QueryClient, QueryClientProvider } from '@tanstack/react-query';
 import Checkout from './Checkout';
+import { searchBooks } from '../services/books';
 
 const queryClient = new QueryClient();
 
@@ -15,12 +16,14 @@ function renderWithQueryClient(ui: React.ReactElement) {
 }
 
 jest.mock('../services/books', () => ({
-  fetchBooks: jest.fn().mockResolvedValue([]),
+  fetchBooksPage: jest.fn().mockResolvedValue({ items: [], nextCursor: null }),
+  searchBooks: jest.fn().mockResolvedValue([]),
   checkoutBook: jest.fn(),
   returnBook: jest.fn(),
 }));
 jest.mock('../services/holders', () => ({
   fetchHolders: jest.fn().mockResolvedValue([]),
+  fetchHoldersPage: jest.fn().mockResolvedValue({ items: [], nextCursor: null }),
 }));
 
 describe('Checkout', () => {
@@ -37,13 +40,19 @@ describe('Checkout', () => {
     expect(screen.getByRole('button', { name: /Checkout/i })).toBeInTheDocument();
   });
 
-  it('shows message when no books are checked out', () => {
+  it('shows message when no books are checked out', async () => {
     renderWithQueryClient(<Checkout />);
-    expect(screen.getByText('No books are currently checked out.')).toBeInTheDocument();
+    expect(await screen.findByText('No books are currently checked out.')).toBeInTheDocument();
   });
 
-  it('shows message when all books are checked out', () => {
+  it('shows message when all books are checked out', async () => {
     renderWithQueryClient(<Checkout />);
-    expect(screen.getByText('All books are checked out.')).toBeInTheDocument();
+    expect(await screen.findByText('All books are checked out.')).toBeInTheDocument();
+  });
+
+  it('searches books on the server as the user types', async () => {
+    renderWithQueryClient(<Checkout />);
+    fireEvent.change(screen.getByLabelText('Book'), { target: { value: 'dark tow' } });
+    await waitFor(() => expect(searchBooks).toHaveBeenCalledWith('dark tow'));
   });
 });
@@ -1,15 +1,19 @@
 // Checkout.tsx
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
 import {
-  fetchBooks,
+  fetchBooksPage,
+  searchBooks,
   checkoutBook,
   returnBook,
   Book,
 } from '../services/books';
-import { fetchHolders, Holder } from '../services/holders';
+import { fetchHolders, fetchHoldersPage, HolderSummary } from '../services/holders';
+import { usePagedList } from '../hooks/usePagedList';
+import { useWindowedRows } from '../hooks/useWindowedRows';
 
 import {
+  Autocomplete,
   Box,
   Button,
   CircularProgress,
@@ -18,23 +22,75 @@ import {
   DialogContent,
   DialogContentText,
   DialogTitle,
-  FormControl,
-  InputLabel,
-  MenuItem,
-  Select,
   Snackbar,
+  TextField,
   Typography,
   Paper,
   Grid,
   Alert,
 } from '@mui/material';
 
+const ROW_HEIGHT = 72;
+const LIST_HEIGHT = 360;
+const SEARCH_DELAY_MS = 250;
+
+interface BookListProps {
+  books: Book[];
+  loadMore: () => void;
+  empty: string;
+  renderDetail: (book: Book) => React.ReactNode;
+  renderAction?: (book: Book) => React.ReactNode;
+}
+
+// A windowed list of fixed-height book rows that pulls the next page as it nears the end
+const BookList: React.FC<BookListProps> = ({ books, loadMore, empty, renderDetail, renderAction }) => {
+  const { start, end, paddingTop, paddingBottom, containerProps } = useWindowedRows({
+    count: books.length,
+    rowHeight: ROW_HEIGHT,
+    height: LIST_HEIGHT,
+    onEndReached: loadMore,
+  });
+  if (books.length === 0) return <Typography>{empty}</Typography>;
+  return (
+    <Box {...containerProps}>
+      <Box sx={{ height: paddingTop }} />
+      {books.slice(start, end).map((book) => (
+        <Box
+          key={book.id}
+          sx={{
+            height: ROW_HEIGHT,
+            px: 1,
+            display: 'flex',
+            justifyContent: 'space-between',
+            alignItems: 'center',
+            borderBottom: 1,
+            borderColor: 'divider',
+          }}
+        >
+          <Box>
+            <Typography>
+              <strong>{book.title}</strong> by {book.author}
+            </Typography>
+            <Typography variant="body2" color="text.secondary">
+              {renderDetail(book)}
+            </Typography>
+          </Box>
+          {renderAction?.(book)}
+        </Box>
+      ))}
+      <Box sx={{ height: paddingBottom }} />
+    </Box>
+  );
+};
+
 const Checkout: React.FC = () => {
   const queryClient = useQueryClient();
 
   // State for checkout
-  const [selectedBookId, setSelectedBookId] = useState<number | ''>('');
-  const [selectedHolderId, setSelectedHolderId] = useState<number | ''>('');
+  const [selectedBook, setSelectedBook] = useState<Book | null>(null);
+  const [selectedHolder, setSelectedHolder] = useState<HolderSummary | null>(null);
+  const [bookInput, setBookInput] = useState('');
+  const [bookQuery, setBookQuery] = useState('');
   const [checkoutError, setCheckoutError] = useState<string | null>(null);
 
   // State for return dialog
@@ -48,24 +104,45 @@ const Checkout: React.FC = () => {
     severity: 'success',
   });
 
-  // Fetch books and holders
-  const { data: books, isLoading: booksLoading, error: booksError } = useQuery({
-    queryKey: ['books'],
-    queryFn: fetchBooks,
+  // Search as the user types, once they pause
+  useEffect(() => {
+    const timer = setTimeout(() => setBookQuery(bookInput.trim()), SEARCH_DELAY_MS);
+    return () => clearTimeout(timer);
+  }, [bookInput]);
+
+  // Book picker options come from the search endpoint, never the whole catalog
+  const { data: bookOptions = [], isFetching: bookSearching } = useQuery({
+    queryKey: ['books', 'search', bookQuery],
+    queryFn: () => searchBooks(bookQuery),
+    enabled: bookQuery.length > 0,
   });
-  const { data: holders, isLoading: holdersLoading, error: holdersError } = useQuery({
-    queryKey: ['holders'],
-    queryFn: fetchHolders,
+  const { data: library } = useQuery({
+    queryKey: ['holders', 'library'],
+    queryFn: () => fetchHolders('Library'),
+    select: (holders) => holders[0],
   });
 
+  // Holders, checked out and available books: one page at a time
+  const holders = usePagedList<HolderSummary>(['holders', 'summary'], fetchHoldersPage);
+  const checkedOut = usePagedList<Book>(['books', 'checked-out'], (cursor) =>
+    fetchBooksPage(cursor, { available: false, withHolder: true }),
+  );
+  const available = usePagedList<Book>(['books', 'available'], (cursor) =>
+    fetchBooksPage(cursor, { available: true }),
+  );
+  const booksError = checkedOut.error || available.error;
+  const holdersLoading = holders.isLoading;
+  const holdersError = holders.error;
+
   // Mutations
   const checkoutMutation = useMutation({
     mutationFn: ({ bookId, holderId }: { bookId: number; holderId: number }) => checkoutBook(bookId, holderId),
     onSuccess: () => {
       setSnackbar({ open: true, message: 'Book checked out successfully!', severity: 'success' });
-      setSelectedBookId('');
-      setSelectedHolderId('');
+      setSelectedBook(null);
+      setSelectedHolder(null);
       queryClient.invalidateQueries({ queryKey: ['books'] });
+      queryClient.invalidateQueries({ queryKey: ['holders', 'summary'] });
     },
     onError: (error: any) => {
       setSnackbar({ open: true, message: error?.response?.data?.error || 'Checkout failed', severity: 'error' });
@@ -79,6 +156,7 @@ const Checkout: React.FC = () => {
       setReturnDialogOpen(false);
       setReturnBookId(null);
       queryClient.invalidateQueries({ queryKey: ['books'] });
+      queryClient.invalidateQueries({ queryKey: ['holders', 'summary'] });
     },
       onError: (error: any) => {
         setSnackbar({ open: true, message: error?.response?.data?.error || 'Return failed', severity: 'error' });
@@ -86,22 +164,14 @@ const Checkout: React.FC = () => {
     }
   );
 
-  // Derived lists (updated logic: "Library" holder means available)
-  const availableBooks = Array.isArray(books)
-    ? books.filter((b: any) => b.holder?.name === "Library")
-    : [];
-  const checkedOutBooks = Array.isArray(books)
-    ? books.filter((b: any) => b.holder?.name !== "Library")
-    : [];
-
   // Handlers
   const handleCheckout = () => {
-    if (!selectedBookId || !selectedHolderId) {
+    if (!selectedBook || !selectedHolder) {
       setCheckoutError('Please select both a book and a holder.');
       return;
     }
     setCheckoutError(null);
-    checkoutMutation.mutate({ bookId: selectedBookId as number, holderId: selectedHolderId as number });
+    checkoutMutation.mutate({ bookId: selectedBook.id, holderId: selectedHolder.id });
   };
 
   const handleReturn = (bookId: number) => {
@@ -132,53 +202,53 @@ const Checkout: React.FC = () => {
           Check Out a Book
         </Typography>
         <Grid container spacing={2} alignItems="center">
-          <Grid item xs={12} md={5}>
-            <FormControl fullWidth>
-              <InputLabel id="book-select-label">Book</InputLabel>
-              <Select
-                labelId="book-select-label"
-                value={selectedBookId}
-                label="Book"
-                onChange={(e) => setSelectedBookId(Number(e.target.value))}
-                disabled={booksLoading || availableBooks.length === 0}
-              >
-                {availableBooks.map((book) => (
-                  <MenuItem key={book.id} value={book.id}>
-                    {book.title} by {book.author}
-                  </MenuItem>
-                ))}
-              </Select>
-            </FormControl>
+          <Grid size={{ xs: 12, md: 5 }}>
+            <Autocomplete
+              options={bookOptions}
+              value={selectedBook}
+              onChange={(_, book) => setSelectedBook(book)}
+              inputValue={bookInput}
+              onInputChange={(_, value) => setBookInput(value)}
+              // The server already ranked and filtered the matches
+              filterOptions={(options) => options}
+              getOptionLabel={(book) => `${book.title} by ${book.author}`}
+              isOptionEqualToValue={(option, value) => option.id === value.id}
+              getOptionDisabled={(book) => library !== undefined && book.holder_id !== library.id}
+              loading={bookSearching}
+              noOptionsText={bookQuery ? 'No matching books' : 'Type to search books'}
+              renderInput={(params) => <TextField {...params} label="Book" />}
+            />
           </Grid>
-          <Grid item xs={12} md={5}>
-            <FormControl fullWidth>
-              <InputLabel id="holder-select-label">Holder</InputLabel>
-              <Select
-                labelId="holder-select-label"
-                value={selectedHolderId}
-                label="Holder"
-                onChange={(e) => setSelectedHolderId(Number(e.target.value))}
-                disabled={holdersLoading || !holders}
-              >
-                {Array.isArray(holders)
-                  ? holders.map((holder) => (
-                      <MenuItem key={holder.id} value={holder.id}>
-                        {holder.name} ({holder.email})
-                      </MenuItem>
-                    ))
-                  : null}
-              </Select>
-            </FormControl>
+          <Grid size={{ xs: 12, md: 5 }}>
+            <Autocomplete
+              options={holders.rows}
+              value={selectedHolder}
+              onChange={(_, holder) => setSelectedHolder(holder)}
+              getOptionLabel={(holder) => holder.name}
+              isOptionEqualToValue={(option, value) => option.id === value.id}
+              loading={holdersLoading || holders.isFetchingNextPage}
+              disabled={holdersLoading}
+              slotProps={{
+                listbox: {
+                  // Fetch the next page of holders as the open list nears its end
+                  onScroll: (e: React.UIEvent<HTMLElement>) => {
+                    const list = e.currentTarget;
+                    if (list.scrollTop + list.clientHeight >= list.scrollHeight - ROW_HEIGHT) holders.loadMore();
+                  },
+                },
+              }}
+              renderInput={(params) => <TextField {...params} label="Holder" />}
+            />
           </Grid>
-          <Grid item xs={12} md={2}>
+          <Grid size={{ xs: 12, md: 2 }}>
             <Button
               variant="contained"
               color="primary"
               onClick={handleCheckout}
-              disabled={checkoutMutation.isLoading || booksLoading || holdersLoading}
+              disabled={checkoutMutation.isPending || holdersLoading}
               fullWidth
             >
-              {checkoutMutation.isLoading ? <CircularProgress size={24} /> : 'Checkout'}
+              {checkoutMutation.isPending ? <CircularProgress size={24} /> : 'Checkout'}
             </Button>
           </Grid>
         </Grid>
@@ -194,35 +264,25 @@ const Checkout: React.FC = () => {
         <Typography variant="h6" gutterBottom>
           Checked Out Books
         </Typography>
-        {booksLoading ? (
+        {checkedOut.isLoading ? (
           <CircularProgress />
-        ) : checkedOutBooks.length === 0 ? (
-          <Typography>No books are currently checked out.</Typography>
         ) : (
-          <Grid container spacing={2}>
-            {checkedOutBooks.map((book: any) => (
-              <Grid item xs={12} md={6} key={book.id}>
-                <Paper sx={{ p: 2, display: 'flex', justifyContent: 'space-between', alignItems: 'center' }}>
-                  <Box>
-                    <Typography>
-                      <strong>{book.title}</strong> by {book.author}
-                    </Typography>
-                    <Typography variant="body2" color="text.secondary">
-                      Holder: {book.holder?.name || 'Unknown'}
-                    </Typography>
-                  </Box>
-                  <Button
-                    variant="outlined"
-                    color="secondary"
-                    onClick={() => handleReturn(book.id)}
-                    disabled={returnMutation.isLoading}
-                  >
-                    Return
-                  </Button>
-                </Paper>
-              </Grid>
-            ))}
-          </Grid>
+          <BookList
+            books={checkedOut.rows}
+            loadMore={checkedOut.loadMore}
+            empty="No books are currently checked out."
+            renderDetail={(book) => `Holder: ${book.holder?.name || 'Unknown'}`}
+            renderAction={(book) => (
+              <Button
+                variant="outlined"
+                color="secondary"
+                onClick={() => handleReturn(book.id)}
+                disabled={returnMutation.isPending}
+              >
+                Return
+              </Button>
+            )}
+          />
         )}
       </Paper>
 
@@ -231,25 +291,15 @@ const Checkout: React.FC = () => {
         <Typography variant="h6" gutterBottom>
           Available Books
         </Typography>
-        {booksLoading ? (
+        {available.isLoading ? (
           <CircularProgress />
-        ) : availableBooks.length === 0 ? (
-          <Typography>All books are checked out.</Typography>
         ) : (
-          <Grid container spacing={2}>
-            {availableBooks.map((book: any) => (
-              <Grid item xs={12} md={6} key={book.id}>
-                <Paper sx={{ p: 2 }}>
-                  <Typography>
-                    <strong>{book.title}</strong> by {book.author}
-                  </Typography>
-                  <Typography variant="body2" color="text.secondary">
-                    Published: {book.published_year}
-                  </Typography>
-                </Paper>
-              </Grid>
-            ))}
-          </Grid>
+          <BookList
+            books={available.rows}
+            loadMore={available.loadMore}
+            empty="All books are checked out."
+            renderDetail={(book) => `Published: ${book.published_year}`}
+          />
         )}
       </Paper>
 
@@ -268,9 +318,9 @@ const Checkout: React.FC = () => {
           <Button
             onClick={confirmReturn}
             color="secondary"
-            disabled={returnMutation.isLoading}
+            disabled={returnMutation.isPending}
           >
-            {returnMutation.isLoading ? <CircularProgress size={20} /> : 'Return'}
+            {returnMutation.isPending ? <CircularProgress size={20} /> : 'Return'}
           </Button>
         </DialogActions>
       </Dialog>
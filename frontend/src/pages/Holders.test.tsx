@@ -15,7 +15,7 @@ function renderWithQueryClient(ui: React.ReactElement) {
 }
 
 jest.mock('../services/holders', () => ({
-  fetchHolders: jest.fn().mockResolvedValue([]),
+  fetchHoldersPage: jest.fn().mockResolvedValue({ items: [], nextCursor: null }),
   addHolder: jest.fn(),
   removeHolder: jest.fn(),
 }));
@@ -36,8 +36,8 @@ describe('Holders', () => {
     expect(screen.getAllByText('Add Holder').length).toBeGreaterThan(1);
   });
 
-  it('renders table with no holders found', () => {
+  it('renders table with no holders found', async () => {
     renderWithQueryClient(<Holders />);
-    expect(screen.getByText('No holders found.')).toBeInTheDocument();
+    expect(await screen.findByText('No holders found.')).toBeInTheDocument();
   });
 });
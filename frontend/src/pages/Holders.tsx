@@ -22,14 +22,19 @@ import {
   Alert,
 } from "@mui/material";
 import { Add, Delete } from "@mui/icons-material";
-import { useQuery, useMutation, useQueryClient } from "@tanstack/react-query";
+import { useMutation, useQueryClient } from "@tanstack/react-query";
 import {
-  fetchHolders,
+  fetchHoldersPage,
   addHolder,
   removeHolder,
-  Holder,
   HolderInput,
+  HolderSummary,
 } from "../services/holders";
+import { usePagedList } from "../hooks/usePagedList";
+import { useWindowedRows } from "../hooks/useWindowedRows";
+
+const ROW_HEIGHT = 53;
+const TABLE_HEIGHT = 600;
 
 const Holders: React.FC = () => {
   const queryClient = useQueryClient();
@@ -47,10 +52,16 @@ const Holders: React.FC = () => {
   // Snackbar state
   const [snackbar, setSnackbar] = useState<{ open: boolean; message: string; severity: "success" | "error" }>({ open: false, message: "", severity: "success" });
 
-  // Fetch holders
-  const { data: holders, isLoading, isError } = useQuery({
-    queryKey: ["holders"],
-    queryFn: fetchHolders,
+  // Fetch holders (with their book counts) a page at a time, as the table scrolls
+  const { rows: holders, isLoading, isError, loadMore } = usePagedList<HolderSummary>(
+    ["holders", "summary"],
+    fetchHoldersPage,
+  );
+  const { start, end, paddingTop, paddingBottom, containerProps } = useWindowedRows({
+    count: holders.length,
+    rowHeight: ROW_HEIGHT,
+    height: TABLE_HEIGHT,
+    onEndReached: loadMore,
   });
 
   // Add holder mutation
@@ -77,7 +88,7 @@ const Holders: React.FC = () => {
     onSuccess: () => {
       setSnackbar({ open: true, message: "Holder removed", severity: "success" });
       setRemoveId(null);
-      queryClient.invalidateQueries("holders");
+      queryClient.invalidateQueries({ queryKey: ["holders"] });
     },
     onError: () => {
       setSnackbar({ open: true, message: "Failed to remove holder", severity: "error" });
@@ -121,19 +132,22 @@ const Holders: React.FC = () => {
       ) : isError ? (
         <Alert severity="error">Failed to load holders.</Alert>
       ) : (
-        <TableContainer component={Paper}>
-          <Table size="small" aria-label="holders table">
+        <TableContainer component={Paper} {...containerProps}>
+          <Table size="small" stickyHeader aria-label="holders table">
             <TableHead>
               <TableRow>
                 <TableCell>Name</TableCell>
+                <TableCell align="right">Books</TableCell>
                 <TableCell align="right">Actions</TableCell>
               </TableRow>
             </TableHead>
             <TableBody>
-              {Array.isArray(holders) && holders.length > 0 ? (
-                holders.map((holder) => (
-                  <TableRow key={holder.id}>
+              {paddingTop > 0 && <TableRow sx={{ height: paddingTop }} />}
+              {holders.length > 0 ? (
+                holders.slice(start, end).map((holder) => (
+                  <TableRow key={holder.id} sx={{ height: ROW_HEIGHT }}>
                     <TableCell>{holder.name}</TableCell>
+                    <TableCell align="right">{holder.book_count}</TableCell>
                     <TableCell align="right">
                       <IconButton
                         aria-label="remove"
@@ -148,11 +162,12 @@ const Holders: React.FC = () => {
                 ))
               ) : (
                 <TableRow>
-                  <TableCell colSpan={2} align="center">
+                  <TableCell colSpan={3} align="center">
                     No holders found.
                   </TableCell>
                 </TableRow>
               )}
+              {paddingBottom > 0 && <TableRow sx={{ height: paddingBottom }} />}
             </TableBody>
           </Table>
         </TableContainer>
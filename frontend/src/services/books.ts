@@ -1,5 +1,6 @@
 // frontend/src/services/books.ts
 import axios from 'axios';
+import { PAGE_SIZE, Page, toPage } from './pagination';
 
 const API_BASE = 'http://localhost:5000/api/books/';
 
@@ -8,18 +9,49 @@ export interface Book {
   title: string;
   author: string;
   published_year: number;
-  // Add more fields as needed
+  holder_id?: number;
+  holder?: { id: number; name: string };
 }
 
 export interface BookInput {
   title: string;
   author: string;
   published_year: number;
+  holder_id?: number;
 }
 
-export const fetchBooks = async (): Promise<Book[]> => {
-  const res = await axios.get(API_BASE);
-  return res.data;
+const LIST_FIELDS = 'id,title,author,published_year,holder_id';
+
+export interface BookFilters {
+  available?: boolean;
+  holderId?: number;
+  withHolder?: boolean;
+}
+
+export const fetchBooksPage = async (
+  cursor: string | null = null,
+  filters: BookFilters = {},
+): Promise<Page<Book>> => {
+  const res = await axios.get(API_BASE, {
+    params: {
+      limit: PAGE_SIZE,
+      cursor: cursor ?? undefined,
+      fields: filters.withHolder ? `${LIST_FIELDS},holder` : LIST_FIELDS,
+      available: filters.available === undefined ? undefined : String(filters.available),
+      holder_id: filters.holderId,
+    },
+  });
+  return toPage(res);
+};
+
+const SEARCH_LIMIT = 20;
+
+// Ranked prefix search, so pickers never need the whole catalog.
+export const searchBooks = async (query: string): Promise<Book[]> => {
+  const res = await axios.get(`${API_BASE}search/`, {
+    params: { q: query, limit: SEARCH_LIMIT, fields: LIST_FIELDS },
+  });
+  return res.data.results;
 };
 
 export const addBook = async (data: BookInput): Promise<Book> => {
@@ -31,12 +63,35 @@ export const removeBook = async (id: number): Promise<void> => {
   await axios.delete(`${API_BASE}${id}/`);
 };
 
+const TASKS_BASE = '/api/tasks/';
+const TASK_POLL_SECONDS = 25;
+const TASK_POLL_ATTEMPTS = 5;
+
+// Checkout/return respond with 202 and a task id; long-poll the task
+// resource until the worker has finished and surface its result.
+export const waitForTask = async (taskId: string): Promise<any> => {
+  for (let attempt = 0; attempt < TASK_POLL_ATTEMPTS; attempt++) {
+    const res = await axios.get(`${TASKS_BASE}${taskId}/`, { params: { wait: TASK_POLL_SECONDS } });
+    if (res.data.state === 'SUCCESS') {
+      const result = res.data.result;
+      if (result?.status !== 'success') {
+        throw Object.assign(new Error(result?.message), { response: { data: { error: result?.message } } });
+      }
+      return result;
+    }
+    if (res.data.state === 'FAILURE') {
+      throw Object.assign(new Error(res.data.error), { response: { data: { error: res.data.error } } });
+    }
+  }
+  throw new Error(`Task ${taskId} did not finish in time`);
+};
+
 export const checkoutBook = async (bookId: number, holderId: number): Promise<any> => {
   const res = await axios.post(`/api/books/${bookId}/checkout/`, { holder_id: holderId });
-  return res.data;
+  return res.status === 202 ? waitForTask(res.data.task_id) : res.data;
 };
 
 export const returnBook = async (bookId: number): Promise<any> => {
   const res = await axios.post(`/api/books/${bookId}/return/`);
-  return res.data;
+  return res.status === 202 ? waitForTask(res.data.task_id) : res.data;
 };
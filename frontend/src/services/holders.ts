@@ -1,5 +1,6 @@
 // Holder service for API integration
 import axios from "axios";
+import { PAGE_SIZE, Page, toPage } from "./pagination";
 
 const API_BASE = 'http://localhost:5000/api/holders/';
 
@@ -13,11 +14,23 @@ export interface HolderInput {
   name: string;
 }
 
-export const fetchHolders = async (): Promise<Holder[]> => {
-  const res = await axios.get(API_BASE);
+export interface HolderSummary extends Holder {
+  book_count: number;
+}
+
+export const fetchHolders = async (name?: string): Promise<Holder[]> => {
+  const res = await axios.get(API_BASE, { params: { name, fields: 'id,name' } });
   return res.data;
 };
 
+// Holders with their book counts, one keyset page at a time.
+export const fetchHoldersPage = async (cursor: string | null = null): Promise<Page<HolderSummary>> => {
+  const res = await axios.get(`${API_BASE}summary/`, {
+    params: { limit: PAGE_SIZE, cursor: cursor ?? undefined },
+  });
+  return toPage(res);
+};
+
 export const addHolder = async (data: HolderInput): Promise<Holder> => {
   const res = await axios.post(API_BASE, data);
   return res.data;
@@ -0,0 +1,17 @@
+// Keyset pagination shared by the list services
+import { AxiosResponse } from 'axios';
+
+export const PAGE_SIZE = 100;
+
+// One page of a list endpoint; `nextCursor` is null on the last page.
+export interface Page<T> {
+  items: T[];
+  nextCursor: string | null;
+}
+
+// The list body stays a plain array; the cursor for the next page is in the
+// X-Next-Cursor header.
+export const toPage = <T>(res: AxiosResponse<T[]>): Page<T> => ({
+  items: res.data,
+  nextCursor: res.headers['x-next-cursor'] ?? null,
+});
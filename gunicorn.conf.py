@@ -0,0 +1,30 @@
+# Picked up automatically by gunicorn from the working directory.
+import gc
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+# Threaded workers: a long-lived /api/events/ stream holds a thread, not a
+# whole worker, so the other requests keep being served. Each worker serves at
+# most EVENTS_MAX_STREAMS (default 8) streams and answers 503 past that, which
+# leaves threads - EVENTS_MAX_STREAMS threads for the JSON API.
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.environ.get("GUNICORN_THREADS", "32"))
+# Load the app once in the master and fork workers from it: faster worker
+# boots and shared (copy-on-write) memory for imported modules.
+preload_app = os.environ.get("GUNICORN_PRELOAD", "false").lower() == "true"
+
+
+def when_ready(server):
+    if preload_app:
+        from app import preload_modules
+        preload_modules()
+        # Move everything loaded so far out of the GC's reach so collections in
+        # the workers don't write to (and un-share) the master's pages.
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    # Workers must not share the pooled connections of the master process
+    from app.engine import reset_after_fork
+    reset_after_fork()
@@ -0,0 +1,53 @@
+"""add book search index
+
+Revision ID: 3f9c2e71d4a8
+Revises: 6bd282b3b806
+Create Date: 2026-10-18 11:02:17.840316
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9c2e71d4a8'
+down_revision = '6bd282b3b806'
+branch_labels = None
+depends_on = None
+
+# Must stay identical to app.models.BOOK_SEARCH_DOCUMENT for the planner to use the index
+BOOK_SEARCH_DOCUMENT = "to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(author, ''))"
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute(f"CREATE INDEX ix_books_search ON books USING GIN ({BOOK_SEARCH_DOCUMENT})")
+    elif dialect == 'sqlite':
+        op.execute("CREATE VIRTUAL TABLE books_fts USING fts5(title, author, content='books', content_rowid='id')")
+        op.execute(
+            "CREATE TRIGGER books_fts_ai AFTER INSERT ON books BEGIN "
+            "INSERT INTO books_fts(rowid, title, author) VALUES (new.id, new.title, new.author); END"
+        )
+        op.execute(
+            "CREATE TRIGGER books_fts_ad AFTER DELETE ON books BEGIN "
+            "INSERT INTO books_fts(books_fts, rowid, title, author) "
+            "VALUES ('delete', old.id, old.title, old.author); END"
+        )
+        op.execute(
+            "CREATE TRIGGER books_fts_au AFTER UPDATE OF title, author ON books BEGIN "
+            "INSERT INTO books_fts(books_fts, rowid, title, author) "
+            "VALUES ('delete', old.id, old.title, old.author); "
+            "INSERT INTO books_fts(rowid, title, author) VALUES (new.id, new.title, new.author); END"
+        )
+        # Index the books that already exist
+        op.execute("INSERT INTO books_fts(books_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_books_search")
+    elif dialect == 'sqlite':
+        for trigger in ('books_fts_au', 'books_fts_ad', 'books_fts_ai'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS books_fts")
@@ -0,0 +1,27 @@
+"""add book pagination indexes
+
+Revision ID: 6bd282b3b806
+Revises: a8a0df1f149a
+Create Date: 2026-10-18 09:12:41.503127
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '6bd282b3b806'
+down_revision = 'a8a0df1f149a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('books', schema=None) as batch_op:
+        batch_op.create_index('ix_books_holder_id_id', ['holder_id', 'id'], unique=False)
+        batch_op.create_index('ix_books_author_id', ['author', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('books', schema=None) as batch_op:
+        batch_op.drop_index('ix_books_author_id')
+        batch_op.drop_index('ix_books_holder_id_id')
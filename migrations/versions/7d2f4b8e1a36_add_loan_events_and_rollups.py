@@ -0,0 +1,73 @@
+"""add loan events and rollups
+
+Revision ID: 7d2f4b8e1a36
+Revises: e5b7a2c90f13
+Create Date: 2026-10-18 17:05:31.204718
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d2f4b8e1a36'
+down_revision = 'e5b7a2c90f13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'loan_events',
+        sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), nullable=False),
+        sa.Column('book_id', sa.Integer(), nullable=False),
+        sa.Column('holder_id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=16), nullable=False),
+        sa.Column('occurred_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_loan_events_occurred_at', 'loan_events', ['occurred_at'], postgresql_using='brin')
+    op.create_table(
+        'loan_daily',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('checkouts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('returns', sa.Integer(), server_default='0', nullable=False),
+        sa.PrimaryKeyConstraint('day')
+    )
+    op.create_table(
+        'book_loan_totals',
+        sa.Column('book_id', sa.Integer(), nullable=False),
+        sa.Column('checkouts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('last_checkout_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('book_id')
+    )
+    op.create_index('ix_book_loan_totals_checkouts', 'book_loan_totals', ['checkouts', 'book_id'])
+    op.create_table(
+        'holder_loan_totals',
+        sa.Column('holder_id', sa.Integer(), nullable=False),
+        sa.Column('checkouts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('returns', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('last_activity_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('holder_id')
+    )
+    op.create_index('ix_holder_loan_totals_checkouts', 'holder_loan_totals', ['checkouts', 'holder_id'])
+    op.create_table(
+        'loan_rollup_state',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('last_event_id', sa.BigInteger(), server_default='0', nullable=False),
+        sa.Column('checkouts', sa.BigInteger(), server_default='0', nullable=False),
+        sa.Column('returns', sa.BigInteger(), server_default='0', nullable=False),
+        sa.Column('refreshed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('loan_rollup_state')
+    op.drop_index('ix_holder_loan_totals_checkouts', table_name='holder_loan_totals')
+    op.drop_table('holder_loan_totals')
+    op.drop_index('ix_book_loan_totals_checkouts', table_name='book_loan_totals')
+    op.drop_table('book_loan_totals')
+    op.drop_table('loan_daily')
+    op.drop_index('ix_loan_events_occurred_at', table_name='loan_events')
+    op.drop_table('loan_events')
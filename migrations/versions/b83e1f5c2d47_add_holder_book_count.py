@@ -0,0 +1,35 @@
+"""add holder book_count
+
+Revision ID: b83e1f5c2d47
+Revises: 7d2f4b8e1a36
+Create Date: 2026-10-18 18:12:09.553120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b83e1f5c2d47'
+down_revision = '7d2f4b8e1a36'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('holders', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('book_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill with one grouped pass over books (served by ix_books_holder_id_id).
+    # The Library's counter is never written (its count is derived on read),
+    # so it stays 0 like every later write leaves it
+    op.execute(
+        "UPDATE holders SET book_count = counts.n "
+        "FROM (SELECT holder_id, count(*) AS n FROM books GROUP BY holder_id) AS counts "
+        "WHERE holders.id = counts.holder_id AND holders.name <> 'Library'"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('holders', schema=None) as batch_op:
+        batch_op.drop_column('book_count')
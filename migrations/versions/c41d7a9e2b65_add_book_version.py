@@ -0,0 +1,26 @@
+"""add book version
+
+Revision ID: c41d7a9e2b65
+Revises: 3f9c2e71d4a8
+Create Date: 2026-10-18 12:20:53.117904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41d7a9e2b65'
+down_revision = '3f9c2e71d4a8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('books', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('books', schema=None) as batch_op:
+        batch_op.drop_column('version')
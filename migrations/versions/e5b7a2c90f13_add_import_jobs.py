@@ -0,0 +1,40 @@
+"""add import jobs
+
+Revision ID: e5b7a2c90f13
+Revises: c41d7a9e2b65
+Create Date: 2026-10-18 15:40:12.482913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b7a2c90f13'
+down_revision = 'c41d7a9e2b65'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'import_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('filename', sa.String(), nullable=False),
+        sa.Column('path', sa.String(), nullable=False),
+        sa.Column('format', sa.String(length=16), nullable=False),
+        sa.Column('status', sa.String(length=16), server_default='queued', nullable=False),
+        sa.Column('rows_processed', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('rows_imported', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('rows_failed', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('errors', sa.JSON(), nullable=False),
+        sa.Column('message', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('import_jobs')
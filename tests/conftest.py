@@ -1,10 +1,24 @@
 import pytest
 import os
+from contextlib import contextmanager
 from app.config import TestConfig
 from app import create_app
 from app.models import db
 
 
+@pytest.fixture(autouse=True)
+def fake_redis(monkeypatch):
+    # Application Redis (change counters, caches) runs against fakeredis when available
+    try:
+        import fakeredis
+    except ImportError:
+        yield None
+        return
+    client = fakeredis.FakeRedis()
+    monkeypatch.setattr("app.redis_client._client", client)
+    yield client
+
+
 @pytest.fixture
 def client(request):
     app = create_app(TestConfig)
@@ -103,3 +117,17 @@ def celery_eager(monkeypatch):
     monkeypatch.setenv("CELERY_TASK_ALWAYS_EAGER", "True")
     monkeypatch.setenv("CELERY_TASK_EAGER_PROPAGATES", "True")
     yield
+
+
+@pytest.fixture
+def max_queries():
+    """``with max_queries(n): ...`` fails if the block runs more than ``n`` SQL statements."""
+    from app.instrumentation import collect_queries
+
+    @contextmanager
+    def check(budget):
+        with collect_queries() as stats:
+            yield stats
+        statements = '\n'.join(f'{n}x {s}' for s, n in stats.repeated(1))
+        assert stats.count <= budget, f'{stats.count} queries (budget {budget}):\n{statements}'
+    return check
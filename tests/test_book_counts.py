@@ -0,0 +1,110 @@
+import json
+
+import pytest
+from sqlalchemy import update
+
+from app.book_counts import library_book_count, reconcile_book_counts
+from app.models import Book, Holder
+from app.tasks.bulk import checkout_books_bulk, return_books_bulk
+from app.tasks.checkout import checkout_book
+from app.tasks.counts import reconcile_holder_book_counts
+from app.tasks.return_book import return_book_task
+
+
+@pytest.fixture(autouse=True)
+def patch_task_db(monkeypatch, db_session):
+    from app.tasks import bulk, checkout, counts, return_book
+    for module in (bulk, checkout, counts, return_book):
+        monkeypatch.setattr(module, "Session", lambda: db_session)
+    yield
+
+
+def counts(db_session):
+    db_session.expire_all()
+    stored = {h.name: h.book_count for h in db_session.query(Holder)}
+    return dict(stored, Library=library_book_count(db_session))
+
+
+def holder_ids(db_session):
+    return {h.name: h.id for h in db_session.query(Holder)}
+
+
+def book_ids(db_session):
+    return [b.id for b in db_session.query(Book).order_by(Book.id)]
+
+
+def test_sample_data_is_counted(db_session):
+    assert counts(db_session) == {"Library": 3, "Alice": 0, "Bob": 0}
+
+
+def test_crud_routes_keep_counts(client, db_session):
+    holders = holder_ids(db_session)
+    book = {"title": "New", "author": "A. Author", "published_year": 2001, "holder_id": holders["Alice"]}
+    created = client.post("/api/books/", data=json.dumps(book), content_type="application/json").get_json()
+    assert counts(db_session) == {"Library": 3, "Alice": 1, "Bob": 0}
+
+    client.put(
+        f"/api/books/{created['id']}/", data=json.dumps(dict(book, holder_id=holders["Bob"])),
+        content_type="application/json",
+    )
+    assert counts(db_session) == {"Library": 3, "Alice": 0, "Bob": 1}
+
+    client.patch(f"/api/books/{created['id']}/", data=json.dumps({"title": "Renamed"}), content_type="application/json")
+    assert counts(db_session) == {"Library": 3, "Alice": 0, "Bob": 1}
+
+    client.delete(f"/api/books/{created['id']}/")
+    assert counts(db_session) == {"Library": 3, "Alice": 0, "Bob": 0}
+
+
+def test_tasks_keep_counts(db_session, celery_eager):
+    holders, books = holder_ids(db_session), book_ids(db_session)
+    checkout_book.apply(args=(books[0], holders["Alice"])).get()
+    checkout_book.apply(args=(books[0], holders["Bob"])).get()  # conflict: no change
+    assert counts(db_session) == {"Library": 2, "Alice": 1, "Bob": 0}
+
+    checkout_books_bulk.apply(args=(books, holders["Alice"], db_session)).get()
+    assert counts(db_session) == {"Library": 0, "Alice": 3, "Bob": 0}
+
+    return_book_task.apply(args=(books[0],)).get()
+    return_books_bulk.apply(args=(books, db_session)).get()
+    assert counts(db_session) == {"Library": 3, "Alice": 0, "Bob": 0}
+    assert reconcile_book_counts(db_session) == 0
+
+
+def test_reconcile_fixes_drift(db_session):
+    holders = holder_ids(db_session)
+    # A write that bypassed the counter
+    db_session.add(Book(title="Raw", author="A. Author", published_year=2001, holder_id=holders["Bob"]))
+    db_session.execute(update(Holder).where(Holder.name == "Alice").values(book_count=7))
+    db_session.commit()
+
+    assert reconcile_holder_book_counts.apply().get() == 2
+    assert counts(db_session) == {"Library": 3, "Alice": 0, "Bob": 1}
+
+
+def test_moves_never_write_the_library_row(db_session, celery_eager):
+    holders, books = holder_ids(db_session), book_ids(db_session)
+    stored = db_session.get(Holder, holders["Library"]).book_count
+    checkout_book.apply(args=(books[0], holders["Alice"])).get()
+    checkout_books_bulk.apply(args=(books, holders["Bob"], db_session)).get()
+    return_book_task.apply(args=(books[0],)).get()
+    db_session.expire_all()
+    assert db_session.get(Holder, holders["Library"]).book_count == stored
+
+
+def test_holders_summary(client, db_session):
+    response = client.get("/api/holders/summary/?limit=2")
+    assert response.status_code == 200
+    holders = holder_ids(db_session)
+    assert response.get_json() == [
+        {"id": holders["Library"], "name": "Library", "book_count": 3},
+        {"id": holders["Alice"], "name": "Alice", "book_count": 0},
+    ]
+    next_page = client.get(f"/api/holders/summary/?limit=2&cursor={response.headers['X-Next-Cursor']}")
+    assert next_page.get_json() == [{"id": holders["Bob"], "name": "Bob", "book_count": 0}]
+    assert "X-Next-Cursor" not in next_page.headers
+
+
+def test_holder_responses_do_not_expose_the_counter(client):
+    holder = client.get("/api/holders/").get_json()[0]
+    assert "book_count" not in holder
@@ -0,0 +1,82 @@
+import json
+import pytest
+from app.tasks.bulk import checkout_books_bulk, return_books_bulk
+from app.models import Book, Holder, LoanEvent
+
+
+@pytest.fixture(autouse=True)
+def patch_bulk_db(monkeypatch, db_session):
+    import app.tasks.bulk as bulk_module
+    monkeypatch.setattr(bulk_module, "Session", lambda: db_session)
+    monkeypatch.setattr(bulk_module, "BULK_CHUNK_SIZE", 2)
+    yield
+
+
+def test_checkout_books_bulk(db_session, celery_eager):
+    alice = db_session.query(Holder).filter_by(name="Alice").first()
+    book_ids = [b.id for b in db_session.query(Book).order_by(Book.id)]
+    result = checkout_books_bulk.apply(args=(book_ids + [999], alice.id, db_session)).get()
+    assert result["status"] == "success"
+    assert result["updated"] == len(book_ids)
+    assert [r["book_id"] for r in result["results"]] == book_ids + [999]
+    assert result["results"][-1] == {"book_id": 999, "status": "error", "message": "Book 999 not found"}
+    db_session.expire_all()
+    assert all(b.holder_id == alice.id for b in db_session.query(Book))
+
+
+def test_checkout_books_bulk_invalid_holder(db_session, celery_eager):
+    book_ids = [b.id for b in db_session.query(Book)]
+    result = checkout_books_bulk.apply(args=(book_ids, 999, db_session)).get()
+    assert result["status"] == "error"
+    assert "not found" in result["message"]
+
+
+def test_return_books_bulk(db_session, celery_eager):
+    alice = db_session.query(Holder).filter_by(name="Alice").first()
+    library = db_session.query(Holder).filter_by(name="Library").first()
+    book_ids = [b.id for b in db_session.query(Book)]
+    checkout_books_bulk.apply(args=(book_ids, alice.id, db_session)).get()
+    result = return_books_bulk.apply(args=(book_ids, db_session)).get()
+    assert result["status"] == "success"
+    assert result["holder_id"] == library.id
+    db_session.expire_all()
+    assert all(b.holder_id == library.id for b in db_session.query(Book))
+
+
+def test_checkout_books_bulk_endpoint_validates_ids(client):
+    response = client.post(
+        "/api/books/checkout/bulk/",
+        data=json.dumps({"holder_id": 1, "book_ids": "1,2"}),
+        content_type="application/json"
+    )
+    assert response.status_code == 400
+    assert "book_ids" in response.get_json()["error"]
+
+
+def test_checkout_books_bulk_skips_books_held_by_others(db_session, celery_eager):
+    alice = db_session.query(Holder).filter_by(name="Alice").first()
+    bob = db_session.query(Holder).filter_by(name="Bob").first()
+    book_ids = [b.id for b in db_session.query(Book).order_by(Book.id)]
+    checkout_books_bulk.apply(args=(book_ids[:1], alice.id, db_session)).get()
+    result = checkout_books_bulk.apply(args=(book_ids, bob.id, db_session)).get()
+    assert result["updated"] == len(book_ids) - 1
+    assert result["results"][0]["status"] == "conflict"
+    assert result["results"][0]["holder_id"] == alice.id
+    db_session.expire_all()
+    books = {b.id: b for b in db_session.query(Book)}
+    assert books[book_ids[0]].holder_id == alice.id
+    # Bulk moves bump the version like single-book checkouts do
+    assert books[book_ids[0]].version == 2
+    assert all(books[i].holder_id == bob.id and books[i].version == 2 for i in book_ids[1:])
+
+
+def test_bulk_moves_commit_each_chunk_in_id_order(db_session, celery_eager, monkeypatch):
+    alice = db_session.query(Holder).filter_by(name="Alice").first()
+    book_ids = [b.id for b in db_session.query(Book).order_by(Book.id.desc())]
+    commits = []
+    commit = db_session.commit
+    monkeypatch.setattr(db_session, "commit", lambda: commits.append(1) or commit())
+    result = checkout_books_bulk.apply(args=(book_ids, alice.id, db_session)).get()
+    assert [r["book_id"] for r in result["results"]] == book_ids
+    assert len(commits) == 2  # three books in chunks of two
+    assert [e.book_id for e in db_session.query(LoanEvent).order_by(LoanEvent.id)] == sorted(book_ids)
@@ -0,0 +1,89 @@
+import threading
+import time
+
+import pytest
+from flask import Flask, jsonify
+
+
+def test_books_cache_hit_and_invalidation(client):
+    first = client.get("/api/books/")
+    assert first.headers["X-Cache"] == "MISS"
+    second = client.get("/api/books/")
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.data == first.data
+
+    book_id = first.get_json()[0]["id"]
+    client.patch(f"/api/books/{book_id}/", json={"title": "Renamed"})
+    third = client.get("/api/books/")
+    assert third.headers["X-Cache"] == "MISS"
+    assert any(b["title"] == "Renamed" for b in third.get_json())
+
+
+def test_cache_replays_pagination_headers(client):
+    first = client.get("/api/holders/?limit=1")
+    second = client.get("/api/holders/?limit=1")
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.headers["X-Next-Cursor"] == first.headers["X-Next-Cursor"]
+
+
+def test_cache_stats(client):
+    from app.cache import cache_stats
+    client.get("/api/holders/")
+    client.get("/api/holders/")
+    stats = cache_stats()
+    assert stats["misses"] >= 1
+    assert stats["hits"] >= 1
+
+
+def test_single_flight(fake_redis):
+    if fake_redis is None:
+        pytest.skip("fakeredis not installed")
+    from app.cache import cached
+
+    app = Flask(__name__)
+    app.config.update(CACHE_ENABLED=True, CACHE_TTL=60, CACHE_LOCK_TIMEOUT=5)
+    calls = []
+
+    @app.route("/slow")
+    @cached("things")
+    def slow():
+        calls.append(1)
+        time.sleep(0.2)
+        return jsonify({"value": 42})
+
+    results = []
+
+    def fetch():
+        results.append(app.test_client().get("/slow"))
+
+    threads = [threading.Thread(target=fetch) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert all(r.get_json() == {"value": 42} for r in results)
+
+
+def test_lock_released_when_view_raises(fake_redis):
+    if fake_redis is None:
+        pytest.skip("fakeredis not installed")
+    from app.cache import cached
+
+    app = Flask(__name__)
+    app.config.update(CACHE_ENABLED=True, CACHE_TTL=60, CACHE_LOCK_TIMEOUT=5)
+    calls = []
+
+    @app.route("/flaky")
+    @cached("things")
+    def flaky():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("database went away")
+        return jsonify({"value": 42})
+
+    assert app.test_client().get("/flaky").status_code == 500
+    assert not fake_redis.keys("cache-lock:*")
+    started = time.monotonic()
+    assert app.test_client().get("/flaky").get_json() == {"value": 42}
+    assert time.monotonic() - started < 1
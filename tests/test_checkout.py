@@ -32,7 +32,7 @@ def test_checkout_book_endpoint_integration(client, db_session, patch_checkout_d
     # Call endpoint
     print(f"DEBUG: POST /api/books/{book.id}/checkout/ with holder_id={alice.id}")
     response = client.post(
-        f"/api/books/{book.id}/checkout/",
+        f"/api/books/{book.id}/checkout/?wait=10",
         data=json.dumps({"holder_id": alice.id}),
         content_type="application/json"
     )
@@ -42,6 +42,56 @@ def test_checkout_book_endpoint_integration(client, db_session, patch_checkout_d
     data = response.get_json()
     assert data["status"] == "success"
 
+def test_checkout_book_endpoint_returns_task(client, db_session):
+    book = db_session.query(Book).filter_by(title="Book 1").first()
+    alice = db_session.query(Holder).filter_by(name="Alice").first()
+    response = client.post(
+        f"/api/books/{book.id}/checkout/",
+        data=json.dumps({"holder_id": alice.id}),
+        content_type="application/json"
+    )
+    assert response.status_code == 202
+    data = response.get_json()
+    assert data["task_id"]
+    assert response.headers["Location"].endswith(f"/api/tasks/{data['task_id']}/")
+
+def test_accepted_task_does_not_query_the_backend(client, db_session, monkeypatch):
+    class PublishedResult:
+        id = "fresh-task"
+
+        @property
+        def state(self):
+            raise AssertionError("result backend queried for a task just published")
+
+    monkeypatch.setattr(checkout_book, "apply_async", lambda *args, **kwargs: PublishedResult())
+    book = db_session.query(Book).filter_by(title="Book 1").first()
+    alice = db_session.query(Holder).filter_by(name="Alice").first()
+    response = client.post(f"/api/books/{book.id}/checkout/", json={"holder_id": alice.id})
+    assert response.status_code == 202
+    assert response.get_json() == {"task_id": "fresh-task", "state": "PENDING"}
+
+def test_task_status_endpoint(client, monkeypatch):
+    class FakeResult:
+        id = "abc123"
+        state = "SUCCESS"
+        result = {"status": "success", "book_id": 1, "holder_id": 2}
+
+        def ready(self):
+            return True
+
+        def successful(self):
+            return True
+
+        def failed(self):
+            return False
+
+    monkeypatch.setattr(celery, "AsyncResult", lambda task_id: FakeResult())
+    response = client.get("/api/tasks/abc123/?wait=5")
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["state"] == "SUCCESS"
+    assert data["result"]["status"] == "success"
+
 def test_checkout_success(db_session, celery_eager):
     book = db_session.query(Book).filter_by(title="Book 1").first()
     alice = db_session.query(Holder).filter_by(name="Alice").first()
@@ -88,3 +138,74 @@ def test_checkout_book_celery_result(db_session):
     assert result.successful()
     assert result.result is not None
     print(f"Celery task result: {result.result}")
+
+def test_checkout_conflict_when_held_by_someone_else(db_session, celery_eager):
+    book = db_session.query(Book).filter_by(title="Book 1").first()
+    alice = db_session.query(Holder).filter_by(name="Alice").first()
+    bob = db_session.query(Holder).filter_by(name="Bob").first()
+    checkout_book.apply(args=(book.id, alice.id, db_session)).get()
+    result = checkout_book.apply(args=(book.id, bob.id, db_session)).get()
+    assert result["status"] == "conflict"
+    assert result["holder_id"] == alice.id
+    db_session.expire_all()
+    assert db_session.get(Book, book.id).holder_id == alice.id
+
+def test_checkout_bumps_book_version(db_session, celery_eager):
+    book = db_session.query(Book).filter_by(title="Book 1").first()
+    alice = db_session.query(Holder).filter_by(name="Alice").first()
+    assert book.version == 1
+    checkout_book.apply(args=(book.id, alice.id, db_session)).get()
+    # A repeated checkout by the same holder is a no-op
+    checkout_book.apply(args=(book.id, alice.id, db_session)).get()
+    db_session.expire_all()
+    assert db_session.get(Book, book.id).version == 2
+
+def test_checkout_retries_lost_race(db_session, celery_eager, monkeypatch):
+    from sqlalchemy.orm.exc import StaleDataError
+    from app.tasks import dal
+    book = db_session.query(Book).filter_by(title="Book 1").first()
+    alice = db_session.query(Holder).filter_by(name="Alice").first()
+    real_checkout = dal.checkout
+    calls = []
+
+    def lose_first_race(*args):
+        calls.append(args)
+        if len(calls) == 1:
+            raise StaleDataError("concurrent update")
+        return real_checkout(*args)
+
+    monkeypatch.setattr(dal, "checkout", lose_first_race)
+    result = checkout_book.apply(args=(book.id, alice.id, db_session)).get()
+    assert result["status"] == "success"
+    assert len(calls) == 2
+
+def test_checkout_gives_up_after_bounded_retries(db_session, celery_eager, monkeypatch):
+    from sqlalchemy.orm.exc import StaleDataError
+    from app.tasks import concurrency, dal
+    book = db_session.query(Book).filter_by(title="Book 1").first()
+    alice = db_session.query(Holder).filter_by(name="Alice").first()
+    calls = []
+
+    def always_lose(*args):
+        calls.append(args)
+        raise StaleDataError("concurrent update")
+
+    monkeypatch.setattr(dal, "checkout", always_lose)
+    monkeypatch.setattr(concurrency, "CAS_BACKOFF_BASE", 0)
+    result = checkout_book.apply(args=(book.id, alice.id, db_session)).get()
+    assert result["status"] == "conflict"
+    assert "concurrently" in result["message"]
+    assert len(calls) == concurrency.CAS_MAX_ATTEMPTS
+
+def test_checkout_conflict_returns_409(client, db_session):
+    book = db_session.query(Book).filter_by(title="Book 1").first()
+    alice = db_session.query(Holder).filter_by(name="Alice").first()
+    bob = db_session.query(Holder).filter_by(name="Bob").first()
+    checkout_book.apply(args=(book.id, alice.id, db_session)).get()
+    response = client.post(
+        f"/api/books/{book.id}/checkout/?wait=10",
+        data=json.dumps({"holder_id": bob.id}),
+        content_type="application/json"
+    )
+    assert response.status_code == 409
+    assert response.get_json()["status"] == "conflict"
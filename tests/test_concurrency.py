@@ -0,0 +1,148 @@
+"""Checkout/return under parallel workers, each with its own connection."""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.config import TestConfig
+from app.models import Book, Holder
+from app.tasks.checkout import checkout_book
+from app.tasks.return_book import return_book_task
+
+logger = logging.getLogger(__name__)
+
+WORKERS = 8
+ROUNDS = 25
+
+
+@pytest.fixture
+def worker_sessions(db_session):
+    engine = create_engine(TestConfig.TEST_DATABASE_URL, pool_size=WORKERS, max_overflow=0)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def readers(db_session):
+    holders = [Holder(name=f"Reader {i}") for i in range(WORKERS)]
+    db_session.add_all(holders)
+    db_session.commit()
+    return [h.id for h in holders]
+
+
+def _run(task, *args, sessions):
+    session = sessions()
+    try:
+        return task.apply(args=(*args, session)).get()
+    finally:
+        session.close()
+
+
+def test_concurrent_checkouts_have_one_winner(db_session, worker_sessions, readers, celery_eager):
+    book = db_session.query(Book).filter_by(title="Book 1").first()
+    start = threading.Barrier(WORKERS)
+
+    def checkout(holder_id):
+        start.wait()
+        return _run(checkout_book, book.id, holder_id, sessions=worker_sessions)
+
+    with ThreadPoolExecutor(WORKERS) as pool:
+        results = list(pool.map(checkout, readers))
+
+    winners = [r for r in results if r["status"] == "success"]
+    assert len(winners) == 1
+    assert all(r["status"] == "conflict" for r in results if r not in winners)
+    db_session.expire_all()
+    book = db_session.get(Book, book.id)
+    assert book.holder_id == winners[0]["holder_id"]
+    assert book.version == 2
+
+
+def test_hot_book_checkout_return_churn(db_session, worker_sessions, readers, celery_eager):
+    book_id = db_session.query(Book).filter_by(title="Book 1").first().id
+    owner_lock = threading.Lock()
+    # The current loan: held from its checkout's commit until its return commits
+    owner = [None]
+    violations = []
+    transitions = []
+    statuses = []
+
+    def churn(holder_id):
+        done = 0
+        for _ in range(ROUNDS):
+            result = _run(checkout_book, book_id, holder_id, sessions=worker_sessions)
+            statuses.append(result["status"])
+            if result["status"] != "success":
+                continue
+            with owner_lock:
+                loan = owner[0]
+                if loan is None or loan["holder"] != holder_id:
+                    if loan is not None:
+                        if loan["returning"]:
+                            # Only sound if that return commits; checked when it finishes
+                            loan["overtaken"] = True
+                        else:
+                            violations.append((loan["holder"], holder_id))
+                    loan = owner[0] = {"holder": holder_id, "returning": False, "overtaken": False}
+                    transitions.append(1)
+                loan["returning"] = True
+            result = _run(return_book_task, book_id, sessions=worker_sessions)
+            statuses.append(result["status"])
+            with owner_lock:
+                loan["returning"] = False
+                if result["status"] == "success":
+                    transitions.append(1)
+                    done += 1
+                    if owner[0] is loan:
+                        owner[0] = None
+                elif loan["overtaken"]:
+                    # Someone checked the book out while we still held it
+                    violations.append((holder_id, "during failed return"))
+        return done
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(WORKERS) as pool:
+        completed = sum(pool.map(churn, readers))
+    elapsed = time.monotonic() - started
+
+    assert not violations
+    assert "error" not in statuses
+    assert completed > 0
+    # Every committed transition bumped the version exactly once
+    db_session.expire_all()
+    assert db_session.get(Book, book_id).version == 1 + len(transitions)
+    logger.info("%d task runs, %d loans in %.2fs (%.0f runs/s)",
+                len(statuses), completed, elapsed, len(statuses) / elapsed)
+    # A guard against lock waits piling up, not a benchmark (see benchmarks/bench_scale.py)
+    assert elapsed < 60
+
+
+def test_independent_books_do_not_conflict(db_session, worker_sessions, readers, celery_eager):
+    library = db_session.query(Holder).filter_by(name="Library").first()
+    books = [Book(title=f"Shelf {i}", author="Stress", published_year=2000, holder_id=library.id)
+             for i in range(WORKERS)]
+    db_session.add_all(books)
+    db_session.commit()
+    pairs = list(zip([b.id for b in books], readers))
+
+    def loans(pair):
+        book_id, holder_id = pair
+        statuses = []
+        for _ in range(ROUNDS):
+            statuses.append(_run(checkout_book, book_id, holder_id, sessions=worker_sessions)["status"])
+            statuses.append(_run(return_book_task, book_id, sessions=worker_sessions)["status"])
+        return statuses
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(WORKERS) as pool:
+        statuses = [s for worker in pool.map(loans, pairs) for s in worker]
+    elapsed = time.monotonic() - started
+
+    assert statuses == ["success"] * (2 * WORKERS * ROUNDS)
+    db_session.expire_all()
+    assert all(db_session.get(Book, b.id).version == 1 + 2 * ROUNDS for b in books)
+    logger.info("%d loans/returns in %.2fs (%.0f/s)", len(statuses), elapsed, len(statuses) / elapsed)
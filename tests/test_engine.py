@@ -0,0 +1,55 @@
+import os
+
+import pytest
+from sqlalchemy.pool import NullPool, QueuePool
+
+import app.config as config_module
+import app.engine as engine_module
+
+
+@pytest.fixture
+def fresh_engine(monkeypatch, tmp_path):
+    monkeypatch.setattr(engine_module, "_engine", None)
+    monkeypatch.setattr(engine_module, "_managed_engines", [])
+    yield f"sqlite:///{tmp_path / 'engine.db'}"
+    if engine_module._engine is not None:
+        engine_module._engine.dispose()
+
+
+def test_engine_options_from_config(monkeypatch):
+    monkeypatch.setattr(config_module, "DB_POOL_SIZE", 3)
+    monkeypatch.setattr(config_module, "DB_MAX_OVERFLOW", 0)
+    options = config_module.engine_options("postgresql://u:p@h/db")
+    assert options["pool_size"] == 3
+    assert options["max_overflow"] == 0
+    assert options["pool_pre_ping"] is True
+
+
+def test_null_pool_mode(monkeypatch, fresh_engine):
+    monkeypatch.setattr(config_module, "DB_POOL", "null")
+    engine = engine_module.init_engine(fresh_engine)
+    assert isinstance(engine.pool, NullPool)
+
+
+def test_engine_is_lazy(fresh_engine):
+    engine = engine_module.init_engine(fresh_engine)
+    assert isinstance(engine.pool, QueuePool)
+    assert engine.pool.checkedout() == 0
+    assert engine.pool.checkedin() == 0
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+def test_child_gets_fresh_pool(fresh_engine):
+    engine = engine_module.init_engine(fresh_engine)
+    with engine.connect():
+        pass
+    parent_pool = engine.pool
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        engine_module.get_engine()
+        os.write(write_fd, b"1" if engine_module.get_engine().pool is not parent_pool else b"0")
+        os._exit(0)
+    os.waitpid(pid, 0)
+    assert os.read(read_fd, 1) == b"1"
+    assert engine.pool is parent_pool
@@ -0,0 +1,51 @@
+import json
+
+
+def test_list_etag_304(client):
+    resp = client.get("/api/books/")
+    assert resp.status_code == 200
+    etag = resp.headers["ETag"]
+    resp = client.get("/api/books/", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.data == b""
+
+
+def test_etag_depends_on_query(client):
+    full = client.get("/api/books/").headers["ETag"]
+    page = client.get("/api/books/?limit=1").headers["ETag"]
+    assert full != page
+
+
+def test_write_changes_etag(client):
+    etag = client.get("/api/holders/").headers["ETag"]
+    client.post("/api/holders/", json={"name": "NewHolder"})
+    resp = client.get("/api/holders/", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] != etag
+
+
+def test_detail_etag(client):
+    book_id = client.get("/api/books/").get_json()[0]["id"]
+    etag = client.get(f"/api/books/{book_id}/").headers["ETag"]
+    assert client.get(f"/api/books/{book_id}/", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_not_found_has_no_etag(client):
+    resp = client.get("/api/books/9999/")
+    assert resp.status_code == 404
+    assert "ETag" not in resp.headers
+
+
+def test_checkout_task_bumps_books_version(client, db_session, monkeypatch):
+    from app.models import Book, Holder
+    from app.tasks import checkout as checkout_module
+    monkeypatch.setattr(checkout_module, "Session", lambda: db_session)
+    etag = client.get("/api/books/").headers["ETag"]
+    book = db_session.query(Book).filter_by(title="Book 1").first()
+    alice = db_session.query(Holder).filter_by(name="Alice").first()
+    client.post(
+        f"/api/books/{book.id}/checkout/?wait=10",
+        data=json.dumps({"holder_id": alice.id}),
+        content_type="application/json"
+    )
+    assert client.get("/api/books/", headers={"If-None-Match": etag}).status_code == 200
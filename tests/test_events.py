@@ -0,0 +1,124 @@
+import json
+
+import pytest
+
+from app import events
+from app.models import Book, Holder
+from app.tasks.checkout import checkout_book
+
+
+@pytest.fixture(autouse=True)
+def fresh_hub(monkeypatch, client):
+    # A hub per test, bound to this test's fakeredis, polling quickly
+    monkeypatch.setattr(events, "_hubs", {})
+    monkeypatch.setattr(events, "POLL_SECONDS", 0.05)
+    monkeypatch.setitem(client.application.config, "EVENTS_HEARTBEAT", 0.05)
+    monkeypatch.setitem(client.application.config, "EVENTS_MAX_STREAM_SECONDS", 2)
+
+
+def stream(client, **headers):
+    response = client.get("/api/events/", headers=headers, buffered=False)
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    return response, iter(response.response)
+
+
+def next_message(chunks):
+    """The next ``(id, data)`` message, skipping the retry field and heartbeats."""
+    for chunk in chunks:
+        text = chunk.decode() if isinstance(chunk, bytes) else chunk
+        if text.startswith(("retry:", ":")):
+            continue
+        fields = dict(line.split(": ", 1) for line in text.strip().split("\n"))
+        return fields.get("id"), json.loads(fields["data"])
+    raise AssertionError("stream ended")
+
+
+def stream_ids(fake_redis):
+    return [entry_id.decode() for entry_id, _ in fake_redis.xrange(events.STREAM_KEY)]
+
+
+def test_publish_is_compact(fake_redis):
+    events.publish(events.moved_event([4, 5], 2))
+    (_, fields), = fake_redis.xrange(events.STREAM_KEY)
+    assert fields[b"data"] == b'{"type":"book.moved","ids":[4,5],"holder_id":2}'
+
+
+def test_live_events_from_routes(client, db_session):
+    response, chunks = stream(client)
+    try:
+        assert next(chunks).decode().startswith("retry:")
+        alice = db_session.query(Holder).filter_by(name="Alice").one()
+        body = {"title": "Live", "author": "A. Author", "published_year": 2001, "holder_id": alice.id}
+        created = client.post("/api/books/", data=json.dumps(body), content_type="application/json").get_json()
+        event_id, data = next_message(chunks)
+        assert data == {"type": "book.created", **body, "id": created["id"]}
+        assert event_id
+
+        client.delete(f"/api/books/{created['id']}/")
+        assert next_message(chunks)[1] == {"type": "book.deleted", "id": created["id"]}
+    finally:
+        response.close()
+
+
+def test_tasks_publish_moves(client, db_session, monkeypatch, fake_redis, celery_eager):
+    from app.tasks import checkout
+    monkeypatch.setattr(checkout, "Session", lambda: db_session)
+    book_id = db_session.query(Book.id).filter_by(title="Book 1").scalar()
+    alice_id = db_session.query(Holder.id).filter_by(name="Alice").scalar()
+    checkout_book.apply(args=(book_id, alice_id)).get()
+    checkout_book.apply(args=(book_id, alice_id)).get()  # no change, no event
+    entries = fake_redis.xrange(events.STREAM_KEY)
+    assert [json.loads(fields[b"data"]) for _, fields in entries] == [
+        {"type": "book.moved", "ids": [book_id], "holder_id": alice_id},
+    ]
+
+
+def test_resume_after_last_event_id(client, fake_redis):
+    for holder_id in (1, 2, 3):
+        events.publish(events.moved_event([7], holder_id))
+    first, second, third = stream_ids(fake_redis)
+
+    response, chunks = stream(client, **{"Last-Event-ID": first})
+    try:
+        assert next_message(chunks) == (second, {"type": "book.moved", "ids": [7], "holder_id": 2})
+        assert next_message(chunks)[0] == third
+        events.publish(events.moved_event([7], 4))
+        assert next_message(chunks)[1]["holder_id"] == 4
+    finally:
+        response.close()
+
+
+def test_resync_when_history_was_trimmed(client, fake_redis):
+    for holder_id in (1, 2):
+        events.publish(events.moved_event([7], holder_id))
+    first, _ = stream_ids(fake_redis)
+    fake_redis.xdel(events.STREAM_KEY, first)
+
+    response, chunks = stream(client, **{"Last-Event-ID": first})
+    try:
+        assert next_message(chunks) == (None, {"type": "resync"})
+    finally:
+        response.close()
+
+
+def test_heartbeat_and_stream_end(client, monkeypatch):
+    monkeypatch.setitem(client.application.config, "EVENTS_MAX_STREAM_SECONDS", 0.2)
+    response = client.get("/api/events/")
+    body = response.get_data(as_text=True)
+    assert body.startswith("retry: ")
+    assert ": keepalive" in body
+
+
+def test_streams_per_process_are_capped(client, monkeypatch):
+    monkeypatch.setitem(client.application.config, "EVENTS_MAX_STREAMS", 1)
+    response, chunks = stream(client)
+    try:
+        next(chunks)
+        refused = client.get("/api/events/")
+        assert refused.status_code == 503
+        assert refused.headers["Retry-After"] == "2"
+    finally:
+        response.close()
+    response, _ = stream(client)
+    response.close()
@@ -0,0 +1,28 @@
+import csv
+import io
+import json
+
+
+def test_export_ndjson(client):
+    resp = client.get("/api/books/export/?format=ndjson")
+    assert resp.status_code == 200
+    assert resp.mimetype == "application/x-ndjson"
+    rows = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    assert {r["title"] for r in rows} >= {"Book 1", "Book 2", "Book 3"}
+    assert [r["id"] for r in rows] == sorted(r["id"] for r in rows)
+
+
+def test_export_csv(client, monkeypatch):
+    import app.export as export_module
+    monkeypatch.setattr(export_module, "EXPORT_BATCH_SIZE", 1)
+    resp = client.get("/api/books/export/?format=csv")
+    assert resp.status_code == 200
+    assert resp.mimetype == "text/csv"
+    rows = list(csv.DictReader(io.StringIO(resp.get_data(as_text=True))))
+    assert list(rows[0]) == ["id", "title", "author", "published_year", "holder_id"]
+    assert {r["title"] for r in rows} >= {"Book 1", "Book 2", "Book 3"}
+
+
+def test_export_unknown_format(client):
+    resp = client.get("/api/books/export/?format=xml")
+    assert resp.status_code == 400
@@ -0,0 +1,51 @@
+import pytest
+
+PARITY_URLS = [
+    "/api/books/",
+    "/api/books/?limit=2",
+    "/api/books/?fields=title,holder",
+    "/api/books/?fields=id",
+    "/api/holders/",
+    "/api/holders/?limit=1",
+    "/api/holders/?fields=name",
+    "/api/holders/?fields=name&include=books",
+]
+
+
+@pytest.fixture
+def catalog(client):
+    holder_id = client.post("/api/holders/", json={"name": "Zoë"}).get_json()["id"]
+    client.post("/api/books/", json={
+        "title": "Ünïcode ☃ \"quoted\" \\ \x07",
+        "author": "Émile",
+        "published_year": 1901,
+        "holder_id": holder_id,
+    })
+    return holder_id
+
+
+def fetch(client, url, fast):
+    client.application.config["FAST_SERIALIZER"] = fast
+    return client.get(url)
+
+
+@pytest.mark.parametrize("url", PARITY_URLS)
+def test_list_parity(client, catalog, url):
+    slow = fetch(client, url, False)
+    fast = fetch(client, url, True)
+    assert slow.status_code == fast.status_code == 200
+    assert fast.data == slow.data
+    assert fast.headers.get("X-Next-Cursor") == slow.headers.get("X-Next-Cursor")
+
+
+def test_detail_parity(client, catalog):
+    book_ids = [b["id"] for b in fetch(client, "/api/books/", False).get_json()]
+    urls = [f"/api/books/{i}/" for i in book_ids]
+    urls += [f"/api/holders/{catalog}/", f"/api/holders/{catalog}/?fields=books"]
+    for url in urls:
+        assert fetch(client, url, True).data == fetch(client, url, False).data
+
+
+def test_detail_not_found(client):
+    assert fetch(client, "/api/books/9999/", True).status_code == 404
+    assert fetch(client, "/api/holders/9999/", True).status_code == 404
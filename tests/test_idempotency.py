@@ -0,0 +1,116 @@
+import pytest
+from kombu.exceptions import OperationalError
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.celery import celery
+from app.idempotency import IDEMPOTENCY_KEY, INFLIGHT_KEY, checkout_operation
+from app.models import Book, Holder
+from app.tasks.checkout import checkout_book
+
+
+class PendingResult:
+    state = "PENDING"
+
+    def __init__(self, task_id, **kwargs):
+        self.id = task_id
+
+
+@pytest.fixture
+def published(monkeypatch):
+    calls = []
+    real_apply_async = checkout_book.apply_async
+
+    def record(*args, **kwargs):
+        calls.append(kwargs)
+        return real_apply_async(*args, **kwargs)
+
+    monkeypatch.setattr(checkout_book, "apply_async", record)
+    monkeypatch.setattr(celery, "AsyncResult", PendingResult)
+    return calls
+
+
+@pytest.fixture
+def ids(client):
+    with client.application.app_context():
+        book = Book.query.filter_by(title="Book 1").first()
+        alice = Holder.query.filter_by(name="Alice").first()
+        return book.id, alice.id
+
+
+def test_same_idempotency_key_replays_task(client, ids, published):
+    book_id, alice_id = ids
+    headers = {"Idempotency-Key": "abc-123"}
+    first = client.post(f"/api/books/{book_id}/checkout/", json={"holder_id": alice_id}, headers=headers)
+    second = client.post(f"/api/books/{book_id}/checkout/", json={"holder_id": alice_id}, headers=headers)
+    assert first.status_code == second.status_code == 202
+    assert second.get_json()["task_id"] == first.get_json()["task_id"]
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert len(published) == 1
+
+
+def test_idempotency_key_reused_for_other_request(client, ids, published):
+    book_id, alice_id = ids
+    headers = {"Idempotency-Key": "abc-123"}
+    client.post(f"/api/books/{book_id}/checkout/", json={"holder_id": alice_id}, headers=headers)
+    resp = client.post(f"/api/books/{book_id}/return/", headers=headers)
+    assert resp.status_code == 422
+
+
+def test_inflight_checkout_is_joined(client, ids, published, fake_redis):
+    book_id, alice_id = ids
+    # A worker has not finished the same checkout yet
+    fake_redis.set(INFLIGHT_KEY.format(checkout_operation(book_id, alice_id)), "running-task")
+    resp = client.post(f"/api/books/{book_id}/checkout/", json={"holder_id": alice_id})
+    assert resp.status_code == 202
+    assert resp.get_json()["task_id"] == "running-task"
+    assert resp.headers["Idempotent-Replayed"] == "true"
+    assert published == []
+
+
+def test_inflight_key_released_when_task_finishes(client, ids, published, fake_redis):
+    book_id, alice_id = ids
+    client.post(f"/api/books/{book_id}/checkout/", json={"holder_id": alice_id})
+    client.post(f"/api/books/{book_id}/checkout/", json={"holder_id": alice_id})
+    assert fake_redis.get(INFLIGHT_KEY.format(checkout_operation(book_id, alice_id))) is None
+    assert len(published) == 2
+
+
+def test_publishes_when_redis_is_down(client, ids, published, monkeypatch):
+    book_id, alice_id = ids
+
+    class DownRedis:
+        def __getattr__(self, name):
+            def fail(*args, **kwargs):
+                raise RedisConnectionError("down")
+            return fail
+
+    monkeypatch.setattr("app.redis_client._client", DownRedis())
+    resp = client.post(
+        f"/api/books/{book_id}/checkout/", json={"holder_id": alice_id}, headers={"Idempotency-Key": "k"}
+    )
+    assert resp.status_code == 202
+    assert len(published) == 1
+
+
+def test_failed_publish_releases_claims(client, ids, published, monkeypatch, fake_redis):
+    book_id, alice_id = ids
+    recording_apply_async = checkout_book.apply_async
+
+    def broker_down(*args, **kwargs):
+        raise OperationalError("broker unreachable")
+
+    monkeypatch.setattr(checkout_book, "apply_async", broker_down)
+    headers = {"Idempotency-Key": "abc-123"}
+    monkeypatch.setitem(client.application.config, "PROPAGATE_EXCEPTIONS", False)
+    failed = client.post(f"/api/books/{book_id}/checkout/", json={"holder_id": alice_id}, headers=headers)
+    assert failed.status_code == 500
+    assert fake_redis.get(IDEMPOTENCY_KEY.format("abc-123")) is None
+    assert fake_redis.get(INFLIGHT_KEY.format(checkout_operation(book_id, alice_id))) is None
+
+    # The retry publishes a task of its own instead of replaying one that was never sent
+    monkeypatch.setattr(checkout_book, "apply_async", recording_apply_async)
+    retry = client.post(f"/api/books/{book_id}/checkout/", json={"holder_id": alice_id}, headers=headers)
+    assert retry.status_code == 202
+    assert "Idempotent-Replayed" not in retry.headers
+    assert len(published) == 1
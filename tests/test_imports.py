@@ -0,0 +1,132 @@
+import io
+import json
+import os
+
+import pytest
+
+from app import imports
+from app.models import Book, Holder, ImportJob
+from app.tasks import imports as import_task_module
+
+
+@pytest.fixture(autouse=True)
+def import_setup(monkeypatch, db_session, tmp_path, client):
+    monkeypatch.setattr(import_task_module, "Session", lambda: db_session)
+    monkeypatch.setitem(client.application.config, "IMPORT_DIR", str(tmp_path / "imports"))
+
+
+def upload(client, content, filename="books.csv", **query):
+    return client.post(
+        "/api/books/import/",
+        query_string=query,
+        data={"file": (io.BytesIO(content.encode()), filename)},
+        content_type="multipart/form-data",
+    )
+
+
+def test_csv_import(client, db_session):
+    alice_id = db_session.query(Holder).filter_by(name="Alice").first().id
+    content = (
+        "id,title,author,published_year,holder_id\n"
+        "99,Imported One,Ann Author,1999,\n"
+        f"100,Imported Two,Ben Author,2001,{alice_id}\n"
+    )
+    resp = upload(client, content)
+    assert resp.status_code == 202
+    job = client.get(resp.headers["Location"]).get_json()
+    assert job["status"] == "succeeded"
+    assert (job["rows_processed"], job["rows_imported"], job["rows_failed"]) == (2, 2, 0)
+    library = db_session.query(Holder).filter_by(name="Library").first()
+    one = db_session.query(Book).filter_by(title="Imported One").one()
+    two = db_session.query(Book).filter_by(title="Imported Two").one()
+    assert one.holder_id == library.id and one.id != 99
+    assert two.holder_id == alice_id
+    assert os.listdir(client.application.config["IMPORT_DIR"]) == []  # removed when the job ends
+
+
+def test_ndjson_import_reports_row_errors(client, db_session):
+    lines = [
+        json.dumps({"title": "Good", "author": "A", "published_year": 2000}),
+        json.dumps({"title": "No author", "published_year": 2000}),
+        "{not json",
+        json.dumps({"title": "Bad year", "author": "A", "published_year": "soon"}),
+        json.dumps({"title": "Ghost holder", "author": "A", "published_year": 2000, "holder_id": 999999}),
+        json.dumps(["not", "an", "object"]),
+    ]
+    resp = upload(client, "\n".join(lines) + "\n", filename="books.ndjson")
+    job = client.get(resp.headers["Location"]).get_json()
+    assert job["status"] == "succeeded"
+    assert (job["rows_imported"], job["rows_failed"]) == (1, 5)
+    errors = {error["row"]: error["errors"] for error in job["errors"]}
+    assert set(errors) == {2, 3, 4, 5, 6}
+    assert "author" in errors[2]
+    assert "published_year" in errors[4]
+    assert "holder_id" in errors[5]
+
+
+def test_import_batches_commit_progress(client, db_session, tmp_path, max_queries):
+    rows = "".join(f"Batch {i},Author {i % 3},{1950 + i}\n" for i in range(95))
+    job = ImportJob(filename="b.csv", path="", format="csv")
+    db_session.add(job)
+    db_session.commit()
+    path = imports.store_upload(io.BytesIO(("title,author,published_year\n" + rows).encode()), "csv", str(tmp_path))
+    job.path = path
+    with max_queries(70):  # a handful of statements per 10-row batch, none per row
+        imports.run_import(db_session, job, batch_size=10)
+    assert job.status == "succeeded"
+    assert job.rows_imported == 95
+    assert db_session.query(Book).filter(Book.title.like("Batch %")).count() == 95
+
+
+def test_import_resumes_after_committed_rows(client, db_session, tmp_path):
+    path = imports.store_upload(
+        io.BytesIO(b"title,author,published_year\nFirst,A,2000\nSecond,A,2000\nThird,A,2000\n"), "csv", str(tmp_path),
+    )
+    # A previous delivery committed the first two rows before the worker died
+    job = ImportJob(filename="r.csv", path=path, format="csv", status="running", rows_processed=2, rows_imported=2)
+    db_session.add(job)
+    db_session.commit()
+    imports.run_import(db_session, job, batch_size=2)
+    assert job.rows_imported == 3
+    assert db_session.query(Book).filter_by(title="Third").count() == 1
+    assert db_session.query(Book).filter_by(title="First").count() == 0
+
+
+def test_import_errors_are_capped(client, db_session, tmp_path):
+    path = imports.store_upload(
+        io.BytesIO(b"title,author,published_year\n" + b"x,,2000\n" * 30), "csv", str(tmp_path),
+    )
+    job = ImportJob(filename="e.csv", path=path, format="csv")
+    db_session.add(job)
+    db_session.commit()
+    imports.run_import(db_session, job, batch_size=7, max_errors=5)
+    assert job.rows_failed == 30
+    assert len(job.errors) == 5
+
+
+def test_csv_without_required_columns_fails_the_job(client):
+    resp = upload(client, "name,year\nx,2000\n")
+    job = client.get(resp.headers["Location"]).get_json()
+    assert job["status"] == "failed"
+    assert "author" in job["message"]
+
+
+def test_raw_body_upload(client):
+    resp = client.post(
+        "/api/books/import/?format=ndjson",
+        data=json.dumps({"title": "Raw", "author": "A", "published_year": 2000}) + "\n",
+        content_type="application/x-ndjson",
+    )
+    assert resp.status_code == 202
+    assert client.get(resp.headers["Location"]).get_json()["rows_imported"] == 1
+
+
+def test_upload_validation(client):
+    assert client.post("/api/books/import/").status_code == 400
+    resp = upload(client, "<xml/>", filename="books.xml")
+    assert resp.status_code == 400
+    assert "format" in resp.get_json()["error"]
+
+
+def test_unknown_import_job(client):
+    assert client.get("/api/imports/999999/").status_code == 404
@@ -0,0 +1,169 @@
+from datetime import date, datetime, timezone
+
+import pytest
+from sqlalchemy import insert
+
+from app.loans import CHECKOUT, RETURN, loan_stats, refresh_rollups
+from app.models import Book, BookLoanTotal, Holder, LoanDaily, LoanEvent, LoanRollupState
+from app.tasks.bulk import checkout_books_bulk, return_books_bulk
+from app.tasks.checkout import checkout_book
+from app.tasks.loans import refresh_loan_rollups
+from app.tasks.return_book import return_book_task
+
+
+@pytest.fixture(autouse=True)
+def patch_task_db(monkeypatch, db_session):
+    from app.tasks import bulk, checkout, loans, return_book
+    for module in (bulk, checkout, loans, return_book):
+        monkeypatch.setattr(module, "Session", lambda: db_session)
+    yield
+
+
+def ids(db_session):
+    books = [b.id for b in db_session.query(Book).order_by(Book.id)]
+    holders = {h.name: h.id for h in db_session.query(Holder)}
+    return books, holders
+
+
+def events(db_session):
+    return [(e.book_id, e.holder_id, e.kind) for e in db_session.query(LoanEvent).order_by(LoanEvent.id)]
+
+
+def test_checkout_and_return_append_events(db_session, celery_eager):
+    (book_id, *_), holders = ids(db_session)
+    checkout_book.apply(args=(book_id, holders["Alice"])).get()
+    return_book_task.apply(args=(book_id,)).get()
+    assert events(db_session) == [
+        (book_id, holders["Alice"], CHECKOUT),
+        (book_id, holders["Alice"], RETURN),
+    ]
+
+
+def test_no_event_when_nothing_moves(db_session, celery_eager):
+    (book_id, *_), holders = ids(db_session)
+    return_book_task.apply(args=(book_id,)).get()  # already in the Library
+    checkout_book.apply(args=(book_id, holders["Alice"])).get()
+    checkout_book.apply(args=(book_id, holders["Alice"])).get()  # already with Alice
+    result = checkout_book.apply(args=(book_id, holders["Bob"])).get()
+    assert result["status"] == "conflict"
+    assert events(db_session) == [(book_id, holders["Alice"], CHECKOUT)]
+
+
+def test_bulk_moves_append_events(db_session, celery_eager):
+    book_ids, holders = ids(db_session)
+    checkout_book.apply(args=(book_ids[0], holders["Alice"])).get()
+    checkout_books_bulk.apply(args=(book_ids, holders["Alice"], db_session)).get()
+    return_books_bulk.apply(args=(book_ids, db_session)).get()
+    assert events(db_session) == (
+        [(book_ids[0], holders["Alice"], CHECKOUT)]
+        + [(book_id, holders["Alice"], CHECKOUT) for book_id in book_ids[1:]]
+        + [(book_id, holders["Alice"], RETURN) for book_id in book_ids]
+    )
+
+
+def test_refresh_rollups_counts_each_event_once(db_session, celery_eager):
+    book_ids, holders = ids(db_session)
+    for book_id in book_ids:
+        checkout_book.apply(args=(book_id, holders["Alice"])).get()
+    return_book_task.apply(args=(book_ids[0],)).get()
+    checkout_book.apply(args=(book_ids[0], holders["Bob"])).get()
+
+    assert refresh_rollups(db_session, batch_size=2) == 5
+    assert refresh_loan_rollups.apply().get() == 0
+
+    state = db_session.get(LoanRollupState, 1)
+    assert (state.checkouts, state.returns) == (4, 1)
+    assert state.last_event_id == db_session.query(LoanEvent.id).order_by(LoanEvent.id.desc()).first()[0]
+    totals = {t.book_id: t.checkouts for t in db_session.query(BookLoanTotal)}
+    assert totals == {book_ids[0]: 2, book_ids[1]: 1, book_ids[2]: 1}
+    (today,) = db_session.query(LoanDaily).all()
+    assert (today.checkouts, today.returns) == (4, 1)
+
+    return_book_task.apply(args=(book_ids[1],)).get()
+    assert refresh_rollups(db_session) == 1
+    (today,) = db_session.query(LoanDaily).all()
+    assert (today.checkouts, today.returns) == (4, 2)
+
+
+
+def test_refresh_skips_while_an_insert_is_open(db_session):
+    if db_session.get_bind().dialect.name != "postgresql":
+        pytest.skip("the watermark lock is Postgres-only")
+    from app.config import TestConfig
+    book_ids, holders = ids(db_session)
+    writer = TestConfig().Session()
+    try:
+        # An uncommitted insert holds the lock the watermark needs
+        writer.execute(insert(LoanEvent), [{"book_id": book_ids[0], "holder_id": holders["Alice"], "kind": CHECKOUT}])
+        assert refresh_rollups(db_session) == 0
+        assert db_session.get(LoanRollupState, 1) is None
+        writer.commit()
+    finally:
+        writer.close()
+    assert refresh_rollups(db_session) == 1
+
+
+def test_rollups_bucket_by_day(db_session):
+    book_ids, holders = ids(db_session)
+    db_session.execute(insert(LoanEvent), [
+        {"book_id": book_ids[0], "holder_id": holders["Alice"], "kind": CHECKOUT,
+         "occurred_at": datetime(2026, 3, 1, 23, 30, tzinfo=timezone.utc)},
+        {"book_id": book_ids[0], "holder_id": holders["Alice"], "kind": RETURN,
+         "occurred_at": datetime(2026, 3, 2, 8, 0, tzinfo=timezone.utc)},
+        {"book_id": book_ids[1], "holder_id": holders["Bob"], "kind": CHECKOUT,
+         "occurred_at": datetime(2026, 3, 3, 12, 0, tzinfo=timezone.utc)},
+    ])
+    db_session.commit()
+    refresh_rollups(db_session)
+
+    stats = loan_stats(db_session, days=4, today=date(2026, 3, 4))
+    assert stats["per_day"] == [
+        {"day": "2026-03-01", "checkouts": 1, "returns": 0},
+        {"day": "2026-03-02", "checkouts": 0, "returns": 1},
+        {"day": "2026-03-03", "checkouts": 1, "returns": 0},
+        {"day": "2026-03-04", "checkouts": 0, "returns": 0},
+    ]
+    alice = next(h for h in stats["most_active_holders"] if h["name"] == "Alice")
+    assert (alice["checkouts"], alice["returns"]) == (1, 1)
+    assert alice["last_activity_at"].startswith("2026-03-02T08:00:00")
+
+
+def test_loan_stats_endpoint(client, db_session, celery_eager):
+    book_ids, holders = ids(db_session)
+    for holder in ("Alice", "Bob"):
+        checkout_book.apply(args=(book_ids[1], holders[holder])).get()
+        return_book_task.apply(args=(book_ids[1],)).get()
+    checkout_book.apply(args=(book_ids[2], holders["Alice"])).get()
+    refresh_rollups(db_session)
+
+    response = client.get("/api/stats/loans/?limit=1&days=7")
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["totals"] == {"checkouts": 3, "returns": 2}
+    assert len(data["per_day"]) == 7
+    assert data["per_day"][-1]["checkouts"] == 3
+    assert data["most_borrowed"] == [{
+        "book_id": book_ids[1], "title": "Book 2", "author": "Sample Author",
+        "checkouts": 2, "last_checkout_at": data["most_borrowed"][0]["last_checkout_at"],
+    }]
+    assert [h["name"] for h in data["most_active_holders"]] == ["Alice"]
+    assert data["as_of"] is not None
+
+
+def test_loan_stats_survive_deleted_books(client, db_session, celery_eager):
+    book_ids, holders = ids(db_session)
+    checkout_book.apply(args=(book_ids[0], holders["Alice"])).get()
+    refresh_rollups(db_session)
+    assert client.delete(f"/api/books/{book_ids[0]}/").status_code == 204
+
+    data = client.get("/api/stats/loans/").get_json()
+    assert data["most_borrowed"][0]["book_id"] == book_ids[0]
+    assert data["most_borrowed"][0]["title"] is None
+
+
+def test_loan_stats_before_first_refresh(client):
+    data = client.get("/api/stats/loans/?days=1000&limit=0").get_json()
+    assert data["as_of"] is None
+    assert data["totals"] == {"checkouts": 0, "returns": 0}
+    assert len(data["per_day"]) == 366
+    assert data["most_borrowed"] == []
@@ -0,0 +1,99 @@
+import time
+
+import pytest
+from prometheus_client import CollectorRegistry
+from sqlalchemy.orm.exc import StaleDataError
+
+from app import metrics
+from app.models import Book, Holder
+from app.tasks import checkout as checkout_module
+from app.tasks import concurrency
+from app.tasks.checkout import checkout_book
+
+
+@pytest.fixture
+def registry(monkeypatch, db_session):
+    registry = CollectorRegistry()
+    monkeypatch.setattr(metrics, "task_metrics", metrics.TaskMetrics(registry))
+    monkeypatch.setattr(checkout_module, "Session", lambda: db_session)
+    monkeypatch.setattr(concurrency.time, "sleep", lambda seconds: None)
+    return registry
+
+
+def sample(registry, name, **labels):
+    return registry.get_sample_value(name, labels) or 0
+
+
+def ids(db_session):
+    book = db_session.query(Book).filter_by(title="Book 1").first()
+    alice = db_session.query(Holder).filter_by(name="Alice").first()
+    return book.id, alice.id
+
+
+def test_task_run_records_runtime_db_time_and_outcome(registry, db_session):
+    book_id, alice_id = ids(db_session)
+    checkout_book.apply(args=(book_id, alice_id))
+    name = checkout_book.name
+    assert sample(registry, "celery_task_runtime_seconds_count", task=name) == 1
+    assert sample(registry, "celery_task_db_seconds_count", task=name) == 1
+    assert 0 < sample(registry, "celery_task_db_seconds_sum", task=name) <= sample(registry, "celery_task_runtime_seconds_sum", task=name)
+    assert sample(registry, "celery_task_db_queries_total", task=name) > 0
+    assert sample(registry, "celery_task_outcomes_total", task=name, status="success") == 1
+
+
+def test_outcome_follows_result_status(registry, db_session):
+    book_id, alice_id = ids(db_session)
+    checkout_book.apply(args=(book_id, alice_id))
+    bob = db_session.query(Holder).filter_by(name="Bob").first()
+    checkout_book.apply(args=(book_id, bob.id))  # held by Alice
+    checkout_book.apply(args=(book_id, 999999))
+    statuses = {
+        status: sample(registry, "celery_task_outcomes_total", task=checkout_book.name, status=status)
+        for status in ("success", "error", "conflict")
+    }
+    assert statuses["success"] == 1
+    assert statuses["conflict"] == 1
+    assert statuses["error"] == 1
+
+
+def test_queue_wait_measured_from_published_at(registry, db_session):
+    book_id, alice_id = ids(db_session)
+    checkout_book.apply(args=(book_id, alice_id), headers={metrics.PUBLISHED_AT_HEADER: time.time() - 2})
+    name = checkout_book.name
+    assert sample(registry, "celery_task_queue_wait_seconds_count", task=name) == 1
+    assert sample(registry, "celery_task_queue_wait_seconds_sum", task=name) >= 2
+
+
+def test_publish_stamps_header():
+    headers = {}
+    metrics.stamp_published_at(headers=headers)
+    assert headers[metrics.PUBLISHED_AT_HEADER] <= time.time()
+
+
+def test_lost_version_checks_count_as_retries(registry, db_session, monkeypatch):
+    book_id, alice_id = ids(db_session)
+    real_checkout = checkout_module.dal.checkout
+    calls = []
+
+    def lose_first(*args):
+        calls.append(args)
+        if len(calls) == 1:
+            raise StaleDataError("lost race")
+        return real_checkout(*args)
+
+    monkeypatch.setattr(checkout_module.dal, "checkout", lose_first)
+    checkout_book.apply(args=(book_id, alice_id))
+    assert sample(registry, "celery_task_retries_total", task=checkout_book.name, kind="cas") == 1
+
+
+def test_outcome_of_raised_and_retried_tasks():
+    assert metrics.outcome("FAILURE", RuntimeError("boom")) == "failure"
+    assert metrics.outcome("RETRY", None) == "retry"
+    assert metrics.outcome("SUCCESS", None) == "success"
+
+
+def test_metrics_endpoint_serves_text_format(client):
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain")
+    assert b"# TYPE celery_task_runtime_seconds histogram" in response.data
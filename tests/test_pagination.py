@@ -0,0 +1,61 @@
+import pytest
+
+
+@pytest.fixture
+def many_books(client):
+    holder_id = client.post("/api/holders/", json={"name": "Pager"}).get_json()["id"]
+    for i in range(5):
+        client.post("/api/books/", json={
+            "title": f"Paged {i}",
+            "author": "Paging Author" if i % 2 else "Other Author",
+            "published_year": 2000 + i,
+            "holder_id": holder_id,
+        })
+    return holder_id
+
+
+def test_books_pages_follow_cursor(client, many_books):
+    seen = []
+    url = f"/api/books/?limit=2&holder_id={many_books}"
+    cursor = None
+    while True:
+        resp = client.get(url + (f"&cursor={cursor}" if cursor else ""))
+        assert resp.status_code == 200
+        page = resp.get_json()
+        assert len(page) <= 2
+        seen.extend(b["id"] for b in page)
+        cursor = resp.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        assert 'rel="next"' in resp.headers["Link"]
+    assert len(seen) == 5
+    assert seen == sorted(seen)
+
+
+def test_books_filter_by_author(client, many_books):
+    resp = client.get("/api/books/?author=Paging Author")
+    assert resp.status_code == 200
+    titles = [b["title"] for b in resp.get_json()]
+    assert titles == ["Paged 1", "Paged 3"]
+
+
+def test_books_filter_by_availability(client, many_books):
+    available = client.get("/api/books/?available=true").get_json()
+    checked_out = client.get("/api/books/?available=false&limit=2")
+    assert [b["title"] for b in available] == ["Book 1", "Book 2", "Book 3"]
+    assert [b["title"] for b in checked_out.get_json()] == ["Paged 0", "Paged 1"]
+    assert checked_out.headers.get("X-Next-Cursor")
+    assert client.get("/api/books/?available=yes").status_code == 400
+
+
+def test_holders_pagination_limit(client):
+    resp = client.get("/api/holders/?limit=1")
+    assert resp.status_code == 200
+    assert len(resp.get_json()) == 1
+    assert resp.headers.get("X-Next-Cursor")
+
+
+def test_invalid_cursor(client):
+    resp = client.get("/api/books/?cursor=not-a-cursor")
+    assert resp.status_code == 400
+    assert resp.get_json()["error"] == "invalid cursor"
@@ -0,0 +1,163 @@
+import json
+import logging
+
+import pytest
+from sqlalchemy.orm import lazyload
+
+from app import instrumentation
+from app.models import Book, Holder, ImportJob
+
+# Statements per request, cold cache, on the ORM task path (Postgres runs the
+# checkout/return tasks in fewer). Writes include the reload for the response.
+# Raise a budget only with a reason; a jump usually means a lazy load crept
+# into a loop.
+QUERY_BUDGETS = {
+    'books.get_books': 1,
+    'books.get_books?fields=holder': 1,
+    'books.get_books?available=false': 1,
+    'books.search_books_endpoint': 3,  # ranked page, its holders in one IN query, facets
+    'books.export_books': 1,
+    'books.get_book': 1,
+    'books.create_book': 4,
+    'books.update_book': 5,  # moves the book: + book_count
+    'books.patch_book': 4,
+    'books.delete_book': 3,
+    'books.import_books_endpoint': 14,  # eager: the whole import job (one batch)
+    'books.checkout_book_endpoint': 6,  # includes the loan event and book_count
+    'books.return_book_task_endpoint': 2,
+    'books.checkout_books_bulk_endpoint': 6,  # + locked holder read, loan events, book_count
+    'books.return_books_bulk_endpoint': 3,
+    'holders.get_holders?fields=id,name': 1,
+    'holders.get_holders?fields=books': 2,
+    'holders.get_holder': 2,
+    'holders.get_holders_summary': 2,  # the page with the Library counts its books
+    'holders.create_holder': 3,
+    'holders.update_holder': 4,
+    'holders.patch_holder': 4,
+    'holders.delete_holder': 3,
+    'tasks.get_task': 0,
+    'imports.get_import': 1,
+    'stats.get_loan_stats': 4,
+    'events.stream_events': 0,
+    'metrics.metrics': 0,
+}
+
+
+class PendingResult:
+    state = 'PENDING'
+
+    def __init__(self, task_id, **kwargs):
+        self.id = task_id
+
+    def ready(self):
+        return False
+
+    def successful(self):
+        return False
+
+    def failed(self):
+        return False
+
+
+@pytest.fixture(autouse=True)
+def patch_tasks(monkeypatch, db_session, client, tmp_path):
+    from app.celery import celery
+    from app.tasks import bulk, checkout, imports, return_book
+    for module in (bulk, checkout, imports, return_book):
+        monkeypatch.setattr(module, "Session", lambda: db_session)
+    monkeypatch.setattr(celery, "AsyncResult", PendingResult)
+    monkeypatch.setitem(client.application.config, "IMPORT_DIR", str(tmp_path / "imports"))
+    monkeypatch.setitem(client.application.config, "EVENTS_MAX_STREAM_SECONDS", 0.1)
+
+
+def requests_by_budget(db_session):
+    book = db_session.query(Book).filter_by(title="Book 1").first()
+    alice = db_session.query(Holder).filter_by(name="Alice").first()
+    bob = db_session.query(Holder).filter_by(name="Bob").first()
+    new_book = {"title": "Budget", "author": "A. Author", "published_year": 2001, "holder_id": alice.id}
+    job = ImportJob(filename="budget.csv", path="", format="csv")
+    db_session.add(job)
+    db_session.commit()
+    ndjson = "".join(json.dumps(dict(new_book, title=f"Import {i}")) + "\n" for i in range(50))
+    return {
+        'books.get_books': ('get', '/api/books/', None),
+        'books.get_books?fields=holder': ('get', '/api/books/?fields=id,title,holder', None),
+        'books.get_books?available=false': ('get', '/api/books/?available=false&include=holder', None),
+        'books.search_books_endpoint': ('get', '/api/books/search/?q=book', None),
+        'books.export_books': ('get', '/api/books/export/', None),
+        'books.get_book': ('get', f'/api/books/{book.id}/', None),
+        'books.create_book': ('post', '/api/books/', new_book),
+        'books.update_book': ('put', f'/api/books/{book.id}/', {**new_book, "title": "Renamed"}),
+        'books.patch_book': ('patch', f'/api/books/{book.id}/', {"title": "Patched"}),
+        'books.delete_book': ('delete', f'/api/books/{book.id}/', None),
+        'books.import_books_endpoint': ('post', '/api/books/import/?format=ndjson', ndjson),
+        'books.checkout_book_endpoint': ('post', f'/api/books/{book.id}/checkout/?wait=5', {"holder_id": alice.id}),
+        'books.return_book_task_endpoint': ('post', f'/api/books/{book.id}/return/?wait=5', None),
+        'books.checkout_books_bulk_endpoint': (
+            'post', '/api/books/checkout/bulk/?wait=5', {"book_ids": [book.id], "holder_id": alice.id},
+        ),
+        'books.return_books_bulk_endpoint': ('post', '/api/books/return/bulk/?wait=5', {"book_ids": [book.id]}),
+        'holders.get_holders?fields=id,name': ('get', '/api/holders/?fields=id,name', None),
+        'holders.get_holders?fields=books': ('get', '/api/holders/?fields=id,name,books', None),
+        'holders.get_holder': ('get', f'/api/holders/{alice.id}/', None),
+        'holders.get_holders_summary': ('get', '/api/holders/summary/', None),
+        'holders.create_holder': ('post', '/api/holders/', {"name": "Carol"}),
+        'holders.update_holder': ('put', f'/api/holders/{bob.id}/', {"name": "Robert"}),
+        'holders.patch_holder': ('patch', f'/api/holders/{bob.id}/', {"name": "Bobby"}),
+        'holders.delete_holder': ('delete', f'/api/holders/{bob.id}/', None),
+        'tasks.get_task': ('get', '/api/tasks/does-not-exist/', None),
+        'imports.get_import': ('get', f'/api/imports/{job.id}/', None),
+        'stats.get_loan_stats': ('get', '/api/stats/loans/?limit=100&days=366', None),
+        'events.stream_events': ('get', '/api/events/', None),
+        'metrics.metrics': ('get', '/metrics', None),
+    }
+
+
+def test_every_route_has_a_budget(client):
+    endpoints = {rule.endpoint for rule in client.application.url_map.iter_rules()} - {'static'}
+    assert endpoints <= {name.partition('?')[0] for name in QUERY_BUDGETS}
+
+
+@pytest.mark.parametrize('name', sorted(QUERY_BUDGETS))
+def test_route_query_budget(client, db_session, max_queries, name):
+    method, url, body = requests_by_budget(db_session)[name]
+    if isinstance(body, str):
+        kwargs = {'data': body, 'content_type': 'application/x-ndjson'}
+    else:
+        kwargs = {'data': json.dumps(body), 'content_type': 'application/json'} if body is not None else {}
+    with max_queries(QUERY_BUDGETS[name]):
+        response = getattr(client, method)(url, **kwargs)
+        response.get_data()  # streamed responses run their queries here
+    assert response.status_code < 500, response.get_data(as_text=True)
+
+
+def test_query_headers(client):
+    response = client.get('/api/books/')
+    assert int(response.headers['X-Query-Count']) >= 1
+    assert response.headers['Server-Timing'].startswith('db;dur=')
+
+
+def test_repeated_statements_are_flagged_as_n_plus_one(db_session):
+    db_session.expire_all()
+    with instrumentation.collect_queries() as stats:
+        holders = db_session.query(Holder).all()
+        for holder in holders:
+            holder.books  # lazy load per holder
+    suspects = dict(stats.repeated(len(holders)))
+    assert any('FROM books' in statement for statement in suspects)
+
+
+def test_request_n_plus_one_is_logged(client, monkeypatch, caplog):
+    from app.routes import holders
+    monkeypatch.setattr(holders, 'selectinload', lazyload)
+    monkeypatch.setitem(client.application.config, 'N_PLUS_ONE_THRESHOLD', 2)
+    with caplog.at_level(logging.WARNING, logger='app.instrumentation'):
+        client.get('/api/holders/?fields=id,books')
+    assert any('Possible N+1' in message for message in caplog.messages)
+
+
+def test_slow_statements_are_logged(client, monkeypatch, caplog):
+    monkeypatch.setattr(instrumentation, '_slow_query_seconds', 1e-9)
+    with caplog.at_level(logging.WARNING, logger='app.instrumentation'):
+        client.get('/api/books/')
+    assert any(message.startswith('Slow query') for message in caplog.messages)
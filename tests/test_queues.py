@@ -0,0 +1,50 @@
+import pytest
+
+from app.celery import BULK_QUEUE, INTERACTIVE_QUEUE, PRIORITY_HIGH, celery
+from app.worker import worker_argv, worker_options
+
+
+@pytest.mark.parametrize("task_name, queue", [
+    ("app.tasks.checkout.checkout_book", INTERACTIVE_QUEUE),
+    ("app.tasks.return_book.return_book_task", INTERACTIVE_QUEUE),
+    ("app.tasks.bulk.checkout_books_bulk", BULK_QUEUE),
+    ("app.tasks.bulk.return_books_bulk", BULK_QUEUE),
+    ("app.tasks.imports.import_books", BULK_QUEUE),
+    ("app.tasks.loans.refresh_loan_rollups", BULK_QUEUE),
+    ("app.tasks.counts.reconcile_holder_book_counts", BULK_QUEUE),
+    ("app.tasks.unrouted", BULK_QUEUE),
+])
+def test_task_routes(task_name, queue):
+    route = celery.amqp.router.route({}, task_name)
+    assert route["queue"].name == queue
+
+
+def test_interactive_tasks_are_high_priority():
+    route = celery.amqp.router.route({}, "app.tasks.checkout.checkout_book")
+    assert route["priority"] == PRIORITY_HIGH
+    assert celery.conf.broker_transport_options["priority_steps"][0] == PRIORITY_HIGH
+
+
+def test_worker_profiles(monkeypatch):
+    from app import celery as celery_module
+    monkeypatch.setitem(celery_module.QUEUE_PROFILES, INTERACTIVE_QUEUE,
+                        {"prefetch_multiplier": 4, "acks_late": False})
+    monkeypatch.setitem(celery_module.QUEUE_PROFILES, BULK_QUEUE,
+                        {"prefetch_multiplier": 1, "acks_late": True})
+    assert worker_options([INTERACTIVE_QUEUE]) == {"prefetch_multiplier": 4, "acks_late": False}
+    # A mixed worker takes the conservative setting of each
+    assert worker_options([INTERACTIVE_QUEUE, BULK_QUEUE]) == {"prefetch_multiplier": 1, "acks_late": True}
+
+
+def test_worker_argv_selects_queues():
+    argv = worker_argv([BULK_QUEUE], ["--concurrency=1"])
+    assert argv[:3] == ["worker", "--queues", BULK_QUEUE]
+    assert "--prefetch-multiplier" in argv
+    assert argv[-1] == "--concurrency=1"
+
+
+def test_worker_rejects_unknown_queue():
+    with pytest.raises(ValueError):
+        worker_options(["celery"])
+    with pytest.raises(ValueError):
+        worker_options([])
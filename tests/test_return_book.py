@@ -33,8 +33,8 @@ def test_return_book_task_endpoint_integration(client, db_session):
         print(f"DEBUG: Library id={library.id}, Book id={book.id}")
 
     # Call endpoint (should trigger real Celery task)
-    print(f"DEBUG: POST /api/books/{book.id}/return/")
-    response = client.post(f"/api/books/{book.id}/return/")
+    print(f"DEBUG: POST /api/books/{book.id}/return/?wait=10")
+    response = client.post(f"/api/books/{book.id}/return/?wait=10")
     print(f"DEBUG: Response status={response.status_code}, data={response.get_data(as_text=True)}")
 
     assert response.status_code == 200
@@ -0,0 +1,83 @@
+import pytest
+
+
+@pytest.fixture
+def catalog(client):
+    alice_id = client.get("/api/holders/?name=Alice").get_json()[0]["id"]
+    books = [
+        ("The Dark Tower", "Stephen King", 1982, alice_id),
+        ("It", "Stephen King", 1986, None),
+        ("Darkness Visible", "William Styron", 1990, None),
+        ("Sophie's Choice", "William Styron", 1979, None),
+    ]
+    library_id = client.get("/api/holders/?name=Library").get_json()[0]["id"]
+    for title, author, year, holder_id in books:
+        client.post("/api/books/", json={
+            "title": title,
+            "author": author,
+            "published_year": year,
+            "holder_id": holder_id or library_id,
+        })
+    return alice_id
+
+
+def test_search_matches_title_prefix(client, catalog):
+    resp = client.get("/api/books/search/?q=dark")
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert {b["title"] for b in body["results"]} == {"The Dark Tower", "Darkness Visible"}
+    assert body["total"] == 2
+
+
+def test_search_matches_author_and_requires_all_terms(client, catalog):
+    body = client.get("/api/books/search/?q=stephen king").get_json()
+    assert {b["title"] for b in body["results"]} == {"The Dark Tower", "It"}
+    body = client.get("/api/books/search/?q=king styron").get_json()
+    assert body["results"] == []
+    assert body["total"] == 0
+
+
+def test_search_facets(client, catalog):
+    facets = client.get("/api/books/search/?q=william").get_json()["facets"]
+    assert facets["author"] == [{"value": "William Styron", "count": 2}]
+    assert facets["published_year"] == [{"value": 1970, "count": 1}, {"value": 1990, "count": 1}]
+    assert facets["availability"] == [{"value": "available", "count": 2}]
+
+    facets = client.get("/api/books/search/?q=king").get_json()["facets"]
+    assert facets["availability"] == [
+        {"value": "available", "count": 1},
+        {"value": "checked_out", "count": 1},
+    ]
+
+
+def test_search_sparse_fields_and_limit(client, catalog):
+    body = client.get("/api/books/search/?q=king&fields=id,title&limit=1").get_json()
+    assert len(body["results"]) == 1
+    assert set(body["results"][0]) == {"id", "title"}
+    assert body["total"] == 2
+
+
+def test_search_sees_updated_titles(client, catalog):
+    book = client.get("/api/books/search/?q=sophie").get_json()["results"][0]
+    client.put(f"/api/books/{book['id']}/", json={
+        "title": "Lie Down in Darkness",
+        "author": book["author"],
+        "published_year": 1951,
+        "holder_id": book["holder_id"],
+    })
+    assert client.get("/api/books/search/?q=sophie").get_json()["total"] == 0
+    assert client.get("/api/books/search/?q=lie down").get_json()["total"] == 1
+
+
+def test_search_requires_query(client):
+    for url in ("/api/books/search/", "/api/books/search/?q=", "/api/books/search/?q=%22%26"):
+        resp = client.get(url)
+        assert resp.status_code == 400
+        assert resp.get_json() == {"error": "q is required"}
+
+
+def test_search_loads_holders_with_the_results(db_session, catalog, max_queries):
+    from app.search import search_books
+    with max_queries(2):
+        books = search_books(db_session, ["dark"], 10, load_holders=True)
+        assert {book.holder.name for book in books} == {"Alice", "Library"}
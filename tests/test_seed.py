@@ -0,0 +1,64 @@
+from sqlalchemy import func, select
+
+from app import seed
+from app.book_counts import library_book_count
+from app.loans import CHECKOUT, refresh_rollups
+from app.models import Book, BookLoanTotal, Holder, HolderLoanTotal, LoanDaily, LoanEvent, LoanRollupState, db
+from app.sample_data import SAMPLE_BOOKS, load_sample_data
+
+
+def test_generation_is_deterministic():
+    holder_ids = list(range(2, 12))
+    first = list(seed.generate_books(200, holder_ids, 1, seed=7))
+    assert first == list(seed.generate_books(200, holder_ids, 1, seed=7))
+    assert first != list(seed.generate_books(200, holder_ids, 1, seed=8))
+    assert list(seed.generate_holders(50, seed=7)) == list(seed.generate_holders(50, seed=7))
+
+
+def test_generated_books_are_plausible():
+    books = list(seed.generate_books(1000, [2, 3, 4], 1, checked_out=0.25))
+    titles, authors, years, holder_ids = zip(*books)
+    assert all(titles) and all(authors)
+    assert all(1900 <= year <= 2024 for year in years)
+    checked_out = sum(holder_id != 1 for holder_id in holder_ids)
+    assert 150 < checked_out < 350
+    assert len(set(authors)) < len(authors)  # prolific authors repeat
+
+
+def test_load_synthetic_data(client):
+    with client.application.app_context():
+        loaded = seed.load_synthetic_data(db.engine, books=2500, holders=40, seed=3, batch_size=1000)
+        assert loaded['books'] == 2500 and loaded['holders'] == 40
+        again = seed.load_synthetic_data(db.engine, books=10, holders=40, seed=3)
+        assert again['holders'] == 40  # names do not collide with the first load
+        assert db.session.scalar(select(func.count()).select_from(Holder).where(Holder.name == 'Library')) == 1
+
+
+def test_load_replace_clears_existing_rows(client):
+    with client.application.app_context():
+        book = db.session.scalars(select(Book)).first()
+        db.session.add(LoanEvent(book_id=book.id, holder_id=book.holder_id, kind=CHECKOUT))
+        db.session.commit()
+        refresh_rollups(db.session)
+        seed.load_synthetic_data(db.engine, books=100, holders=5, replace=True)
+        for model in (LoanEvent, LoanDaily, BookLoanTotal, HolderLoanTotal, LoanRollupState):
+            assert db.session.scalar(select(func.count()).select_from(model)) == 0
+        assert db.session.scalar(select(func.count()).select_from(Book)) == 100
+        assert db.session.scalar(select(func.count()).select_from(Holder)) == 6
+        assert db.session.scalar(select(func.sum(Holder.book_count))) + library_book_count(db.session) == 100
+
+
+def test_seed_data_command(client):
+    runner = client.application.test_cli_runner()
+    result = runner.invoke(args=['seed-data', '--books', '300', '--holders', '10', '--replace'], input='y\n')
+    assert result.exit_code == 0, result.output
+    assert 'Loaded 10 holders and 300 books' in result.output
+    response = client.get('/api/books/?limit=1000')
+    assert len(response.get_json()) == 300
+
+
+def test_load_sample_data_is_idempotent_and_cheap(db_session, max_queries):
+    with max_queries(3):
+        load_sample_data(db_session)
+    assert db_session.query(Book).count() == len(SAMPLE_BOOKS)
+    assert all(book.author and book.published_year for book in db_session.query(Book))
@@ -0,0 +1,42 @@
+import uuid
+
+from celery import Celery
+
+from app import serialization
+from app.celery import celery
+from app.tasks.bulk import checkout_books_bulk
+from app.tasks.checkout import checkout_book
+
+
+def test_small_payloads_are_not_compressed():
+    data = serialization.dumps({"status": "success", "book_id": 1, "holder_id": 2})
+    assert data[:1] == b"m"
+    assert serialization.loads(data) == {"status": "success", "book_id": 1, "holder_id": 2}
+
+
+def test_large_payloads_are_compressed():
+    payload = {"results": [{"book_id": i, "status": "success", "holder_id": 2} for i in range(1000)]}
+    data = serialization.dumps(payload)
+    assert data[:1] == b"z"
+    assert len(data) < len(serialization.msgpack.packb(payload)) / 2
+    assert serialization.loads(data) == payload
+
+
+def test_results_round_trip_through_backend():
+    app = Celery("t", broker="memory://", backend="cache+memory://")
+    app.conf.update(
+        result_serializer=celery.conf.result_serializer,
+        result_accept_content=celery.conf.result_accept_content,
+    )
+    result = {"status": "success", "results": [{"book_id": i, "status": "success"} for i in range(500)]}
+    task_id = uuid.uuid4().hex
+    app.backend.store_result(task_id, result, "SUCCESS")
+    assert app.AsyncResult(task_id).get() == result
+
+
+def test_result_policy():
+    # Nothing is stored unless a task opts in; polled tasks do
+    assert celery.conf.task_ignore_result is True
+    assert checkout_book.ignore_result is False
+    assert checkout_books_bulk.ignore_result is False
+    assert celery.conf.result_expires <= 3600
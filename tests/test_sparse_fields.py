@@ -0,0 +1,60 @@
+import pytest
+from sqlalchemy import event
+
+
+@pytest.fixture
+def statements(client):
+    from app.models import db
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    with client.application.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def test_holders_fields_skip_nested_books(client):
+    resp = client.get("/api/holders/?fields=id,name")
+    assert resp.status_code == 200
+    assert all(set(h) == {"id", "name"} for h in resp.get_json())
+
+
+def test_holders_include_books(client):
+    resp = client.get("/api/holders/?fields=name&include=books")
+    assert resp.status_code == 200
+    library = next(h for h in resp.get_json() if h["name"] == "Library")
+    assert set(library) == {"name", "books"}
+    assert len(library["books"]) == 3
+
+
+def test_book_detail_fields(client):
+    book_id = client.get("/api/books/").get_json()[0]["id"]
+    resp = client.get(f"/api/books/{book_id}/?fields=title")
+    assert resp.status_code == 200
+    assert set(resp.get_json()) == {"title"}
+
+
+def test_unknown_field_rejected(client):
+    resp = client.get("/api/books/?fields=nope")
+    assert resp.status_code == 400
+
+
+def test_holders_list_query_count_is_fixed(client, statements):
+    for i in range(10):
+        client.post("/api/holders/", json={"name": f"Reader {i}"})
+    statements.clear()
+    resp = client.get("/api/holders/")
+    assert resp.status_code == 200
+    # One query for the page of holders, one selectin query for all their books
+    assert len(statements) == 2
+
+
+def test_books_list_query_count_is_fixed(client, statements):
+    statements.clear()
+    resp = client.get("/api/books/")
+    assert resp.status_code == 200
+    assert len(statements) == 1
@@ -0,0 +1,27 @@
+import json
+import os
+
+from benchmarks.bench_startup import measure
+
+# Generous ceiling for a cold `import app; app.create_app()`; tighten via env in CI
+STARTUP_BUDGET_MS = float(os.environ.get("STARTUP_BUDGET_MS", "2000"))
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_web_startup_does_not_load_worker_modules():
+    # -X importtime lists every module the statement imported
+    modules = set(measure("import app; app.create_app()", cwd=REPO_ROOT)["modules"])
+    assert "app.tasks" not in modules
+    assert "celery" not in modules
+    assert "flask_migrate" not in modules
+
+
+def test_startup_does_not_connect():
+    # measure() points every URL at an unresolvable host; any connect would fail
+    measure("import app; app.create_app(); import app.sample_data", cwd=REPO_ROOT)
+    measure("from app.celery import celery; celery.loader.import_default_modules()", cwd=REPO_ROOT)
+
+
+def test_web_startup_budget():
+    result = measure("import app; app.create_app()", cwd=REPO_ROOT)
+    assert result["import_ms"] < STARTUP_BUDGET_MS, json.dumps(result["modules"])